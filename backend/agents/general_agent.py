@@ -0,0 +1,26 @@
+from __future__ import annotations
+
+from typing import Any
+
+from models.types import Artifact
+
+from .base import AgentResult, BaseAgent
+
+
+class GeneralAgent(BaseAgent):
+    name = "general"
+    description = "Answers open-ended HR questions directly with Gemini responses."
+
+    def build_response(self, user_message: str, tool_payload: dict[str, Any]) -> AgentResult:
+        summary = tool_payload.get("message") or (
+            "I could not find a specific answer. Please reach out to the HR team for help."
+        )
+        artifacts = [
+            Artifact(
+                id="general-answer",
+                kind="text",
+                payload=summary,
+            )
+        ]
+        requires_human = bool(tool_payload.get("requires_human"))
+        return AgentResult(message=summary, artifacts=artifacts, requires_human=requires_human)
@@ -0,0 +1,65 @@
+"""Microbenchmark: AG UI event serialization, Pydantic vs. the template encoder.
+
+Run from ``backend/``::
+
+    python -m benchmarks.event_encoding [--events 200000]
+"""
+from __future__ import annotations
+
+import argparse
+import time
+from typing import Any, Callable
+
+from models.ag_ui_encoder import _EventTemplate
+from models.ag_ui_types import (
+    RunFinishedEvent,
+    RunStartedEvent,
+    TextMessageContentEvent,
+    ToolCallResultEvent,
+)
+
+SAMPLES: list[tuple[type, dict[str, Any]]] = [
+    (TextMessageContentEvent, {"messageId": "msg_1a2b3c4d", "delta": "Employees accrue 1.5 days of PTO "}),
+    (TextMessageContentEvent, {"messageId": "msg_1a2b3c4d", "delta": "per month — “rollover” \"up\" to 20\n"}),
+    (RunStartedEvent, {"threadId": "thread_1", "runId": "run_1", "parentRunId": None}),
+    (ToolCallResultEvent, {"messageId": "m", "toolCallId": "t", "content": '{"componentId": null}'}),
+    (RunFinishedEvent, {"threadId": "t", "runId": "r", "result": {"toolId": "general.answer", "ok": True}}),
+]
+
+
+def _rate(encode: Callable[[type, dict[str, Any]], str], model: type, fields: dict[str, Any], count: int) -> float:
+    started = time.perf_counter()
+    for _ in range(count):
+        encode(model, fields)
+    return count / (time.perf_counter() - started)
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=200_000)
+    args = parser.parse_args(argv)
+
+    templates: dict[type, _EventTemplate] = {}
+
+    def pydantic_encode(model: type, fields: dict[str, Any]) -> str:
+        return model(**fields).model_dump_json(by_alias=True)
+
+    def template_encode(model: type, fields: dict[str, Any]) -> str:
+        template = templates.get(model) or templates.setdefault(model, _EventTemplate(model))
+        return template.encode(fields)
+
+    for model, fields in SAMPLES:
+        expected = pydantic_encode(model, fields)
+        actual = template_encode(model, fields)
+        if actual != expected:
+            raise SystemExit(f"wire format mismatch for {model.__name__}:\n  {expected}\n  {actual}")
+
+    print(f"{'event':<28}{'pydantic ev/s':>16}{'template ev/s':>16}{'speedup':>10}")
+    for model, fields in SAMPLES[:1] + SAMPLES[2:]:
+        before = _rate(pydantic_encode, model, fields, args.events)
+        after = _rate(template_encode, model, fields, args.events)
+        print(f"{model.__name__:<28}{before:>16,.0f}{after:>16,.0f}{after / before:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Deterministic stand-in for the ``google.generativeai`` SDK.
+
+Mimics the blocking calls ``GeminiClient`` makes (``GenerativeModel``,
+``start_chat().send_message`` and ``generate_content(stream=True)``) with
+fixed latencies, so benchmarks exercise the real executor, routing and
+streaming code paths without network access.
+"""
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+from types import SimpleNamespace
+from typing import Any, Iterator
+
+from core.intent_classifier import keyword_hits
+from core.model_provider import route_response
+
+
+@dataclass
+class ModelProfile:
+    route_latency: float = 0.3
+    first_token_latency: float = 0.4
+    tokens_per_second: float = 50.0
+    tokens: int = 60
+
+
+def _tool_for(prompt: str, tool_names: list[str]) -> str:
+    hits = keyword_hits(prompt)
+    for tool in ("leave.applyForm", "policy.showCard"):
+        if tool in hits and tool in tool_names:
+            return tool
+    return "general.answer"
+
+
+class FakeChat:
+    def __init__(self, model: "FakeModel") -> None:
+        self.model = model
+        self.history: list[Any] = []
+
+    def send_message(self, content: Any) -> Any:
+        time.sleep(self.model.profile.route_latency)
+        prompt = content if isinstance(content, str) else str(content)
+        return route_response([{"call": _tool_for(prompt, self.model.tool_names), "args": {"question": prompt}}])
+
+
+class FakeModel:
+    def __init__(self, profile: ModelProfile, model_name: str = "fake", tools: Any = None, **_: Any) -> None:
+        self.profile = profile
+        self.model_name = model_name
+        declarations = (tools or [{}])[0].get("function_declarations", [])
+        self.tool_names = [declaration.get("name") for declaration in declarations]
+
+    def start_chat(self, history: Any = None) -> FakeChat:
+        return FakeChat(self)
+
+    def generate_content(self, contents: Any, stream: bool = False) -> Any:
+        time.sleep(self.profile.first_token_latency)
+        if stream:
+            return self._stream()
+        return SimpleNamespace(text="".join(f"token{index} " for index in range(self.profile.tokens)))
+
+    def _stream(self) -> Iterator[Any]:
+        interval = 1 / self.profile.tokens_per_second if self.profile.tokens_per_second > 0 else 0
+        for index in range(self.profile.tokens):
+            if index and interval:
+                time.sleep(interval)
+            yield SimpleNamespace(text=f"token{index} ")
+
+
+class FakeProvider:
+    """Model provider (see ``core.model_provider``) serving :class:`FakeModel`."""
+
+    def __init__(self, profile: ModelProfile) -> None:
+        self.profile = profile
+
+    def GenerativeModel(self, model_name: str = "fake", **config: Any) -> FakeModel:  # noqa: N802 - SDK name
+        return FakeModel(self.profile, model_name=model_name, **config)
+
+
+def install(client: Any, provider: Any) -> None:
+    """Point a ``GeminiClient`` at ``provider`` (a :class:`FakeProvider` or a replay)."""
+    client._load_client(provider)
+    client.register_tools(client._tools)
@@ -0,0 +1,256 @@
+"""Benchmark: concurrent SSE clients against ``/ag-ui/run`` with a simulated model.
+
+Starts the real app under uvicorn in a child process with the shared Gemini
+client pointed at :mod:`benchmarks.fake_gemini` (fixed routing latency,
+time to first token and tokens/s) or, with ``--replay``, at a recording of
+real traffic (see ``core.model_provider``). Then drives ``--clients``
+concurrent SSE clients through ``--runs`` runs. Reports runs/s, TTFB, time to first text,
+p50/p95/p99 run latency and the server's CPU time and RSS (from ``/proc``),
+and writes everything to a JSON file for comparison across commits. Works
+offline. Run from ``backend/``::
+
+    python -m benchmarks.load_test [--clients 32] [--runs 256] [--output results.json]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any
+
+import httpx
+
+from benchmarks.fake_gemini import FakeProvider, ModelProfile, install
+from core.gemini_client import get_gemini_client
+from core.model_provider import ReplayProvider
+
+PROMPTS = (
+    "I need PTO next week",
+    "what is the remote work policy",
+    "hello there, who are you?",
+    "how do I expense a conference ticket",
+)
+RESULTS_DIR = Path(__file__).resolve().parent.parent / ".cache" / "benchmarks"
+
+
+def _profile(args: argparse.Namespace) -> ModelProfile:
+    return ModelProfile(
+        route_latency=args.route_ms / 1000,
+        first_token_latency=args.first_token_ms / 1000,
+        tokens_per_second=args.tokens_per_s,
+        tokens=args.tokens,
+    )
+
+
+def _serve(args: argparse.Namespace) -> None:
+    import uvicorn
+
+    from main import app
+
+    if args.replay:
+        provider: Any = ReplayProvider(args.replay, args.latency_scale)
+    else:
+        provider = FakeProvider(_profile(args))
+    client = get_gemini_client()
+    install(client, provider)
+    if not args.local_routing:
+        client.intent_threshold = math.inf
+    uvicorn.run(app, host="127.0.0.1", port=args.serve, log_level="warning")
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _proc_stats(pid: int) -> dict[str, float] | None:
+    """CPU seconds and RSS of ``pid`` from /proc (Linux only)."""
+    try:
+        stat = Path(f"/proc/{pid}/stat").read_text().rsplit(")", 1)[1].split()
+        status = Path(f"/proc/{pid}/status").read_text().splitlines()
+    except OSError:
+        return None
+    memory = {line.split(":")[0]: int(line.split()[1]) for line in status if line.startswith(("VmRSS", "VmHWM"))}
+    ticks = os.sysconf("SC_CLK_TCK")
+    return {
+        "cpu_seconds": (int(stat[11]) + int(stat[12])) / ticks,
+        "rss_mb": memory.get("VmRSS", 0) / 1024,
+        "peak_rss_mb": memory.get("VmHWM", 0) / 1024,
+    }
+
+
+def _percentiles(values: list[float]) -> dict[str, float]:
+    if not values:
+        return {}
+    ordered = sorted(values)
+
+    def rank(p: float) -> float:
+        return ordered[min(len(ordered) - 1, max(0, math.ceil(p / 100 * len(ordered)) - 1))]
+
+    return {
+        "mean": sum(ordered) / len(ordered),
+        "p50": rank(50),
+        "p95": rank(95),
+        "p99": rank(99),
+        "max": ordered[-1],
+    }
+
+
+async def _one_run(client: httpx.AsyncClient, index: int, identical: bool = False) -> dict[str, Any]:
+    # Unique prompts so the decision and answer caches do not short-circuit the
+    # model, unless a burst of identical questions is what is being measured.
+    content = PROMPTS[-1] if identical else f"{PROMPTS[index % len(PROMPTS)]} #{index}"
+    body = {
+        "threadId": f"bench_{index}",
+        "runId": f"run_{index}",
+        "messages": [{"id": f"user_{index}", "role": "user", "content": content}],
+    }
+    started = time.perf_counter()
+    result: dict[str, Any] = {"ttfb": None, "first_text": None, "error": None}
+    try:
+        async with client.stream("POST", "/ag-ui/run", json=body) as response:
+            result["ttfb"] = time.perf_counter() - started
+            async for line in response.aiter_lines():
+                if result["first_text"] is None and line.startswith('data: {"type":"TEXT_MESSAGE_CONTENT"'):
+                    result["first_text"] = time.perf_counter() - started
+                elif line.startswith('data: {"type":"RUN_ERROR"'):
+                    result["error"] = line[6:]
+    except httpx.HTTPError as exc:
+        result["error"] = repr(exc)
+    result["latency"] = time.perf_counter() - started
+    return result
+
+
+async def _drive(base_url: str, clients: int, runs: int, identical: bool = False) -> tuple[list[dict[str, Any]], float]:
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=120) as client:
+        await _one_run(client, -1)  # warm-up, not counted
+        pending = iter(range(runs))
+        results: list[dict[str, Any]] = []
+
+        async def worker() -> None:
+            for index in pending:
+                results.append(await _one_run(client, index, identical))
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(clients)))
+        return results, time.perf_counter() - started
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _run(args: argparse.Namespace) -> dict[str, Any]:
+    port = _free_port()
+    command = [
+        sys.executable, "-m", "benchmarks.load_test", "--serve", str(port),
+        "--route-ms", str(args.route_ms), "--first-token-ms", str(args.first_token_ms),
+        "--tokens-per-s", str(args.tokens_per_s), "--tokens", str(args.tokens),
+    ] + (["--local-routing"] if args.local_routing else [])
+    if args.replay:
+        command += ["--replay", str(args.replay.resolve()), "--latency-scale", str(args.latency_scale)]
+    server = subprocess.Popen(command, cwd=Path(__file__).resolve().parent.parent, stdout=subprocess.DEVNULL)
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        deadline = time.monotonic() + 30
+        while True:
+            try:
+                httpx.get(f"{base_url}/health", timeout=1).raise_for_status()
+                break
+            except httpx.HTTPError:
+                if server.poll() is not None or time.monotonic() > deadline:
+                    raise SystemExit("benchmark server failed to start")
+                time.sleep(0.1)
+
+        before = _proc_stats(server.pid)
+        results, elapsed = asyncio.run(_drive(base_url, args.clients, args.runs, args.identical_prompts))
+        after = _proc_stats(server.pid)
+        metrics = httpx.get(f"{base_url}/metrics", timeout=5).text
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+
+    ok = [result for result in results if result["error"] is None]
+    summary: dict[str, Any] = {
+        "runs": len(results),
+        "errors": len(results) - len(ok),
+        "seconds": elapsed,
+        "runs_per_s": len(results) / elapsed,
+        "ttfb": _percentiles([result["ttfb"] for result in ok if result["ttfb"] is not None]),
+        "first_text": _percentiles([result["first_text"] for result in ok if result["first_text"] is not None]),
+        "latency": _percentiles([result["latency"] for result in ok]),
+        "coalesced_gemini_calls": sum(
+            float(line.rsplit(" ", 1)[1]) for line in metrics.splitlines() if line.startswith("gemini_coalesced_requests_total")
+        ),
+    }
+    if before and after:
+        summary["server"] = {
+            "cpu_seconds": after["cpu_seconds"] - before["cpu_seconds"],
+            "cpu_percent": 100 * (after["cpu_seconds"] - before["cpu_seconds"]) / elapsed,
+            "rss_mb": after["rss_mb"],
+            "peak_rss_mb": after["peak_rss_mb"],
+        }
+    return summary
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--runs", type=int, default=256)
+    parser.add_argument("--route-ms", type=float, default=300)
+    parser.add_argument("--first-token-ms", type=float, default=400)
+    parser.add_argument("--tokens-per-s", type=float, default=50)
+    parser.add_argument("--tokens", type=int, default=60)
+    parser.add_argument("--local-routing", action="store_true", help="let the intent classifier skip the router")
+    parser.add_argument("--identical-prompts", action="store_true", help="every run asks the same question")
+    parser.add_argument("--replay", type=Path, help="serve a GEMINI_PROVIDER=record recording instead of the fake model")
+    parser.add_argument("--latency-scale", type=float, default=1.0, help="multiply replayed latencies")
+    parser.add_argument("--output", type=Path, help="JSON results file (default .cache/benchmarks/)")
+    parser.add_argument("--serve", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    if args.serve:
+        _serve(args)
+        return
+
+    summary = _run(args)
+    config = {key: value for key, value in vars(args).items() if key not in {"output", "serve"}}
+    config["replay"] = str(args.replay) if args.replay else None
+    config["gemini_max_concurrency"] = int(os.getenv("GEMINI_MAX_CONCURRENCY", "8"))
+    commit = _git_commit()
+    report = {"commit": commit, "timestamp": time.time(), "config": config, "results": summary}
+    output = args.output or RESULTS_DIR / f"load_test-{commit or 'local'}-{int(time.time())}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+
+    print(
+        f"{summary['runs']} runs, {summary['errors']} errors, {summary['runs_per_s']:.1f} runs/s, "
+        f"{summary['coalesced_gemini_calls']:.0f} coalesced Gemini calls"
+    )
+    for name in ("ttfb", "first_text", "latency"):
+        stats = summary[name]
+        if stats:
+            print(
+                f"{name:<11}" + "".join(f"{key}={stats[key] * 1000:>8.1f}ms " for key in ("p50", "p95", "p99", "max"))
+            )
+    if "server" in summary:
+        server = summary["server"]
+        print(f"server     cpu={server['cpu_percent']:.0f}% rss={server['rss_mb']:.0f}MB peak={server['peak_rss_mb']:.0f}MB")
+    print(f"wrote {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Benchmark: SSE frames/s and bytes/s with and without delta coalescing.
+
+A synthetic run streams ``--tokens`` text deltas at ``--token-interval-ms``
+through ``RunRegistry.stream`` into a run buffer; a fast and a slow (``--slow-send-ms`` per
+frame) consumer follow it, coalescing on their own side. ``peak q`` is the
+largest number of buffered events the consumer had not read yet. Run from ``backend/``::
+
+    python -m benchmarks.sse_coalescing [--tokens 2000]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+from dataclasses import replace
+from typing import AsyncIterator
+
+from core.run_buffer import RunBufferConfig, RunBuffers
+from core.run_registry import RunRegistry
+from core.sse_coalescer import CoalescingConfig, FrameCoalescer, TextDelta
+from core.state_backend import MemoryStateBackend
+
+
+async def _events(tokens: int, interval: float) -> AsyncIterator[object]:
+    yield {"event": "message", "data": '{"type":"TEXT_MESSAGE_START","messageId":"m"}'}
+    for index in range(tokens):
+        if interval:
+            await asyncio.sleep(interval)
+        yield TextDelta("m", f"tok{index % 10} ")
+    yield {"event": "message", "data": '{"type":"TEXT_MESSAGE_END","messageId":"m"}'}
+
+
+async def _run(config: CoalescingConfig, tokens: int, interval: float, send_delay: float) -> dict[str, float]:
+    registry = RunRegistry(MemoryStateBackend())
+    buffers = RunBuffers(RunBufferConfig())
+    coalescer = FrameCoalescer(config)
+    frames = 0
+    payload = 0
+    peak_queue = 0
+    started = time.perf_counter()
+    stream = registry.stream(
+        "thread",
+        "run",
+        _events(tokens, interval),
+        on_cancel=lambda reason: {},
+        max_queued=config.max_queued_events,
+    )
+    subscription = buffers.subscribe(buffers.start("thread", "run", stream))
+    async for frame in buffers.follow(subscription, coalescer.frames):
+        frames += 1
+        payload += len(frame["data"])
+        peak_queue = max(peak_queue, subscription.buffer.last_id - subscription.position)
+        if send_delay:
+            await asyncio.sleep(send_delay)
+    elapsed = time.perf_counter() - started
+    return {
+        "frames": frames,
+        "seconds": elapsed,
+        "frames_per_s": frames / elapsed,
+        "bytes_per_s": payload / elapsed,
+        "kilobytes": payload / 1024,
+        "peak_queue": peak_queue,
+    }
+
+
+async def _main(args: argparse.Namespace) -> None:
+    base = CoalescingConfig.from_env()
+    configs = {
+        "off": replace(base, frame_bytes=0),
+        "coalesced": base,
+    }
+    print(
+        f"{'consumer':<10}{'mode':<11}{'frames':>8}{'KB':>8}{'seconds':>9}{'frames/s':>10}{'KB/s':>8}{'peak q':>8}"
+    )
+    for consumer, send_delay in (("fast", 0.0), ("slow", args.slow_send_ms / 1000)):
+        for mode, config in configs.items():
+            result = await _run(config, args.tokens, args.token_interval_ms / 1000, send_delay)
+            print(
+                f"{consumer:<10}{mode:<11}{result['frames']:>8}{result['kilobytes']:>8.1f}{result['seconds']:>9.2f}"
+                f"{result['frames_per_s']:>10,.0f}{result['bytes_per_s'] / 1024:>8.1f}{result['peak_queue']:>8}"
+            )
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tokens", type=int, default=2000)
+    parser.add_argument("--token-interval-ms", type=float, default=0.5)
+    parser.add_argument("--slow-send-ms", type=float, default=5.0)
+    asyncio.run(_main(parser.parse_args(argv)))
+
+
+if __name__ == "__main__":
+    main()
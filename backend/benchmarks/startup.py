@@ -0,0 +1,122 @@
+"""Benchmark: cold start of ``main:app``.
+
+Measures, over ``--runs`` fresh processes:
+
+* ``import``: wall time of ``import main`` and the peak RSS after it.
+* ``ready``: time from spawning ``uvicorn main:app`` until ``/health``
+  answers (imports plus the lifespan startup), and the server's RSS then.
+
+A placeholder ``GEMINI_API_KEY`` is set when none is configured so the
+Gemini SDK code path is measured; no model request is made. Pass
+``--warm-up`` to start the servers with ``GEMINI_WARM_UP=true``. Results go
+to a JSON file tagged with the git commit, like ``benchmarks.load_test``.
+Run from ``backend/``::
+
+    python -m benchmarks.startup [--runs 5] [--warm-up] [--output results.json]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any
+
+import httpx
+
+from benchmarks.load_test import RESULTS_DIR, _free_port, _git_commit, _percentiles, _proc_stats
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+_IMPORT_PROBE = (
+    "import time; started = time.perf_counter(); import main; elapsed = time.perf_counter() - started; "
+    "import resource; print('IMPORT', elapsed, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024)"
+)
+
+
+def _env(warm_up: bool) -> dict[str, str]:
+    env = dict(os.environ)
+    if not (env.get("GEMINI_API_KEY") or env.get("GOOGLE_API_KEY")):
+        env["GEMINI_API_KEY"] = "startup-benchmark-placeholder"
+    env["GEMINI_WARM_UP"] = "true" if warm_up else "false"
+    return env
+
+
+def _measure_import(env: dict[str, str]) -> tuple[float, float]:
+    output = subprocess.run(
+        [sys.executable, "-c", _IMPORT_PROBE], cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True
+    ).stdout
+    _, elapsed, rss_mb = next(line for line in output.splitlines() if line.startswith("IMPORT ")).split()
+    return float(elapsed), float(rss_mb)
+
+
+def _measure_ready(env: dict[str, str]) -> tuple[float, dict[str, float] | None]:
+    port = _free_port()
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR,
+        env=env,
+        stdout=subprocess.DEVNULL,
+    )
+    try:
+        deadline = time.monotonic() + 60
+        while True:
+            try:
+                httpx.get(f"http://127.0.0.1:{port}/health", timeout=1).raise_for_status()
+                break
+            except httpx.HTTPError:
+                if server.poll() is not None or time.monotonic() > deadline:
+                    raise SystemExit("benchmark server failed to start")
+                time.sleep(0.01)
+        ready = time.perf_counter() - started
+        return ready, _proc_stats(server.pid)
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+
+
+def _run(args: argparse.Namespace) -> dict[str, Any]:
+    env = _env(args.warm_up)
+    imports = [_measure_import(env) for _ in range(args.runs)]
+    readies = [_measure_ready(env) for _ in range(args.runs)]
+    rss = [stats["rss_mb"] for _, stats in readies if stats]
+    return {
+        "runs": args.runs,
+        "import_seconds": _percentiles([elapsed for elapsed, _ in imports]),
+        "import_peak_rss_mb": max(rss_mb for _, rss_mb in imports),
+        "ready_seconds": _percentiles([ready for ready, _ in readies]),
+        "ready_rss_mb": max(rss) if rss else None,
+    }
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--warm-up", action="store_true", help="start servers with GEMINI_WARM_UP=true")
+    parser.add_argument("--output", type=Path, help="JSON results file (default .cache/benchmarks/)")
+    args = parser.parse_args(argv)
+
+    summary = _run(args)
+    commit = _git_commit()
+    report = {
+        "commit": commit,
+        "timestamp": time.time(),
+        "config": {"runs": args.runs, "warm_up": args.warm_up},
+        "results": summary,
+    }
+    output = args.output or RESULTS_DIR / f"startup-{commit or 'local'}-{int(time.time())}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+
+    for name in ("import_seconds", "ready_seconds"):
+        stats = summary[name]
+        print(f"{name:<15}" + "".join(f"{key}={stats[key] * 1000:>7.0f}ms " for key in ("mean", "p50", "max")))
+    print(f"import peak rss={summary['import_peak_rss_mb']:.0f}MB, server rss when ready={summary['ready_rss_mb'] or 0:.0f}MB")
+    print(f"wrote {output}")
+
+
+if __name__ == "__main__":
+    main()
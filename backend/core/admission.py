@@ -0,0 +1,179 @@
+"""Admission control and fair queueing for Gemini calls.
+
+Each blocking Gemini call holds one of ``limit`` slots until its worker thread
+returns. The limit defaults to the size of the Gemini thread pool, so calls
+wait here, where the queue is visible and bounded, and not inside the pool.
+
+Waiting calls are queued per thread (taken from :data:`current_thread`) and
+slots are handed out round-robin across threads. A thread with a dozen queued
+calls therefore delays another thread by at most one call per turn.
+
+Instead of queueing without bound, a call is shed with
+:class:`AdmissionRejected` in three cases:
+
+* ``max_queue`` calls are already waiting;
+* the expected wait, based on queue position and recent slot hold times,
+  exceeds ``max_wait``;
+* it has already waited ``max_wait`` seconds.
+
+The exception carries a retry hint derived from the same estimate.
+
+All methods are called from the event loop, so no locking is needed.
+"""
+from __future__ import annotations
+
+import asyncio
+import math
+import os
+import time
+from collections import OrderedDict, deque
+from contextvars import ContextVar
+from typing import Callable
+
+from .metrics import Counter, Gauge, Histogram
+
+ADMISSION_IN_USE = Gauge("gemini_admission_in_use", "Gemini call slots currently held.")
+ADMISSION_QUEUE_DEPTH = Gauge("gemini_admission_queue_depth", "Gemini calls waiting for a slot.")
+ADMISSION_WAIT_SECONDS = Histogram(
+    "gemini_admission_wait_seconds", "Time Gemini calls waited for a slot.", labels=("call",)
+)
+ADMISSION_SHED = Counter(
+    "gemini_admission_shed_total", "Gemini calls rejected instead of queued, by reason.", labels=("reason",)
+)
+
+# The AG UI thread a Gemini call is made for; runs set it, tasks they start inherit it.
+current_thread: ContextVar[str | None] = ContextVar("gemini_admission_thread", default=None)
+
+# Weight of the newest sample in the moving average of slot hold times.
+_HOLD_SMOOTHING = 0.2
+
+
+class AdmissionRejected(Exception):
+    """A Gemini call was shed; ``retry_after`` is a suggested delay in seconds."""
+
+    def __init__(self, message: str, retry_after: float) -> None:
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    def __init__(self, limit: int = 8, max_queue: int = 64, max_wait: float = 5.0) -> None:
+        self.limit = max(1, limit)
+        self.max_queue = max(0, max_queue)
+        self.max_wait = max_wait
+        self.in_use = 0
+        self.queued = 0
+        # Waiters per thread; the first key is served next and then moved to the end.
+        self._queues: OrderedDict[str | None, deque[asyncio.Future]] = OrderedDict()
+        self._hold_seconds = 0.0
+
+    @classmethod
+    def from_env(cls) -> "AdmissionController":
+        return cls(
+            # One slot per Gemini pool thread, so calls never queue inside the pool.
+            limit=int(os.getenv("GEMINI_MAX_CONCURRENCY", "8")),
+            max_queue=int(os.getenv("GEMINI_ADMISSION_QUEUE_SIZE", "64")),
+            max_wait=float(os.getenv("GEMINI_ADMISSION_MAX_WAIT_SECONDS", "5")),
+        )
+
+    def expected_wait(self, ahead: int | None = None) -> float:
+        """Seconds a call queued behind ``ahead`` others (default: all) should wait."""
+        ahead = self.queued if ahead is None else ahead
+        if self.in_use < self.limit and ahead == 0:
+            return 0.0
+        return (ahead // self.limit + 1) * self._hold_seconds
+
+    async def admit(self, call: str) -> Callable[[], None]:
+        """Wait for a slot; returns the function that gives it back (safe to call twice)."""
+        started = time.perf_counter()
+        if self.in_use < self.limit and self.queued == 0:
+            self._acquire()
+        else:
+            await self._wait(call, started)
+        ADMISSION_WAIT_SECONDS.observe(time.perf_counter() - started, call)
+        held_since = time.perf_counter()
+        released = False
+
+        def release() -> None:
+            nonlocal released
+            if not released:
+                released = True
+                held = time.perf_counter() - held_since
+                self._hold_seconds += _HOLD_SMOOTHING * (held - self._hold_seconds)
+                self._release()
+
+        return release
+
+    def snapshot(self) -> dict[str, float | int]:
+        return {
+            "limit": self.limit,
+            "inUse": self.in_use,
+            "queued": self.queued,
+            "threads": len(self._queues),
+            "expectedWaitSeconds": round(self.expected_wait(), 3),
+        }
+
+    async def _wait(self, call: str, started: float) -> None:
+        if self.queued >= self.max_queue:
+            raise self._shed("queue_full", call)
+        if self.max_wait > 0 and self.expected_wait() > self.max_wait:
+            raise self._shed("expected_wait", call)
+        thread = current_thread.get()
+        waiter = asyncio.get_running_loop().create_future()
+        self._queues.setdefault(thread, deque()).append(waiter)
+        self.queued += 1
+        ADMISSION_QUEUE_DEPTH.set(self.queued)
+        try:
+            timeout = self.max_wait - (time.perf_counter() - started) if self.max_wait > 0 else None
+            await asyncio.wait_for(waiter, timeout)
+        except asyncio.TimeoutError:
+            self._dequeue(thread, waiter)
+            raise self._shed("deadline", call) from None
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was handed over just as the caller went away.
+                self._release()
+            else:
+                self._dequeue(thread, waiter)
+            raise
+
+    def _shed(self, reason: str, call: str) -> AdmissionRejected:
+        ADMISSION_SHED.inc(reason)
+        retry_after = float(max(1, math.ceil(self.expected_wait())))
+        print(f"[Admission] Shed {call} call ({reason}); {self.queued} queued, retry in {retry_after:g}s")
+        return AdmissionRejected(
+            f"The assistant is busy right now. Please retry in {retry_after:g} seconds.", retry_after
+        )
+
+    def _dequeue(self, thread: str | None, waiter: asyncio.Future) -> None:
+        queue = self._queues.get(thread)
+        if queue is not None and waiter in queue:
+            queue.remove(waiter)
+            self.queued -= 1
+            if not queue:
+                del self._queues[thread]
+            ADMISSION_QUEUE_DEPTH.set(self.queued)
+
+    def _acquire(self) -> None:
+        self.in_use += 1
+        ADMISSION_IN_USE.set(self.in_use)
+
+    def _release(self) -> None:
+        self.in_use -= 1
+        # Hand the freed slot to the next thread in turn.
+        while self._queues and self.in_use < self.limit:
+            thread, queue = next(iter(self._queues.items()))
+            waiter = queue.popleft()
+            self.queued -= 1
+            if queue:
+                self._queues.move_to_end(thread)
+            else:
+                del self._queues[thread]
+            if not waiter.done():
+                self.in_use += 1
+                waiter.set_result(None)
+        ADMISSION_IN_USE.set(self.in_use)
+        ADMISSION_QUEUE_DEPTH.set(self.queued)
+
+
+gemini_admission = AdmissionController.from_env()
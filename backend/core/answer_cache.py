@@ -0,0 +1,230 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import tempfile
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any
+
+from .cache import TTLCache
+
+_NUM_PERM = 32
+_BANDS = 8
+_ROWS = _NUM_PERM // _BANDS
+_PRIME = (1 << 61) - 1
+# Fixed coefficients keep signatures stable across processes and restarts.
+_PERMUTATIONS = [
+    ((i * 0x9E3779B1 + 0x7F4A7C15) % _PRIME | 1, (i * 0x85EBCA6B + 0xC2B2AE35) % _PRIME)
+    for i in range(1, _NUM_PERM + 1)
+]
+
+
+def _shingles(text: str, size: int = 4) -> set[int]:
+    padded = f" {text} "
+    if len(padded) <= size:
+        return {zlib.crc32(padded.encode())}
+    return {zlib.crc32(padded[i:i + size].encode()) for i in range(len(padded) - size + 1)}
+
+
+def minhash(text: str) -> tuple[int, ...]:
+    """MinHash signature of the character 4-gram shingles of ``text``."""
+    shingles = _shingles(text)
+    return tuple(min((a * h + b) % _PRIME for h in shingles) for a, b in _PERMUTATIONS)
+
+
+def _scoped(scope: str, question: str) -> str:
+    # Normalized questions never contain a newline, so it cannot be confused with one.
+    return f"{scope}\n{question}" if scope else question
+
+
+def _split(key: str) -> tuple[str, str]:
+    scope, separator, question = key.partition("\n")
+    return (scope, question) if separator else ("", key)
+
+
+def _similarity(left: tuple[int, ...], right: tuple[int, ...]) -> float:
+    return sum(1 for x, y in zip(left, right) if x == y) / _NUM_PERM
+
+
+class AnswerCache:
+    """Two-tier cache of generated answers keyed on normalized questions.
+
+    The exact tier is a :class:`TTLCache`. When ``similarity`` is above zero, a
+    MinHash/LSH index over the same entries also serves near-duplicate
+    questions whose estimated Jaccard similarity reaches the threshold. With a
+    ``path`` the entries are persisted as JSON and reloaded on start-up.
+    :meth:`save_soon` batches the writes: at most one every ``flush_delay``
+    seconds, always of the latest entries, on a single writer thread so an
+    older snapshot never replaces a newer one.
+
+    ``scope`` names what else an answer depended on, such as the policy
+    corpus it was grounded on. Answers are only served within their own scope,
+    and near duplicates are matched on the question alone.
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        ttl: float,
+        similarity: float = 0.0,
+        path: str | Path | None = None,
+        namespace: str = "",
+        flush_delay: float = 1.0,
+    ) -> None:
+        self.similarity = similarity
+        self.namespace = namespace
+        self.path = Path(path) if path else None
+        self.flush_delay = flush_delay
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="answer-cache")
+        self._flush_handle: asyncio.TimerHandle | None = None
+        self._dirty = False
+        self.near_hits = 0
+        self._signatures: dict[str, tuple[int, ...]] = {}
+        self._buckets: dict[tuple[int, tuple[int, ...]], set[str]] = {}
+        self._exact: TTLCache[str, str] = TTLCache(
+            max_entries=max_entries, ttl=ttl, clock=time.time, on_evict=self._unindex
+        )
+        if self.path:
+            self.load()
+
+    @classmethod
+    def from_env(cls, namespace: str = "") -> "AnswerCache":
+        return cls(
+            max_entries=int(os.getenv("GENERAL_ANSWER_CACHE_SIZE", "512")),
+            ttl=float(os.getenv("GENERAL_ANSWER_CACHE_TTL", "3600")),
+            similarity=float(os.getenv("GENERAL_ANSWER_CACHE_SIMILARITY", "0")),
+            path=os.getenv("GENERAL_ANSWER_CACHE_PATH") or None,
+            namespace=namespace,
+            flush_delay=float(os.getenv("GENERAL_ANSWER_CACHE_FLUSH_SECONDS", "1")),
+        )
+
+    def get(self, key: str, scope: str = "") -> str | None:
+        answer = self._exact.get(_scoped(scope, key))
+        if answer is not None or self.similarity <= 0:
+            return answer
+        signature = minhash(key)
+        best_key, best_score = None, self.similarity
+        for candidate in self._candidates(signature):
+            if _split(candidate)[0] != scope:
+                continue
+            score = _similarity(signature, self._signatures[candidate])
+            if score >= best_score:
+                best_key, best_score = candidate, score
+        if best_key is None:
+            return None
+        answer = self._exact.peek(best_key)
+        if answer is not None:
+            self.near_hits += 1
+        return answer
+
+    def set(self, key: str, answer: str, scope: str = "") -> None:
+        if not self._exact.enabled:
+            return
+        entry = _scoped(scope, key)
+        self._exact.set(entry, answer)
+        if self.similarity > 0 and entry not in self._signatures:
+            self._index(entry, minhash(key))
+
+    def load(self) -> None:
+        if not self.path or not self.path.exists():
+            return
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError) as exc:
+            print(f"[AnswerCache] Ignoring unreadable cache file {self.path}: {exc}")
+            return
+        if data.get("namespace") != self.namespace:
+            return
+        now = time.time()
+        for key, expires_at, answer in data.get("entries", []):
+            if expires_at > now:
+                self._exact.set(key, answer, ttl=expires_at - now)
+                if self.similarity > 0 and key not in self._signatures:
+                    self._index(key, minhash(_split(key)[1]))
+
+    def dump(self) -> dict[str, Any]:
+        """Serializable copy of the live entries; cheap enough to take on the loop."""
+        return {
+            "namespace": self.namespace,
+            "entries": [[key, expires_at, answer] for key, expires_at, answer in self._exact.items()],
+        }
+
+    def save(self, payload: dict[str, Any] | None = None) -> None:
+        """Atomically write ``payload`` (or a fresh dump) to ``path``.
+
+        This blocks on disk I/O, so callers on the event loop should take the
+        dump themselves and hand only the write to an executor.
+        """
+        if not self.path:
+            return
+        payload = payload if payload is not None else self.dump()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with tempfile.NamedTemporaryFile(
+            "w", encoding="utf-8", dir=self.path.parent, suffix=".tmp", delete=False
+        ) as handle:
+            json.dump(payload, handle)
+        os.replace(handle.name, self.path)
+
+    def save_soon(self) -> None:
+        """Persist the entries within ``flush_delay`` seconds; call from the event loop."""
+        if not self.path:
+            return
+        self._dirty = True
+        if self._flush_handle is None:
+            self._flush_handle = asyncio.get_running_loop().call_later(max(0.0, self.flush_delay), self._flush)
+
+    async def flush(self) -> None:
+        """Write pending entries now and wait for every queued write, e.g. on shutdown."""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if self._dirty:
+            self._flush()
+        # Writes run in order on one thread, so this returns after the last one.
+        await asyncio.wrap_future(self._writer.submit(lambda: None))
+
+    def _flush(self) -> None:
+        self._flush_handle = None
+        self._dirty = False
+        # The dump is taken on the loop, where entries change; only the write is handed off.
+        self._writer.submit(self._save_logged, self.dump())
+
+    def _save_logged(self, payload: dict[str, Any]) -> None:
+        try:
+            self.save(payload)
+        except OSError as exc:
+            print(f"[AnswerCache] Could not write {self.path}: {exc}")
+
+    def snapshot(self) -> dict[str, Any]:
+        return {**self._exact.snapshot(), "nearHits": self.near_hits}
+
+    def _candidates(self, signature: tuple[int, ...]) -> set[str]:
+        found: set[str] = set()
+        for band in range(_BANDS):
+            found |= self._buckets.get(self._band_key(signature, band), set())
+        return found
+
+    @staticmethod
+    def _band_key(signature: tuple[int, ...], band: int) -> tuple[int, tuple[int, ...]]:
+        return band, signature[band * _ROWS:(band + 1) * _ROWS]
+
+    def _index(self, key: str, signature: tuple[int, ...]) -> None:
+        self._signatures[key] = signature
+        for band in range(_BANDS):
+            self._buckets.setdefault(self._band_key(signature, band), set()).add(key)
+
+    def _unindex(self, key: str, _answer: str) -> None:
+        signature = self._signatures.pop(key, None)
+        if signature is None:
+            return
+        for band in range(_BANDS):
+            band_key = self._band_key(signature, band)
+            bucket = self._buckets.get(band_key)
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del self._buckets[band_key]
@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Generic, Hashable, Iterator, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expirations: int = 0
+
+    def as_dict(self) -> dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+class TTLCache(Generic[K, V]):
+    """Bounded LRU cache whose entries also expire after ``ttl`` seconds.
+
+    A non-positive ``max_entries`` or ``ttl`` disables caching entirely, so
+    callers can keep the lookup in place and switch it off via configuration.
+    ``on_evict`` is called for every entry dropped by eviction, expiry or
+    ``clear`` so secondary indexes can stay in sync.
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        ttl: float,
+        clock: Callable[[], float] = time.monotonic,
+        on_evict: Callable[[K, V], None] | None = None,
+    ) -> None:
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._clock = clock
+        self._on_evict = on_evict
+        self._entries: OrderedDict[K, tuple[float, V]] = OrderedDict()
+        self.stats = CacheStats()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.ttl > 0
+
+    def get(self, key: K) -> V | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.stats.misses += 1
+            return None
+        expires_at, value = entry
+        if expires_at <= self._clock():
+            del self._entries[key]
+            self.stats.expirations += 1
+            self.stats.misses += 1
+            self._evicted(key, value)
+            return None
+        self._entries.move_to_end(key)
+        self.stats.hits += 1
+        return value
+
+    def peek(self, key: K) -> V | None:
+        """Return a live value without touching recency or the counters."""
+        entry = self._entries.get(key)
+        if entry is None or entry[0] <= self._clock():
+            return None
+        return entry[1]
+
+    def set(self, key: K, value: V, ttl: float | None = None) -> None:
+        if not self.enabled:
+            return
+        self._entries[key] = (self._clock() + (ttl if ttl is not None else self.ttl), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            evicted_key, (_, evicted_value) = self._entries.popitem(last=False)
+            self.stats.evictions += 1
+            self._evicted(evicted_key, evicted_value)
+
+    def pop(self, key: K) -> V | None:
+        entry = self._entries.pop(key, None)
+        return entry[1] if entry is not None else None
+
+    def clear(self) -> None:
+        entries = list(self._entries.items())
+        self._entries.clear()
+        for key, (_, value) in entries:
+            self._evicted(key, value)
+
+    def expire(self) -> int:
+        """Drop every expired entry now instead of on its next lookup; returns how many."""
+        now = self._clock()
+        expired = [key for key, (expires_at, _) in self._entries.items() if expires_at <= now]
+        for key in expired:
+            _, value = self._entries.pop(key)
+            self.stats.expirations += 1
+            self._evicted(key, value)
+        return len(expired)
+
+    def items(self) -> Iterator[tuple[K, float, V]]:
+        """Yield ``(key, expires_at, value)`` for live entries, oldest first."""
+        now = self._clock()
+        for key, (expires_at, value) in list(self._entries.items()):
+            if expires_at > now:
+                yield key, expires_at, value
+
+    def _evicted(self, key: K, value: V) -> None:
+        if self._on_evict is not None:
+            self._on_evict(key, value)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def snapshot(self) -> dict[str, int]:
+        return {**self.stats.as_dict(), "size": len(self._entries), "maxEntries": self.max_entries}
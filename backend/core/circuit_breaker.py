@@ -0,0 +1,171 @@
+"""Circuit breaker for the Gemini backend.
+
+Every Gemini call reports its outcome and latency into a sliding time window.
+When the window holds at least ``min_calls`` calls and either the error rate
+or the share of slow calls crosses its threshold, the circuit opens and
+callers skip Gemini and use the local fallback right away instead of waiting
+out another failure. After ``open_seconds`` the circuit is half-open: up to
+``probes`` calls go through, and the circuit closes once that many have
+succeeded. Any failed probe opens it again.
+
+All methods are called from the event loop, so no locking is needed.
+"""
+from __future__ import annotations
+
+import os
+import time
+from collections import deque
+
+from .metrics import Counter, Gauge
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+BREAKER_STATE = Gauge(
+    "gemini_circuit_state", "1 for the circuit breaker's current state, 0 otherwise.", labels=("state",)
+)
+BREAKER_TRANSITIONS = Counter(
+    "gemini_circuit_transitions_total", "Circuit breaker state changes by new state.", labels=("state",)
+)
+BREAKER_REJECTED = Counter(
+    "gemini_circuit_rejected_total", "Gemini calls skipped because the circuit was open.", labels=("call",)
+)
+BREAKER_CALLS = Counter(
+    "gemini_circuit_calls_total", "Gemini call outcomes seen by the circuit breaker.", labels=("outcome",)
+)
+
+
+class CircuitBreaker:
+    def __init__(
+        self,
+        window: float = 30.0,
+        min_calls: int = 10,
+        error_rate: float = 0.5,
+        slow_call: float = 8.0,
+        slow_rate: float = 0.8,
+        open_seconds: float = 15.0,
+        probes: int = 2,
+    ) -> None:
+        self.window = window
+        self.min_calls = max(1, min_calls)
+        self.error_rate = error_rate
+        self.slow_call = slow_call
+        self.slow_rate = slow_rate
+        self.open_seconds = open_seconds
+        self.probes = max(1, probes)
+        self.state = CLOSED
+        # (monotonic time, failed, slow) per finished call inside the window.
+        self._calls: deque[tuple[float, bool, bool]] = deque()
+        self._failures = 0
+        self._slow = 0
+        self._opened_at = 0.0
+        self._probes_in_flight = 0
+        self._probe_successes = 0
+        for state in (CLOSED, OPEN, HALF_OPEN):
+            BREAKER_STATE.set(1 if state == self.state else 0, state)
+
+    @classmethod
+    def from_env(cls) -> "CircuitBreaker":
+        return cls(
+            window=float(os.getenv("GEMINI_BREAKER_WINDOW_SECONDS", "30")),
+            min_calls=int(os.getenv("GEMINI_BREAKER_MIN_CALLS", "10")),
+            error_rate=float(os.getenv("GEMINI_BREAKER_ERROR_RATE", "0.5")),
+            slow_call=float(os.getenv("GEMINI_BREAKER_SLOW_CALL_SECONDS", "8")),
+            slow_rate=float(os.getenv("GEMINI_BREAKER_SLOW_RATE", "0.8")),
+            open_seconds=float(os.getenv("GEMINI_BREAKER_OPEN_SECONDS", "15")),
+            probes=int(os.getenv("GEMINI_BREAKER_PROBES", "2")),
+        )
+
+    def allow(self, call: str) -> bool:
+        """Whether a ``call`` may go to Gemini now; each allowed call must be settled.
+
+        Settle it with exactly one of :meth:`success`, :meth:`failure` or
+        :meth:`abandon`.
+        """
+        if self.state == OPEN and time.monotonic() - self._opened_at >= self.open_seconds:
+            self._transition(HALF_OPEN)
+        if self.state == CLOSED:
+            return True
+        if self.state == HALF_OPEN and self._probes_in_flight + self._probe_successes < self.probes:
+            self._probes_in_flight += 1
+            return True
+        BREAKER_REJECTED.inc(call)
+        return False
+
+    def success(self, latency: float) -> None:
+        slow = latency >= self.slow_call
+        BREAKER_CALLS.inc("slow" if slow else "ok")
+        if self.state == HALF_OPEN:
+            self._probes_in_flight = max(0, self._probes_in_flight - 1)
+            if slow:
+                self._open()
+                return
+            self._probe_successes += 1
+            if self._probe_successes >= self.probes:
+                self._transition(CLOSED)
+            return
+        self._add(failed=False, slow=slow)
+
+    def failure(self) -> None:
+        BREAKER_CALLS.inc("error")
+        if self.state == HALF_OPEN:
+            self._probes_in_flight = max(0, self._probes_in_flight - 1)
+            self._open()
+            return
+        self._add(failed=True, slow=False)
+
+    def abandon(self) -> None:
+        """Settle a call that ended without an outcome (e.g. the client went away)."""
+        if self.state == HALF_OPEN:
+            self._probes_in_flight = max(0, self._probes_in_flight - 1)
+
+    def snapshot(self) -> dict[str, float | int | str]:
+        self._prune(time.monotonic())
+        calls = len(self._calls)
+        return {
+            "state": self.state,
+            "calls": calls,
+            "errorRate": self._failures / calls if calls else 0.0,
+            "slowRate": self._slow / calls if calls else 0.0,
+        }
+
+    def _add(self, failed: bool, slow: bool) -> None:
+        now = time.monotonic()
+        self._calls.append((now, failed, slow))
+        self._failures += failed
+        self._slow += slow
+        self._prune(now)
+        if self.state != CLOSED or len(self._calls) < self.min_calls:
+            return
+        calls = len(self._calls)
+        if self._failures / calls >= self.error_rate or self._slow / calls >= self.slow_rate:
+            self._open()
+
+    def _prune(self, now: float) -> None:
+        while self._calls and now - self._calls[0][0] > self.window:
+            _, failed, slow = self._calls.popleft()
+            self._failures -= failed
+            self._slow -= slow
+
+    def _open(self) -> None:
+        self._opened_at = time.monotonic()
+        self._transition(OPEN)
+
+    def _transition(self, state: str) -> None:
+        if state == self.state:
+            return
+        print(f"[CircuitBreaker] Gemini circuit {self.state} -> {state}")
+        self.state = state
+        self._probes_in_flight = 0
+        self._probe_successes = 0
+        if state == CLOSED:
+            # Start fresh so failures from before the outage cannot reopen it.
+            self._calls.clear()
+            self._failures = self._slow = 0
+        BREAKER_TRANSITIONS.inc(state)
+        for name in (CLOSED, OPEN, HALF_OPEN):
+            BREAKER_STATE.set(1 if name == state else 0, name)
+
+
+gemini_breaker = CircuitBreaker.from_env()
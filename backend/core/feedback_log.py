@@ -0,0 +1,224 @@
+"""Durable feedback log with write-behind batching.
+
+``submit`` only enqueues onto a bounded asyncio queue, so the request path
+never touches disk. A writer task drains the queue in batches of up to
+``batch_size`` records or ``flush_interval`` seconds and commits each batch
+in one SQLite WAL transaction (one fsync per batch) on a dedicated thread.
+The same transaction bumps per-bucket counters in ``feedback_counts`` so
+aggregation reads a small indexed rollup instead of scanning the raw log.
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any
+
+GROUPS = {"message": "message_id", "tool": "tool_id", "bucket": "bucket"}
+
+
+@dataclass
+class FeedbackRecord:
+    message_id: str
+    feedback: str
+    tool_id: str | None = None
+    thread_id: str | None = None
+    created_at: float = 0.0
+
+
+class FeedbackLog:
+    def __init__(
+        self,
+        path: str,
+        batch_size: int = 256,
+        flush_interval: float = 0.5,
+        max_pending: int = 10_000,
+        bucket_seconds: int = 3600,
+    ) -> None:
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.bucket_seconds = bucket_seconds
+        self.written = 0
+        self.rejected = 0
+        self._queue: asyncio.Queue[FeedbackRecord] = asyncio.Queue(max_pending)
+        self._writer: asyncio.Task | None = None
+        # One thread owns the connection, so writes and reads never interleave.
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="feedback-log")
+        self._conn: sqlite3.Connection | None = None
+
+    @classmethod
+    def from_env(cls) -> "FeedbackLog":
+        return cls(
+            path=os.getenv("FEEDBACK_DB_PATH", "feedback.sqlite3"),
+            batch_size=int(os.getenv("FEEDBACK_BATCH_SIZE", "256")),
+            flush_interval=float(os.getenv("FEEDBACK_FLUSH_MS", "500")) / 1000,
+            max_pending=int(os.getenv("FEEDBACK_MAX_PENDING", "10000")),
+            bucket_seconds=int(os.getenv("FEEDBACK_BUCKET_SECONDS", "3600")),
+        )
+
+    def start(self) -> None:
+        if self._writer is None or self._writer.done():
+            self._writer = asyncio.create_task(self._write_behind())
+
+    def submit(self, record: FeedbackRecord) -> bool:
+        """Queue ``record`` for writing; False when the buffer is full."""
+        self.start()
+        record.created_at = record.created_at or time.time()
+        try:
+            self._queue.put_nowait(record)
+        except asyncio.QueueFull:
+            self.rejected += 1
+            return False
+        return True
+
+    async def close(self) -> None:
+        """Flush everything queued, then stop the writer."""
+        if self._writer is not None:
+            await self._queue.join()
+            self._writer.cancel()
+            await asyncio.wait({self._writer})
+            self._writer = None
+        await asyncio.get_running_loop().run_in_executor(self._executor, self._close_sync)
+
+    async def summary(
+        self,
+        group_by: str = "tool",
+        since: float | None = None,
+        until: float | None = None,
+        tool_id: str | None = None,
+        message_id: str | None = None,
+    ) -> list[dict[str, Any]]:
+        """Like/dislike/copy counts per message, tool or time bucket."""
+        if group_by not in GROUPS:
+            raise ValueError(f"group_by must be one of {sorted(GROUPS)}")
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, self._summary_sync, GROUPS[group_by], since, until, tool_id, message_id
+        )
+
+    def snapshot(self) -> dict[str, int]:
+        return {"pending": self._queue.qsize(), "written": self.written, "rejected": self.rejected}
+
+    async def _write_behind(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            try:
+                await loop.run_in_executor(self._executor, self._write_sync, batch)
+                self.written += len(batch)
+            except Exception as exc:  # pragma: no cover - best effort guard
+                print(f"[Feedback] Dropped {len(batch)} records, write failed: {exc}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=FULL")
+            conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS feedback (
+                    id INTEGER PRIMARY KEY,
+                    created_at REAL NOT NULL,
+                    message_id TEXT NOT NULL,
+                    tool_id TEXT NOT NULL,
+                    thread_id TEXT,
+                    feedback TEXT NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS feedback_counts (
+                    bucket INTEGER NOT NULL,
+                    tool_id TEXT NOT NULL,
+                    message_id TEXT NOT NULL,
+                    feedback TEXT NOT NULL,
+                    count INTEGER NOT NULL,
+                    PRIMARY KEY (bucket, tool_id, message_id, feedback)
+                );
+                CREATE INDEX IF NOT EXISTS feedback_counts_tool ON feedback_counts (tool_id, bucket);
+                CREATE INDEX IF NOT EXISTS feedback_counts_message ON feedback_counts (message_id, bucket);
+                """
+            )
+            self._conn = conn
+        return self._conn
+
+    def _write_sync(self, batch: list[FeedbackRecord]) -> None:
+        conn = self._connect()
+        counts: dict[tuple[int, str, str, str], int] = {}
+        for record in batch:
+            key = (
+                int(record.created_at // self.bucket_seconds * self.bucket_seconds),
+                record.tool_id or "",
+                record.message_id,
+                record.feedback,
+            )
+            counts[key] = counts.get(key, 0) + 1
+        conn.execute("BEGIN")
+        try:
+            conn.executemany(
+                "INSERT INTO feedback (created_at, message_id, tool_id, thread_id, feedback) VALUES (?, ?, ?, ?, ?)",
+                [
+                    (record.created_at, record.message_id, record.tool_id or "", record.thread_id, record.feedback)
+                    for record in batch
+                ],
+            )
+            conn.executemany(
+                "INSERT INTO feedback_counts (bucket, tool_id, message_id, feedback, count) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (bucket, tool_id, message_id, feedback) DO UPDATE SET count = count + excluded.count",
+                [(*key, count) for key, count in counts.items()],
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _summary_sync(
+        self,
+        column: str,
+        since: float | None,
+        until: float | None,
+        tool_id: str | None,
+        message_id: str | None,
+    ) -> list[dict[str, Any]]:
+        filters, params = [], []
+        for clause, value in (
+            ("tool_id = ?", tool_id),
+            ("message_id = ?", message_id),
+            ("bucket >= ?", None if since is None else since // self.bucket_seconds * self.bucket_seconds),
+            ("bucket < ?", until),
+        ):
+            if value is not None:
+                filters.append(clause)
+                params.append(value)
+        where = f"WHERE {' AND '.join(filters)}" if filters else ""
+        rows = self._connect().execute(
+            f"SELECT {column}, feedback, SUM(count) FROM feedback_counts {where} GROUP BY {column}, feedback "
+            f"ORDER BY {column}",
+            params,
+        ).fetchall()
+        summary: dict[Any, dict[str, Any]] = {}
+        for key, feedback, count in rows:
+            entry = summary.setdefault(key, {"key": key, "like": 0, "dislike": 0, "copy": 0})
+            entry[feedback] = count
+        return list(summary.values())
+
+    def _close_sync(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+feedback_log = FeedbackLog.from_env()
@@ -1,12 +1,29 @@
 from __future__ import annotations
 
+import hashlib
 import json
 import os
 import asyncio
-from dataclasses import dataclass
-from typing import Any, Iterable
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, replace
+from typing import Any, AsyncIterator, Callable, Iterable, Sequence, TypeVar
 
-from . import interrupt_flag
+from .admission import AdmissionController, AdmissionRejected, gemini_admission
+from .cache import TTLCache
+from .circuit_breaker import CircuitBreaker, gemini_breaker
+from .intent_classifier import confidence_threshold, keyword_hits, ready_classifier
+from .model_provider import ModelProvider, get_provider
+from .metrics import FALLBACK_RESPONSES, GEMINI_COALESCED, GEMINI_SECONDS, ROUTING_DECISIONS, ROUTING_SECONDS
+from .single_flight import SingleFlight
+
+
+@dataclass
+class ToolCall:
+    tool_id: str
+    arguments: dict[str, Any]
 
 
 @dataclass
@@ -15,150 +32,686 @@ class GeminiDecision:
     tool_id: str
     arguments: dict[str, Any]
     rationale: str
+    # Set in single-round-trip mode when Gemini answered instead of calling a tool.
+    answer: str | None = None
+    # Further tools requested in the same turn, run alongside the first one.
+    extra_calls: list[ToolCall] = field(default_factory=list)
+
+    @property
+    def calls(self) -> list[ToolCall]:
+        """Every tool call in the decision, the primary one first."""
+        return [ToolCall(self.tool_id, self.arguments), *self.extra_calls]
+
+    def copy(self) -> "GeminiDecision":
+        """A copy whose argument dicts can be mutated without touching this one."""
+        return replace(
+            self,
+            arguments=dict(self.arguments),
+            extra_calls=[ToolCall(call.tool_id, dict(call.arguments)) for call in self.extra_calls],
+        )
 
 
 class GeminiUnavailableError(RuntimeError):
     """Raised when Gemini cannot be reached and no fallback is configured."""
 
 
+@dataclass
+class RoutingSession:
+    """A thread's routing chat; ``busy`` while a turn is in flight on it."""
+
+    chat: Any
+    busy: bool = False
+    turns: int = 0
+
+
+T = TypeVar("T")
+
+# Tool that single-round-trip mode replaces with a direct model answer.
+DIRECT_ANSWER_TOOL = "general.answer"
+
+_executor: ThreadPoolExecutor | None = None
+_executor_lock = threading.Lock()
+
+
+def gemini_executor() -> ThreadPoolExecutor:
+    """Return the bounded thread pool shared by every blocking Gemini SDK call.
+
+    The SDK is synchronous, so each call occupies a worker thread for the full
+    round trip. ``GEMINI_MAX_CONCURRENCY`` caps how many run at once; further
+    calls queue on the pool instead of stalling the event loop.
+    """
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                max_workers = max(1, int(os.getenv("GEMINI_MAX_CONCURRENCY", "8")))
+                _executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="gemini")
+    return _executor
+
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Canonical form of a user prompt used as a cache key."""
+    return _WHITESPACE.sub(" ", prompt).strip().strip("?!.").strip().lower()
+
+
+def with_context(prompt: str, context: Sequence[str]) -> str:
+    """Prefix a question with reference excerpts the model should ground on."""
+    if not context:
+        return prompt
+    excerpts = "\n".join(f"[{index}] {text}" for index, text in enumerate(context, start=1))
+    return (
+        "Use these company policy excerpts if they are relevant to the question. "
+        "Do not mention excerpts that are unrelated.\n"
+        f"{excerpts}\n\nQuestion: {prompt}"
+    )
+
+
+def history_contents(history: Sequence[dict[str, str]]) -> list[dict[str, Any]]:
+    """Gemini ``contents`` for earlier turns of a thread (``{"role", "content"}``)."""
+    return [
+        {"role": "model" if turn["role"] == "assistant" else "user", "parts": [turn["content"]]}
+        for turn in history
+    ]
+
+
+def with_history(prompt: str, history: Sequence[dict[str, str]]) -> Any:
+    """Gemini ``contents`` for ``prompt`` preceded by earlier turns of the thread."""
+    if not history:
+        return prompt
+    return [*history_contents(history), {"role": "user", "parts": [prompt]}]
+
+
+_CLAUSE_SPLIT = re.compile(r"\b(?:and|also|then|plus)\b|[;\n]", re.IGNORECASE)
+_QUESTION_START = re.compile(r"^\s*(?:what|how|when|where|which|who|why|is|are|can|do|does)\b", re.IGNORECASE)
+
+
+def _clause_tools(prompt: str) -> dict[str, str]:
+    """Workflow tools named by the clauses of ``prompt``, in order, each with its clauses.
+
+    A clause that hits both workflows is a policy question when it reads like
+    one ("what's the PTO policy") and a leave request otherwise. Clauses that
+    name the same tool are joined.
+    """
+    tools: dict[str, str] = {}
+    for clause in _CLAUSE_SPLIT.split(prompt):
+        clause = clause.strip(" \t,.")
+        hits = keyword_hits(clause)
+        if "leave.applyForm" in hits and "policy.showCard" in hits:
+            tool = "policy.showCard" if _QUESTION_START.match(clause) or "?" in clause else "leave.applyForm"
+        elif "leave.applyForm" in hits:
+            tool = "leave.applyForm"
+        elif "policy.showCard" in hits:
+            tool = "policy.showCard"
+        else:
+            continue
+        tools[tool] = f"{tools[tool]} and {clause}" if tool in tools else clause
+    return tools
+
+
+def _fingerprint(payload: Any) -> str:
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()[:16]
+
+
+def _consume_result(future: asyncio.Future) -> None:
+    # A call abandoned at its deadline still finishes on its thread; retrieve
+    # its outcome so a late exception is not logged as never retrieved.
+    if not future.cancelled():
+        future.exception()
+
+
 class GeminiClient:
-    def __init__(self, model_name: str | None = None) -> None:
+    def __init__(
+        self,
+        model_name: str | None = None,
+        provider: ModelProvider | None = None,
+        breaker: CircuitBreaker | None = None,
+        admission: AdmissionController | None = None,
+    ) -> None:
         self.model_name = model_name or os.getenv("GEMINI_MODEL", "gemini-2.5-flash")
+        # Shared by default: an outage affects every client of the same backend,
+        # and every client draws on the same thread pool.
+        self.breaker = breaker or gemini_breaker
+        self.admission = admission or gemini_admission
+        self.route_timeout = float(os.getenv("GEMINI_ROUTE_TIMEOUT_SECONDS", "10"))
+        self.first_token_timeout = float(os.getenv("GEMINI_FIRST_TOKEN_TIMEOUT_SECONDS", "10"))
         self._client = None
+        # The provider (and with it the SDK import) is attached on first use or by
+        # warm_up(), so importing the app stays cheap; see ``_ready``.
+        self._requested_provider = provider
+        self._loaded = False
+        self._load_lock = threading.Lock()
         self._tools: list[dict[str, Any]] = []
-        self._load_client()
+        self._tools_fingerprint = _fingerprint([])
+        self._tool_names: set[str] = set()
+        self._provider: ModelProvider | None = None
+        # Routing models carry the system prompt, agents and tools, built once per
+        # (mode, agents) and dropped when the tools change.
+        self._routing_models: dict[tuple[bool, tuple[tuple[str, str], ...]], Any] = {}
+        self._agent_fingerprints: dict[tuple[tuple[str, str], ...], str] = {}
+        self.session_max_turns = int(os.getenv("GEMINI_SESSION_MAX_TURNS", "8"))
+        self.sessions: TTLCache[tuple[str, bool], RoutingSession] = TTLCache(
+            max_entries=int(os.getenv("GEMINI_SESSION_POOL_SIZE", "256")),
+            ttl=float(os.getenv("GEMINI_SESSION_TTL", "1800")),
+        )
+        self.intent_threshold = confidence_threshold()
+        self.single_round_trip = os.getenv("GEMINI_SINGLE_ROUND_TRIP", "").lower() in {"1", "true", "yes"}
+        self.decision_cache: TTLCache[tuple[str, bool, str, str, str], GeminiDecision] = TTLCache(
+            max_entries=int(os.getenv("GEMINI_DECISION_CACHE_SIZE", "1024")),
+            ttl=float(os.getenv("GEMINI_DECISION_CACHE_TTL", "600")),
+        )
+        # Identical concurrent calls share one upstream request; see ``core.single_flight``.
+        self.single_flight = os.getenv("GEMINI_SINGLE_FLIGHT", "true").lower() not in {"0", "false", "no"}
+        self.in_flight: SingleFlight[tuple] = SingleFlight()
 
-    def _load_client(self) -> None:
-        api_key = os.getenv("GEMINI_API_KEY") or os.getenv("GOOGLE_API_KEY")
-        if not api_key:
-            return
+    def _load_client(self, provider: ModelProvider | None = None) -> None:
+        """Attach the model provider: live SDK, recorder or replay (see ``core.model_provider``)."""
         try:
-            import google.generativeai as genai  # type: ignore
-
-            genai.configure(api_key=api_key)
-            self._client = genai.GenerativeModel(model_name=self.model_name)
+            provider = provider or get_provider()
+            if provider is None:
+                return
+            self._client = provider.GenerativeModel(model_name=self.model_name)
+            self._provider = provider
         except Exception as exc:  # pragma: no cover - best effort guard
             print(f"[Gemini] Failed to initialize client: {exc}")
             self._client = None
+        finally:
+            # Only now, so concurrent first calls wait in warm_up() instead of seeing no client.
+            self._loaded = True
+
+    def warm_up(self) -> None:
+        """Attach the provider now (blocking; imports the SDK on first call)."""
+        if self._loaded:
+            return
+        with self._load_lock:
+            if not self._loaded:
+                self._load_client(self._requested_provider)
+
+    async def _ready(self) -> None:
+        # The SDK import takes most of a second; never run it on the event loop.
+        if not self._loaded:
+            await asyncio.get_running_loop().run_in_executor(None, self.warm_up)
 
     def register_tools(self, tool_schemas: Iterable[dict[str, Any]]) -> None:
         self._tools = list(tool_schemas)
+        # Part of every decision cache key, so a changed registry never serves stale routes.
+        self._tools_fingerprint = _fingerprint(self._tools)
+        self._tool_names = {schema.get("name") for schema in self._tools}
+        self._routing_models.clear()
+        self.sessions.clear()
 
-    async def generate_text(self, prompt: str) -> str:
+    async def _admit(self, call: str) -> Callable[[], None]:
+        """Wait for a Gemini slot; a shed call hands back its breaker permit."""
+        try:
+            return await self.admission.admit(call)
+        except (AdmissionRejected, asyncio.CancelledError):
+            self.breaker.abandon()
+            raise
+
+    async def _run_blocking(
+        self,
+        func: Callable[..., T],
+        *args: Any,
+        deadline: float | None = None,
+        on_done: Callable[[], None] | None = None,
+    ) -> T:
+        """Run ``func`` on the Gemini pool, giving up after ``deadline`` seconds.
+
+        The SDK call cannot be interrupted, so at the deadline it is left to
+        finish on its worker thread and ``asyncio.TimeoutError`` is raised.
+        ``on_done`` runs when the call really finishes.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(gemini_executor(), func, *args)
+        if on_done is not None:
+            future.add_done_callback(lambda _: on_done())
+        if not deadline or deadline <= 0:
+            return await future
+        future.add_done_callback(_consume_result)
+        return await asyncio.wait_for(asyncio.shield(future), deadline)
+
+    async def stream_text(
+        self,
+        prompt: str,
+        on_complete: Callable[[str], None] | None = None,
+        context: Sequence[str] = (),
+        history: Sequence[dict[str, str]] = (),
+    ) -> AsyncIterator[str]:
+        """Yield text deltas as Gemini produces them.
+
+        The SDK exposes streaming as a blocking iterator, so it is drained on a
+        worker thread and each chunk is handed back to the event loop through a
+        queue. Falls back to the canned response if nothing was streamed.
+        ``on_complete`` receives the full text only when the model streamed it
+        to the end, never for fallback or partial output. ``context`` excerpts
+        are prepended to the model prompt but not to the fallback text;
+        ``history`` turns (``{"role", "content"}``) are sent before it.
+
+        Concurrent calls without history for the same prompt and context share
+        one upstream stream. A caller that joins late is first given the chunks
+        it missed. Only the first caller's ``on_complete`` is called.
+        """
         prompt = prompt.strip()
         if not prompt:
-            return "I did not receive a question. Could you share more context?"
+            yield "I did not receive a question. Could you share more context?"
+            return
+
+        if history or not self.single_flight:
+            stream = self._stream(prompt, on_complete, context, history)
+        else:
+            key = ("stream", self.model_name, normalize_prompt(prompt), _fingerprint(list(context)))
+            if self.in_flight.joinable(key):
+                GEMINI_COALESCED.inc("stream")
+            stream = self.in_flight.stream(key, lambda: self._stream(prompt, on_complete, context))
+        async for chunk in stream:
+            yield chunk
 
-        if self._client:
+    async def _stream(
+        self,
+        prompt: str,
+        on_complete: Callable[[str], None] | None = None,
+        context: Sequence[str] = (),
+        history: Sequence[dict[str, str]] = (),
+    ) -> AsyncIterator[str]:
+        await self._ready()
+        if self._client and self.breaker.allow("stream"):
+            release = await self._admit("stream")
             loop = asyncio.get_running_loop()
+            queue: asyncio.Queue[Any] = asyncio.Queue()
+            stop = threading.Event()
+            done = object()
+
+            def _pump() -> None:
+                try:
+                    response = self._client.generate_content(
+                        with_history(with_context(prompt, context), history), stream=True
+                    )
+                    for chunk in response:
+                        if stop.is_set():
+                            break
+                        try:
+                            text = chunk.text
+                        except ValueError:
+                            # Chunks without text parts (e.g. safety metadata) raise here.
+                            continue
+                        if text:
+                            loop.call_soon_threadsafe(queue.put_nowait, text)
+                except Exception as exc:  # pragma: no cover - best effort guard
+                    loop.call_soon_threadsafe(queue.put_nowait, exc)
+                finally:
+                    loop.call_soon_threadsafe(queue.put_nowait, done)
+
+            started = time.perf_counter()
+            worker = loop.run_in_executor(gemini_executor(), _pump)
+            # The slot is held for as long as the worker thread drains the stream.
+            worker.add_done_callback(lambda _: release())
+            parts: list[str] = []
+            failed = False
+            # The breaker judges a stream by its first chunk: an error or no chunk
+            # within ``first_token_timeout`` is a failure, else its latency counts.
+            settled = False
             try:
-                response = await loop.run_in_executor(None, lambda: self._client.generate_content(prompt))
-                text = getattr(response, "text", None)
-                if text:
-                    return text.strip()
-            except Exception as exc:  # pragma: no cover - best effort guard
-                print(f"[Gemini] text generation failed: {exc}")
-
-        return self._fallback_text(prompt)
-
-    async def decide(self, user_prompt: str, agent_options: dict[str, str]) -> GeminiDecision:
-        if interrupt_flag.interrupt_flag.is_triggered():
-            raise InterruptedError("Conversation interrupted")
+                while True:
+                    if settled or self.first_token_timeout <= 0:
+                        item = await queue.get()
+                    else:
+                        try:
+                            item = await asyncio.wait_for(queue.get(), self.first_token_timeout)
+                        except asyncio.TimeoutError:
+                            print(f"[Gemini] no streamed text after {self.first_token_timeout:g}s")
+                            settled = failed = True
+                            self.breaker.failure()
+                            break
+                    if not settled:
+                        settled = True
+                        if isinstance(item, Exception):
+                            self.breaker.failure()
+                        else:
+                            self.breaker.success(time.perf_counter() - started)
+                    if item is done:
+                        break
+                    if isinstance(item, Exception):
+                        print(f"[Gemini] streaming failed: {item}")
+                        failed = True
+                        break
+                    parts.append(item)
+                    yield item
+            finally:
+                stop.set()
+                if not settled:
+                    self.breaker.abandon()
+            if worker.done() or not failed:
+                await worker
+            else:
+                # Timed out: the worker exits when the SDK next yields; do not wait for it.
+                worker.add_done_callback(_consume_result)
+            GEMINI_SECONDS.observe(time.perf_counter() - started, "stream")
+            if parts:
+                if on_complete is not None and not failed:
+                    on_complete("".join(parts))
+                return
+
+        yield self._fallback_text(prompt)
+
+    async def decide(
+        self,
+        user_prompt: str,
+        agent_options: dict[str, str],
+        thread_id: str | None = None,
+        follow_up: bool = False,
+        context: Sequence[str] = (),
+        history: Sequence[dict[str, str]] = (),
+    ) -> GeminiDecision:
+        """Pick the agent and tool for ``user_prompt``.
+
+        With a ``thread_id`` the Gemini call continues that thread's pooled
+        chat session, so follow-ups are routed with the earlier turns in view.
+        ``follow_up`` says the thread had earlier turns, which matters when its
+        session has expired or Gemini is unavailable.
+
+        In single-round-trip mode Gemini may answer the prompt itself, so it
+        gets the same grounding as ``general.answer``: the policy excerpts in
+        ``context`` and the thread's ``history`` window. Otherwise both are
+        ignored.
+        """
+        started = time.perf_counter()
+        decision, source = await self._route(user_prompt, agent_options, thread_id, follow_up, context, history)
+        ROUTING_SECONDS.observe(time.perf_counter() - started, source)
+        ROUTING_DECISIONS.inc(source)
+        return decision
+
+    async def _route(
+        self,
+        user_prompt: str,
+        agent_options: dict[str, str],
+        thread_id: str | None,
+        follow_up: bool = False,
+        context: Sequence[str] = (),
+        history: Sequence[dict[str, str]] = (),
+    ) -> tuple[GeminiDecision, str]:
+        await self._ready()
+        if not self.single_round_trip:
+            context, history = (), ()
         if self._client and self._tools:
-            decision = await self._call_gemini(user_prompt, agent_options)
+            agents = tuple(agent_options.items())
+            session = self._session(thread_id, agents)
+            # A follow-up may be routed by its context, so only first turns are routed
+            # locally, cached or shared with identical concurrent requests.
+            standalone = session.turns == 0 and not follow_up
+            agents_fingerprint = self._agent_fingerprints.get(agents)
+            if agents_fingerprint is None:
+                agents_fingerprint = self._agent_fingerprints[agents] = _fingerprint(agent_options)
+            cache_key = (
+                self.model_name,
+                self.single_round_trip,
+                normalize_prompt(user_prompt),
+                self._tools_fingerprint,
+                agents_fingerprint,
+                # A direct answer is only as current as the excerpts it was grounded on.
+                _fingerprint(list(context)) if context else "",
+            )
+            if standalone:
+                source, decision = "local", self._local_decision(user_prompt)
+                if decision is None:
+                    source, decision = "cache", self.decision_cache.get(cache_key)
+                    decision = decision.copy() if decision else None
+                if decision:
+                    # Not sent to Gemini, but the thread's next turn should still see it.
+                    self._record_turn(session, list(session.chat.history), user_prompt, decision)
+                    return decision, source
+            if standalone and self.single_flight:
+                decision, shared = await self.in_flight.do(
+                    ("route", *cache_key), lambda: self._call_gemini(user_prompt, agent_options, session, context, history)
+                )
+                # Every waiter gets the same object; give each its own copy.
+                decision = decision.copy() if decision else None
+                if shared:
+                    GEMINI_COALESCED.inc("route")
+                    if decision and not session.busy:
+                        # The call ran on another thread's session; keep this thread's history whole.
+                        self._record_turn(session, list(session.chat.history), user_prompt, decision)
+            else:
+                decision = await self._call_gemini(user_prompt, agent_options, session, context, history)
             if decision:
-                return decision
+                if standalone:
+                    self.decision_cache.set(cache_key, decision.copy())
+                return decision, "gemini"
         # fallback heuristics if Gemini is unavailable
-        return self._rule_based_decision(user_prompt, agent_options)
+        if not follow_up:
+            local = self._local_decision(user_prompt)
+            if local:
+                return local, "local"
+        return self._rule_based_decision(user_prompt, agent_options), "rule_based"
 
-    async def _call_gemini(self, user_prompt: str, agent_options: dict[str, str]) -> GeminiDecision | None:
-        try:
-            import google.generativeai as genai  # type: ignore
+    def _local_decision(self, user_prompt: str) -> GeminiDecision | None:
+        """Route confidently classified prompts without a Gemini round trip."""
+        if len(_clause_tools(user_prompt)) > 1:
+            # Several requests in one message; let the router split them into tool calls.
+            return None
+        classifier = ready_classifier()
+        if classifier is None:
+            # Still loading on its worker thread; route this one the slow way.
+            return None
+        prediction = classifier.predict(user_prompt)
+        if prediction.confidence < self.intent_threshold or prediction.tool_id not in self._tool_names:
+            return None
+        if self.single_round_trip and prediction.tool_id == DIRECT_ANSWER_TOOL:
+            # Routing through Gemini answers in the same call; going local would add one.
+            return None
+        return GeminiDecision(
+            agent_id=prediction.tool_id.split(".")[0],
+            tool_id=prediction.tool_id,
+            arguments={"question": user_prompt},
+            rationale=f"Local intent classifier (confidence {prediction.confidence:.2f})",
+        )
 
+    def _routing_model(self, direct: bool, agents: tuple[tuple[str, str], ...]) -> Any:
+        model = self._routing_models.get((direct, agents))
+        if model is not None:
+            return model
+        if direct:
+            # One call either answers in plain text or picks a UI tool; general.answer
+            # is withheld so the model answers itself instead of delegating.
             sys_prompt = (
-                "You orchestrate company HR assistants. "
-                "Choose the best agent and tool. Always respond with a single JSON object "
-                "containing agent_id, tool_id, arguments, and rationale."
+                "You are a company HR assistant. If one of the provided tools fits the "
+                "request, call it; if the message makes several requests, call one tool "
+                "per request. Otherwise answer the employee directly and concisely "
+                "in plain text."
             )
-            tools_payload = [{"function_declarations": self._tools}]
-            convo = self._client.start_chat(
-                history=[
-                    {
-                        "role": "system",
-                        "parts": [sys_prompt],
-                    },
-                ]
+            tools = [schema for schema in self._tools if schema.get("name") != DIRECT_ANSWER_TOOL]
+            mode = "AUTO"
+        else:
+            sys_prompt = (
+                "You orchestrate company HR assistants. "
+                "Choose the best agent and tool. When the message makes several distinct "
+                "requests, call one tool per request. Without tool calls, respond with a "
+                "single JSON object containing agent_id, tool_id, arguments, and rationale."
             )
-            agent_context = json.dumps(agent_options, indent=2)
-            result = convo.send_message(
-                [
-                    {
-                        "role": "user",
-                        "parts": [
-                            {
-                                "text": (
-                                    "Available agents (id -> description):\n"
-                                    f"{agent_context}\n\n"
-                                    "Decide on one agent and one tool to respond "
-                                    "to this user: \n" + user_prompt
-                                )
-                            }
-                        ],
-                    }
-                ],
-                tools=tools_payload,
-                tool_config={
-                    "function_calling_config": {
-                        "mode": "ANY",
-                    }
-                },
+            tools = self._tools
+            mode = "ANY"
+        agent_context = json.dumps(dict(agents), indent=2)
+        model = self._provider.GenerativeModel(
+            model_name=self.model_name,
+            system_instruction=f"{sys_prompt}\n\nAvailable agents (id -> description):\n{agent_context}",
+            tools=[{"function_declarations": tools}],
+            tool_config={"function_calling_config": {"mode": mode}},
+        )
+        self._routing_models[(direct, agents)] = model
+        return model
+
+    def _session(self, thread_id: str | None, agents: tuple[tuple[str, str], ...]) -> RoutingSession:
+        """The pooled session for ``thread_id``, or a one-off one if none applies."""
+        model = self._routing_model(self.single_round_trip, agents)
+        if thread_id is None:
+            return RoutingSession(model.start_chat())
+        key = (thread_id, self.single_round_trip)
+        session = self.sessions.get(key)
+        if session is not None and session.chat.model is model:
+            # A concurrent run on the same thread gets its own session instead of waiting.
+            return RoutingSession(model.start_chat()) if session.busy else session
+        session = RoutingSession(model.start_chat())
+        self.sessions.set(key, session)
+        return session
+
+    async def _call_gemini(
+        self,
+        user_prompt: str,
+        agent_options: dict[str, str],
+        session: RoutingSession | None = None,
+        context: Sequence[str] = (),
+        history: Sequence[dict[str, str]] = (),
+    ) -> GeminiDecision | None:
+        await self._ready()
+        if not self._client or not self.breaker.allow("route"):
+            return None
+        release = await self._admit("route")
+        if session is None:
+            session = self._session(None, tuple(agent_options.items()))
+        elif session.busy:
+            # Another run on the thread took the session while this one queued.
+            session = RoutingSession(session.chat.model.start_chat())
+        session.busy = True
+
+        def _release() -> None:
+            # After a timeout the call still owns the chat and its slot until its thread returns.
+            session.busy = False
+            release()
+
+        started = time.perf_counter()
+        try:
+            # send_message blocks for the whole round trip; keep it off the loop.
+            decision = await self._run_blocking(
+                self._call_gemini_sync,
+                session,
+                user_prompt,
+                self.single_round_trip,
+                context,
+                history,
+                deadline=self.route_timeout,
+                on_done=_release,
             )
-            for candidate in result.candidates:
-                for part in candidate.content.parts:
-                    if getattr(part, "function_call", None):
-                        call = part.function_call
-                        return GeminiDecision(
-                            agent_id=call.name.split(".")[0],
-                            tool_id=call.name,
-                            arguments=dict(call.args or {}),
-                            rationale="Chosen by Gemini",
-                        )
-                # fallback to JSON text part
-                if getattr(candidate, "content", None):
-                    for part in candidate.content.parts:
-                        if text := getattr(part, "text", None):
-                            try:
-                                data = json.loads(text)
-                                return GeminiDecision(
-                                    agent_id=data["agent_id"],
-                                    tool_id=data["tool_id"],
-                                    arguments=data.get("arguments", {}),
-                                    rationale=data.get("rationale", "Chosen by Gemini"),
-                                )
-                            except Exception:
-                                continue
+        except asyncio.CancelledError:
+            self.breaker.abandon()
+            raise
+        except asyncio.TimeoutError:
+            self.breaker.failure()
+            print(f"[Gemini] routing timed out after {self.route_timeout:g}s")
+            return None
         except Exception as exc:  # pragma: no cover - best effort guard
+            self.breaker.failure()
             print(f"[Gemini] call failed: {exc}")
+            return None
+        finally:
+            GEMINI_SECONDS.observe(time.perf_counter() - started, "route")
+        self.breaker.success(time.perf_counter() - started)
+        return decision
+
+    def _call_gemini_sync(
+        self,
+        session: RoutingSession,
+        user_prompt: str,
+        direct: bool = False,
+        context: Sequence[str] = (),
+        thread_history: Sequence[dict[str, str]] = (),
+    ) -> GeminiDecision | None:
+        """One routing turn on ``session``; SDK errors propagate to the breaker.
+
+        ``context`` and ``thread_history`` ground a direct answer like
+        ``general.answer``. The thread's own window replaces the session's
+        shorter record of earlier turns.
+        """
+        instruction = (
+            "Call a tool or answer this user directly: \n"
+            if direct
+            else "Decide on the agent and tool (one per request) to respond to this user: \n"
+        )
+        if thread_history:
+            session.chat.history = history_contents(thread_history)
+        history = list(session.chat.history)
+        result = session.chat.send_message(f"{instruction}{with_context(user_prompt, context)}")
+        decision = self._parse_decision(result, user_prompt, direct)
+        self._record_turn(session, history, user_prompt, decision)
+        return decision
+
+    def _record_turn(
+        self,
+        session: RoutingSession,
+        history: list[Any],
+        user_prompt: str,
+        decision: GeminiDecision | None,
+    ) -> None:
+        # Keep the turn as plain text so the next turn needs no function response,
+        # and cap the history so long threads do not grow every prompt.
+        called = ", ".join(call.tool_id for call in decision.calls) if decision else ""
+        reply = (decision.answer or f"Called {called}") if decision else "No decision"
+        session.chat.history = [
+            *history,
+            {"role": "user", "parts": [user_prompt]},
+            {"role": "model", "parts": [reply]},
+        ][-2 * self.session_max_turns:]
+        session.turns += 1
+
+    def _parse_decision(self, result: Any, user_prompt: str, direct: bool) -> GeminiDecision | None:
+        answer_parts: list[str] = []
+        calls: list[ToolCall] = []
+        for candidate in result.candidates:
+            for part in candidate.content.parts:
+                if getattr(part, "function_call", None):
+                    call = part.function_call
+                    calls.append(ToolCall(call.name, dict(call.args or {})))
+            if calls:
+                first, *extra = calls
+                return GeminiDecision(
+                    agent_id=first.tool_id.split(".")[0],
+                    tool_id=first.tool_id,
+                    arguments=first.arguments,
+                    rationale="Chosen by Gemini",
+                    extra_calls=extra,
+                )
+            # fallback to JSON text part
+            if getattr(candidate, "content", None):
+                for part in candidate.content.parts:
+                    if text := getattr(part, "text", None):
+                        try:
+                            data = json.loads(text)
+                            return GeminiDecision(
+                                agent_id=data["agent_id"],
+                                tool_id=data["tool_id"],
+                                arguments=data.get("arguments", {}),
+                                rationale=data.get("rationale", "Chosen by Gemini"),
+                            )
+                        except Exception:
+                            answer_parts.append(text)
+                            continue
+        if direct and answer_parts:
+            return GeminiDecision(
+                agent_id=DIRECT_ANSWER_TOOL.split(".")[0],
+                tool_id=DIRECT_ANSWER_TOOL,
+                arguments={"question": user_prompt},
+                rationale="Answered directly by Gemini",
+                answer="".join(answer_parts).strip(),
+            )
         return None
 
     def _rule_based_decision(self, user_prompt: str, agent_options: dict[str, str]) -> GeminiDecision:
-        normalized = user_prompt.lower()
-        if any(keyword in normalized for keyword in ["leave", "vacation", "pto", "time off", "absence"]):
-            tool = "leave.applyForm"
-        elif any(keyword in normalized for keyword in ["policy", "benefit", "rule", "handbook", "guideline"]):
-            tool = "policy.showCard"
-        else:
-            # Default to general agent for all other questions
-            tool = "general.answer"
-        agent_id = tool.split(".")[0]
+        # Default to general agent when no clause names a workflow.
+        tools = _clause_tools(user_prompt)
+        if len(tools) < 2:
+            tools = {next(iter(tools), "general.answer"): user_prompt}
+        # Several requests: each tool only sees the clauses that named it.
+        (first, question), *extra = tools.items()
         return GeminiDecision(
-            agent_id=agent_id,
-            tool_id=tool,
-            arguments={"question": user_prompt},
+            agent_id=first.split(".")[0],
+            tool_id=first,
+            arguments={"question": question},
             rationale="Fallback rule-based decision",
+            extra_calls=[ToolCall(tool, {"question": clause}) for tool, clause in extra],
         )
 
     def _fallback_text(self, prompt: str) -> str:
+        FALLBACK_RESPONSES.inc()
         truncated = prompt[:200]
         return (
             "I do not have live model access right now, but here is a draft response based on your "
@@ -166,3 +719,22 @@ class GeminiClient:
             f"{truncated}\n"
             "Please verify this information with the HR team for accuracy."
         )
+
+
+_shared_client: GeminiClient | None = None
+_shared_client_lock = threading.Lock()
+
+
+def get_gemini_client() -> GeminiClient:
+    """The process-wide client used by the router and the tools.
+
+    One instance means one provider, one set of routing models and one
+    decision cache per worker. Construction is cheap; the SDK is only
+    imported when the client is first used or warmed up.
+    """
+    global _shared_client
+    if _shared_client is None:
+        with _shared_client_lock:
+            if _shared_client is None:
+                _shared_client = GeminiClient()
+    return _shared_client
@@ -0,0 +1,313 @@
+"""Local intent classifier that lets obvious requests skip the Gemini router.
+
+Features are TF-IDF weighted unigrams and bigrams plus one indicator per
+compiled keyword pattern; a small softmax regression trained on
+``data/intent_examples.jsonl`` turns them into per-tool probabilities.
+
+Usage (from ``backend/``)::
+
+    python -m core.intent_classifier train
+    python -m core.intent_classifier eval [--gemini]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import hashlib
+import json
+import math
+import os
+import re
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Iterable
+
+DATA_DIR = Path(__file__).resolve().parent.parent / "data"
+EXAMPLES_PATH = DATA_DIR / "intent_examples.jsonl"
+MODEL_PATH = DATA_DIR / "intent_model.json"
+
+KEYWORD_PATTERNS: dict[str, list[str]] = {
+    "leave.applyForm": [
+        "leave", "vacation", "pto", "time off", "absence", "absent", "days? off", "sick day",
+    ],
+    "policy.showCard": [
+        "policy", "policies", "benefits?", "rules?", "handbook", "guidelines?", "code of conduct",
+    ],
+}
+
+_TOKEN = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+# One alternation for every pattern so a prompt is scanned once, not once per keyword.
+_KEYWORDS = re.compile(
+    "|".join(
+        f"(?P<kw{index}>\\b(?:{'|'.join(patterns)})\\b)"
+        for index, patterns in enumerate(KEYWORD_PATTERNS.values())
+    )
+)
+_KEYWORD_GROUPS = {f"kw{index}": tool_id for index, tool_id in enumerate(KEYWORD_PATTERNS)}
+
+
+@dataclass
+class IntentPrediction:
+    tool_id: str
+    confidence: float
+
+
+def keyword_hits(text: str) -> set[str]:
+    return {_KEYWORD_GROUPS[match.lastgroup] for match in _KEYWORDS.finditer(text.lower()) if match.lastgroup}
+
+
+def _terms(text: str) -> list[str]:
+    lowered = text.lower()
+    tokens = _TOKEN.findall(lowered)
+    terms = tokens + [f"{left} {right}" for left, right in zip(tokens, tokens[1:])]
+    terms.extend(f"kw:{tool_id}" for tool_id in keyword_hits(lowered))
+    return terms
+
+
+def load_examples(path: Path = EXAMPLES_PATH) -> list[tuple[str, str]]:
+    examples = []
+    with path.open(encoding="utf-8") as handle:
+        for line in handle:
+            if line.strip():
+                row = json.loads(line)
+                examples.append((row["text"], row["tool_id"]))
+    return examples
+
+
+def _examples_digest(path: Path) -> str:
+    return hashlib.sha256(path.read_bytes()).hexdigest()[:16]
+
+
+class IntentClassifier:
+    def __init__(
+        self,
+        labels: list[str],
+        idf: dict[str, float],
+        weights: dict[str, dict[str, float]],
+        bias: dict[str, float],
+        default_idf: float,
+    ) -> None:
+        self.labels = labels
+        self.idf = idf
+        self.weights = weights
+        self.bias = bias
+        self.default_idf = default_idf
+
+    def _vectorize(self, text: str) -> dict[str, float]:
+        counts: dict[str, int] = {}
+        for term in _terms(text):
+            counts[term] = counts.get(term, 0) + 1
+        vector = {term: count * self.idf.get(term, self.default_idf) for term, count in counts.items()}
+        norm = math.sqrt(sum(value * value for value in vector.values())) or 1.0
+        return {term: value / norm for term, value in vector.items()}
+
+    def _probabilities(self, vector: dict[str, float]) -> dict[str, float]:
+        logits = {
+            label: self.bias[label]
+            + sum(self.weights[label].get(term, 0.0) * value for term, value in vector.items())
+            for label in self.labels
+        }
+        peak = max(logits.values())
+        exps = {label: math.exp(logit - peak) for label, logit in logits.items()}
+        total = sum(exps.values())
+        return {label: value / total for label, value in exps.items()}
+
+    def predict(self, text: str) -> IntentPrediction:
+        probabilities = self._probabilities(self._vectorize(text))
+        tool_id = max(probabilities, key=probabilities.__getitem__)
+        return IntentPrediction(tool_id=tool_id, confidence=probabilities[tool_id])
+
+    @classmethod
+    def train(
+        cls,
+        examples: Iterable[tuple[str, str]],
+        epochs: int = 300,
+        learning_rate: float = 1.0,
+        l2: float = 1e-3,
+    ) -> "IntentClassifier":
+        examples = list(examples)
+        labels = sorted({label for _, label in examples})
+        doc_freq: dict[str, int] = {}
+        for text, _ in examples:
+            for term in set(_terms(text)):
+                doc_freq[term] = doc_freq.get(term, 0) + 1
+        total = len(examples)
+        idf = {term: math.log((1 + total) / (1 + freq)) + 1 for term, freq in doc_freq.items()}
+        model = cls(
+            labels=labels,
+            idf=idf,
+            weights={label: {} for label in labels},
+            bias={label: 0.0 for label in labels},
+            default_idf=math.log(1 + total) + 1,
+        )
+        vectors = [(model._vectorize(text), label) for text, label in examples]
+        # Full-batch gradient descent on the softmax cross-entropy; the data set is tiny.
+        for _ in range(epochs):
+            grad_w = {label: {} for label in labels}
+            grad_b = {label: 0.0 for label in labels}
+            for vector, target in vectors:
+                probabilities = model._probabilities(vector)
+                for label in labels:
+                    error = probabilities[label] - (1.0 if label == target else 0.0)
+                    grad_b[label] += error
+                    row = grad_w[label]
+                    for term, value in vector.items():
+                        row[term] = row.get(term, 0.0) + error * value
+            for label in labels:
+                weights = model.weights[label]
+                for term in set(weights) | set(grad_w[label]):
+                    current = weights.get(term, 0.0)
+                    step = grad_w[label].get(term, 0.0) / total + l2 * current
+                    weights[term] = current - learning_rate * step
+                model.bias[label] -= learning_rate * grad_b[label] / total
+        return model
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "labels": self.labels,
+            "idf": self.idf,
+            "weights": self.weights,
+            "bias": self.bias,
+            "default_idf": self.default_idf,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "IntentClassifier":
+        return cls(
+            labels=data["labels"],
+            idf=data["idf"],
+            weights=data["weights"],
+            bias=data["bias"],
+            default_idf=data["default_idf"],
+        )
+
+    @classmethod
+    def load(cls, examples_path: Path = EXAMPLES_PATH, model_path: Path = MODEL_PATH) -> "IntentClassifier":
+        """Load the trained model, retraining if it is missing or older than the examples."""
+        digest = _examples_digest(examples_path)
+        if model_path.exists():
+            try:
+                data = json.loads(model_path.read_text(encoding="utf-8"))
+                if data.get("examples_digest") == digest:
+                    return cls.from_dict(data["model"])
+            except (OSError, ValueError, KeyError) as exc:
+                print(f"[Intent] Ignoring unreadable model {model_path}: {exc}")
+        return cls.train(load_examples(examples_path))
+
+    def save(self, examples_path: Path = EXAMPLES_PATH, model_path: Path = MODEL_PATH) -> None:
+        payload = {"examples_digest": _examples_digest(examples_path), "model": self.to_dict()}
+        model_path.write_text(json.dumps(payload, sort_keys=True), encoding="utf-8")
+
+
+_classifier: IntentClassifier | None = None
+# Retraining after the examples changed takes most of a second; keep it off the event loop.
+_loader = ThreadPoolExecutor(max_workers=1, thread_name_prefix="intent-classifier")
+_loading: Future | None = None
+
+
+def get_classifier() -> IntentClassifier:
+    """The shared classifier, loaded (or trained) now if needed. Blocking."""
+    global _classifier
+    if _classifier is None:
+        _classifier = IntentClassifier.load()
+    return _classifier
+
+
+def ready_classifier() -> IntentClassifier | None:
+    """The shared classifier if it is loaded; otherwise start loading it in the
+    background and return None."""
+    global _loading
+    if _classifier is None and _loading is None:
+        _loading = _loader.submit(get_classifier)
+        _loading.add_done_callback(_log_load_failure)
+    return _classifier
+
+
+def _log_load_failure(future: Future) -> None:
+    if future.exception() is not None:
+        print(f"[Intent] Local routing disabled, could not load the classifier: {future.exception()}")
+
+
+def confidence_threshold() -> float:
+    return float(os.getenv("INTENT_CONFIDENCE_THRESHOLD", "0.8"))
+
+
+async def _gemini_labels(texts: list[str]) -> list[str | None]:
+    from core.gemini_client import GeminiClient
+    from registry import tool_registry
+    from routers.ag_ui import AGENT_DESCRIPTIONS
+
+    client = GeminiClient()
+    client.warm_up()
+    if not client._client:
+        raise SystemExit("GEMINI_API_KEY is required for --gemini evaluation")
+    client.register_tools(tool_registry.schema_list())
+    labels = []
+    for text in texts:
+        decision = await client._call_gemini(text, AGENT_DESCRIPTIONS)
+        labels.append(decision.tool_id if decision else None)
+    return labels
+
+
+def _evaluate(args: argparse.Namespace) -> None:
+    examples = load_examples(Path(args.examples))
+    texts = [text for text, _ in examples]
+    if args.gemini:
+        reference = asyncio.run(_gemini_labels(texts))
+        source = "Gemini"
+    else:
+        reference = [label for _, label in examples]
+        source = "labels"
+    if args.holdout:
+        # Leave-one-out so the score is not measured on the training data itself.
+        predictions = []
+        for index in range(len(examples)):
+            model = IntentClassifier.train(examples[:index] + examples[index + 1:])
+            predictions.append(model.predict(texts[index]))
+    else:
+        model = get_classifier()
+        started = time.perf_counter()
+        predictions = [model.predict(text) for text in texts]
+        elapsed = time.perf_counter() - started
+        print(f"mean latency: {elapsed / max(len(texts), 1) * 1e6:.1f} us/prediction")
+
+    threshold = args.threshold
+    scored = [(pred, ref) for pred, ref in zip(predictions, reference) if ref is not None]
+    confident = [(pred, ref) for pred, ref in scored if pred.confidence >= threshold]
+    correct = sum(pred.tool_id == ref for pred, ref in scored)
+    confident_correct = sum(pred.tool_id == ref for pred, ref in confident)
+    print(f"reference: {source} ({len(scored)} examples)")
+    print(f"overall accuracy: {correct / max(len(scored), 1):.3f}")
+    print(
+        f"above threshold {threshold:.2f}: coverage {len(confident) / max(len(scored), 1):.3f}, "
+        f"accuracy {confident_correct / max(len(confident), 1):.3f}"
+    )
+    for (text, _), pred, ref in zip(examples, predictions, reference):
+        if ref is not None and pred.tool_id != ref:
+            print(f"  miss: {text!r} -> {pred.tool_id} ({pred.confidence:.2f}), expected {ref}")
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--examples", default=str(EXAMPLES_PATH))
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("train", help="train on the examples file and write data/intent_model.json")
+    evaluate = commands.add_parser("eval", help="report accuracy against labels or live Gemini choices")
+    evaluate.add_argument("--gemini", action="store_true", help="compare against Gemini's routing choices")
+    evaluate.add_argument("--holdout", action="store_true", help="leave-one-out instead of the trained model")
+    evaluate.add_argument("--threshold", type=float, default=confidence_threshold())
+    args = parser.parse_args(argv)
+
+    if args.command == "train":
+        examples_path = Path(args.examples)
+        model = IntentClassifier.train(load_examples(examples_path))
+        model.save(examples_path=examples_path)
+        print(f"trained on {examples_path} -> {MODEL_PATH}")
+    else:
+        _evaluate(args)
+
+
+if __name__ == "__main__":
+    main()
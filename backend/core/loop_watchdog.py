@@ -0,0 +1,92 @@
+"""Event-loop lag watchdog.
+
+A coroutine sleeps for ``interval`` and records how late it wakes up, which
+is the time the loop spent running something else without yielding. Each
+wake-up also stamps a heartbeat. A daemon thread checks the heartbeat, and
+when it is older than ``threshold`` the loop is stuck in a blocking call right
+now: the thread grabs the loop thread's current stack with
+``sys._current_frames()`` and logs it once per stall, so the offending call
+site shows up in the logs instead of only as stuttering streams.
+
+Enable with ``LOOP_WATCHDOG_ENABLED=true``.
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+
+from .metrics import LATENCY_BUCKETS, Counter, Gauge, Histogram
+
+LOOP_LAG_SECONDS = Histogram(
+    "asyncio_loop_lag_seconds", "How late the watchdog coroutine woke up.", buckets=(0.001, 0.0025, *LATENCY_BUCKETS)
+)
+LOOP_MAX_LAG = Gauge("asyncio_loop_max_lag_seconds", "Largest loop lag seen since start.")
+LOOP_STALLS = Counter("asyncio_loop_stalls_total", "Loop stalls longer than the watchdog threshold.")
+
+
+class LoopWatchdog:
+    def __init__(self, interval: float = 0.1, threshold: float = 0.25, keep_stacks: int = 20) -> None:
+        self.interval = interval
+        self.threshold = threshold
+        self.max_lag = 0.0
+        self.stalls: deque[tuple[float, float, str]] = deque(maxlen=keep_stacks)
+        self._beat = time.monotonic()
+        self._reported_beat = 0.0
+        self._task: asyncio.Task | None = None
+        self._stop = threading.Event()
+        self._loop_thread_id = 0
+
+    @classmethod
+    def from_env(cls) -> "LoopWatchdog | None":
+        if os.getenv("LOOP_WATCHDOG_ENABLED", "").lower() not in {"1", "true", "yes"}:
+            return None
+        return cls(
+            interval=float(os.getenv("LOOP_WATCHDOG_INTERVAL_MS", "100")) / 1000,
+            threshold=float(os.getenv("LOOP_WATCHDOG_THRESHOLD_MS", "250")) / 1000,
+        )
+
+    def start(self) -> None:
+        self._loop_thread_id = threading.get_ident()
+        self._beat = time.monotonic()
+        self._stop.clear()
+        self._task = asyncio.create_task(self._measure())
+        threading.Thread(target=self._sample, name="loop-watchdog", daemon=True).start()
+
+    async def stop(self) -> None:
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.wait({self._task})
+            self._task = None
+
+    async def _measure(self) -> None:
+        while True:
+            started = time.monotonic()
+            await asyncio.sleep(self.interval)
+            self._beat = now = time.monotonic()
+            lag = max(0.0, now - started - self.interval)
+            LOOP_LAG_SECONDS.observe(lag)
+            if lag > self.max_lag:
+                self.max_lag = lag
+                LOOP_MAX_LAG.set(lag)
+
+    def _sample(self) -> None:
+        period = min(self.interval, self.threshold) / 2
+        while not self._stop.wait(period):
+            beat = self._beat
+            stalled = time.monotonic() - beat
+            if stalled < self.threshold or beat == self._reported_beat:
+                continue
+            self._reported_beat = beat
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+            stack = "".join(traceback.format_stack(frame))
+            self.stalls.append((time.time(), stalled, stack))
+            LOOP_STALLS.inc()
+            print(f"[LoopWatchdog] Event loop blocked for {stalled * 1000:.0f} ms at:\n{stack}")
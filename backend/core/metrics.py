@@ -0,0 +1,150 @@
+"""Minimal in-process metrics rendered in the Prometheus text format.
+
+Counters, gauges and fixed-bucket histograms keyed by label values. Recording
+is a dict lookup plus a ``bisect`` so it stays cheap on the streaming path;
+metrics are updated from the event loop and read by ``GET /metrics``.
+"""
+from __future__ import annotations
+
+import math
+from bisect import bisect_left
+from typing import Iterable
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+
+def _labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _number(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labels: Iterable[str] = ()) -> None:
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        REGISTRY.append(self)
+
+    def samples(self) -> Iterable[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        header = f"# HELP {self.name} {self.help}\n# TYPE {self.name} {self.kind}\n"
+        return header + "".join(f"{line}\n" for line in self.samples())
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: Iterable[str] = ()) -> None:
+        super().__init__(name, help, labels)
+        self.values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, *label_values: str, amount: float = 1) -> None:
+        self.values[label_values] = self.values.get(label_values, 0) + amount
+
+    def samples(self) -> Iterable[str]:
+        for key, value in self.values.items():
+            yield f"{self.name}{_labels(self.label_names, key)} {_number(value)}"
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, labels: Iterable[str] = ()) -> None:
+        super().__init__(name, help, labels)
+        self.values: dict[tuple[str, ...], float] = {}
+
+    def set(self, value: float, *label_values: str) -> None:
+        self.values[label_values] = value
+
+    def samples(self) -> Iterable[str]:
+        for key, value in self.values.items():
+            yield f"{self.name}{_labels(self.label_names, key)} {_number(value)}"
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labels: Iterable[str] = (),
+        buckets: Iterable[float] = LATENCY_BUCKETS,
+    ) -> None:
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts..., +Inf count, sum]
+        self.values: dict[tuple[str, ...], list[float]] = {}
+
+    def observe(self, value: float, *label_values: str) -> None:
+        counts = self.values.get(label_values)
+        if counts is None:
+            counts = self.values[label_values] = [0] * (len(self.buckets) + 2)
+        counts[bisect_left(self.buckets, value)] += 1
+        counts[-1] += value
+
+    def samples(self) -> Iterable[str]:
+        for key, counts in self.values.items():
+            cumulative = 0
+            for bound, count in zip((*self.buckets, math.inf), counts):
+                cumulative += count
+                le = f'le="{_number(bound)}"'
+                yield f"{self.name}_bucket{_labels(self.label_names, key, le)} {_number(cumulative)}"
+            yield f"{self.name}_sum{_labels(self.label_names, key)} {_number(counts[-1])}"
+            yield f"{self.name}_count{_labels(self.label_names, key)} {_number(cumulative)}"
+
+
+REGISTRY: list[Metric] = []
+
+
+def render() -> str:
+    return "".join(metric.render() for metric in REGISTRY)
+
+
+RUN_STARTED_SECONDS = Histogram(
+    "agui_time_to_run_started_seconds", "Time from request to the RUN_STARTED frame being sent."
+)
+FIRST_TEXT_SECONDS = Histogram(
+    "agui_time_to_first_text_seconds", "Time from request to the first TEXT_MESSAGE_CONTENT frame."
+)
+RUN_SECONDS = Histogram(
+    "agui_run_duration_seconds", "Total run duration by outcome.", labels=("outcome",)
+)
+RUN_EVENTS = Histogram(
+    "agui_run_events", "SSE frames sent per run.", buckets=COUNT_BUCKETS
+)
+ROUTING_SECONDS = Histogram(
+    "agui_routing_seconds", "Time spent choosing the agent and tool.", labels=("source",)
+)
+TOOL_SECONDS = Histogram(
+    "agui_tool_seconds", "Tool function latency (excludes streamed text).", labels=("tool_id",)
+)
+GEMINI_SECONDS = Histogram(
+    "gemini_request_seconds", "Latency of blocking Gemini SDK calls.", labels=("call",)
+)
+ROUTING_DECISIONS = Counter(
+    "agui_routing_decisions_total", "Routing decisions by source.", labels=("source",)
+)
+FALLBACK_RESPONSES = Counter(
+    "gemini_fallback_responses_total", "Canned responses served because Gemini was unavailable or failed."
+)
+GEMINI_COALESCED = Counter(
+    "gemini_coalesced_requests_total", "Gemini calls served by joining an identical call already in flight.", labels=("call",)
+)
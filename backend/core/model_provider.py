@@ -0,0 +1,264 @@
+"""Pluggable model providers behind ``GeminiClient``.
+
+A provider is anything with ``GenerativeModel(model_name=..., **config)``
+returning an object shaped like the SDK model: ``generate_content(contents,
+stream=False)`` and ``start_chat()`` whose chat has ``send_message``,
+``history`` and ``model``. Three are built in:
+
+* :class:`GenAIProvider` – the live ``google.generativeai`` SDK.
+* :class:`RecordingProvider` – wraps another provider and appends every
+  call's request key, response and timing to a JSONL file.
+* :class:`ReplayProvider` – serves a recording back without network access,
+  with the original latencies multiplied by ``latency_scale``.
+
+Select with ``GEMINI_PROVIDER=live|record|replay``; recordings go to
+``GEMINI_RECORDING_PATH``. Record format, one call per line::
+
+    {"k": key, "m": "route"|"generate"|"stream", "t": seconds, "r": response}
+
+where streamed responses are ``[[offset_seconds, text], ...]`` and route
+responses are lists of ``{"text": ...}`` / ``{"call": name, "args": {...}}``
+parts. Replay matches calls by key (a hash of the method and input) and
+falls back to cycling through recordings of the same method, so traffic
+that was never recorded still gets realistic response shapes and timing
+(tool calls replayed this way drop their recorded arguments).
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Iterator, Protocol
+
+
+class ModelProvider(Protocol):
+    def GenerativeModel(self, model_name: str, **config: Any) -> Any:  # noqa: N802 - SDK name
+        ...
+
+
+def request_key(method: str, payload: Any) -> str:
+    return hashlib.sha1(f"{method}:{json.dumps(payload, sort_keys=True, default=str)}".encode()).hexdigest()[:16]
+
+
+def route_response(parts: list[dict[str, Any]]) -> Any:
+    """An object shaped like an SDK ``send_message`` result."""
+    sdk_parts = [
+        SimpleNamespace(function_call=SimpleNamespace(name=part["call"], args=part.get("args", {})), text=None)
+        if "call" in part
+        else SimpleNamespace(function_call=None, text=part.get("text", ""))
+        for part in parts
+    ]
+    return SimpleNamespace(candidates=[SimpleNamespace(content=SimpleNamespace(parts=sdk_parts))])
+
+
+def _route_parts(result: Any) -> list[dict[str, Any]]:
+    parts: list[dict[str, Any]] = []
+    for candidate in getattr(result, "candidates", []):
+        for part in getattr(getattr(candidate, "content", None), "parts", []):
+            call = getattr(part, "function_call", None)
+            if call and getattr(call, "name", ""):
+                parts.append({"call": call.name, "args": dict(call.args or {})})
+            elif text := getattr(part, "text", None):
+                parts.append({"text": text})
+    return parts
+
+
+def _plain(value: Any) -> Any:
+    # Function-call args from the SDK are proto map/repeated containers.
+    return dict(value) if hasattr(value, "keys") else list(value)
+
+
+def _chunk_text(chunk: Any) -> str:
+    try:
+        return chunk.text or ""
+    except ValueError:
+        # Chunks without text parts (e.g. safety metadata) raise here.
+        return ""
+
+
+class GenAIProvider:
+    def __init__(self, api_key: str) -> None:
+        import google.generativeai as genai  # type: ignore
+
+        genai.configure(api_key=api_key)
+        self._genai = genai
+
+    def GenerativeModel(self, model_name: str, **config: Any) -> Any:  # noqa: N802 - SDK name
+        return self._genai.GenerativeModel(model_name=model_name, **config)
+
+
+class RecordingProvider:
+    def __init__(self, inner: ModelProvider, path: str | Path) -> None:
+        self.inner = inner
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def GenerativeModel(self, model_name: str, **config: Any) -> "_RecordingModel":  # noqa: N802 - SDK name
+        return _RecordingModel(self, self.inner.GenerativeModel(model_name=model_name, **config))
+
+    def write(self, key: str, method: str, latency: float | None, response: Any) -> None:
+        line = json.dumps(
+            {"k": key, "m": method, "t": latency, "r": response}, separators=(",", ":"), default=_plain
+        )
+        with self._lock, open(self.path, "a", encoding="utf-8") as handle:
+            handle.write(line + "\n")
+
+
+class _RecordingModel:
+    def __init__(self, recorder: RecordingProvider, model: Any) -> None:
+        self.recorder = recorder
+        self.model = model
+
+    def start_chat(self, **kwargs: Any) -> "_RecordingChat":
+        return _RecordingChat(self, self.model.start_chat(**kwargs))
+
+    def generate_content(self, contents: Any, stream: bool = False, **kwargs: Any) -> Any:
+        method = "stream" if stream else "generate"
+        key = request_key(method, contents)
+        started = time.perf_counter()
+        response = self.model.generate_content(contents, stream=stream, **kwargs)
+        if stream:
+            return self._record_stream(key, started, response)
+        self.recorder.write(key, method, time.perf_counter() - started, _chunk_text(response))
+        return response
+
+    def _record_stream(self, key: str, started: float, response: Any) -> Iterator[Any]:
+        chunks: list[list[Any]] = []
+        try:
+            for chunk in response:
+                chunks.append([round(time.perf_counter() - started, 4), _chunk_text(chunk)])
+                yield chunk
+        finally:
+            # Also reached when the consumer stops early; the partial stream is still a real shape.
+            self.recorder.write(key, "stream", time.perf_counter() - started, chunks)
+
+
+class _RecordingChat:
+    def __init__(self, model: _RecordingModel, chat: Any) -> None:
+        self.model = model
+        self.chat = chat
+
+    @property
+    def history(self) -> Any:
+        return self.chat.history
+
+    @history.setter
+    def history(self, value: Any) -> None:
+        self.chat.history = value
+
+    def send_message(self, content: Any, **kwargs: Any) -> Any:
+        key = request_key("route", content)
+        started = time.perf_counter()
+        result = self.chat.send_message(content, **kwargs)
+        self.model.recorder.write(key, "route", time.perf_counter() - started, _route_parts(result))
+        return result
+
+
+class ReplayProvider:
+    def __init__(self, path: str | Path, latency_scale: float = 1.0) -> None:
+        self.latency_scale = latency_scale
+        self._lock = threading.Lock()
+        self._by_key: dict[str, deque[dict[str, Any]]] = {}
+        self._by_method: dict[str, list[dict[str, Any]]] = {}
+        self._cursor: dict[str, int] = {}
+        with open(path, encoding="utf-8") as handle:
+            for line in handle:
+                if line.strip():
+                    record = json.loads(line)
+                    self._by_key.setdefault(record["k"], deque()).append(record)
+                    self._by_method.setdefault(record["m"], []).append(record)
+        self.hits = 0
+        self.misses = 0
+
+    def GenerativeModel(self, model_name: str, **config: Any) -> "_ReplayModel":  # noqa: N802 - SDK name
+        return _ReplayModel(self)
+
+    def take(self, method: str, payload: Any) -> tuple[dict[str, Any], bool]:
+        """The recorded call for ``payload`` (matched) or the next one of the same method."""
+        key = request_key(method, payload)
+        with self._lock:
+            matches = self._by_key.get(key)
+            if matches:
+                self.hits += 1
+                record = matches[0]
+                matches.rotate(-1)
+                return record, True
+            records = self._by_method.get(method)
+            if not records:
+                raise LookupError(f"recording has no {method!r} calls")
+            self.misses += 1
+            index = self._cursor.get(method, 0)
+            self._cursor[method] = index + 1
+            return records[index % len(records)], False
+
+    def sleep(self, seconds: float | None) -> None:
+        if seconds and self.latency_scale > 0:
+            time.sleep(seconds * self.latency_scale)
+
+
+class _ReplayModel:
+    def __init__(self, provider: ReplayProvider) -> None:
+        self.provider = provider
+
+    def start_chat(self, **_: Any) -> "_ReplayChat":
+        return _ReplayChat(self)
+
+    def generate_content(self, contents: Any, stream: bool = False, **_: Any) -> Any:
+        if stream:
+            return self._stream(self.provider.take("stream", contents)[0])
+        record, _ = self.provider.take("generate", contents)
+        self.provider.sleep(record["t"])
+        return SimpleNamespace(text=record["r"])
+
+    def _stream(self, record: dict[str, Any]) -> Iterator[Any]:
+        elapsed = 0.0
+        for offset, text in record["r"]:
+            self.provider.sleep(offset - elapsed)
+            elapsed = offset
+            yield SimpleNamespace(text=text)
+
+
+class _ReplayChat:
+    def __init__(self, model: _ReplayModel) -> None:
+        self.model = model
+        self.history: list[Any] = []
+
+    def send_message(self, content: Any, **_: Any) -> Any:
+        record, matched = self.model.provider.take("route", content)
+        self.model.provider.sleep(record["t"])
+        parts = record["r"]
+        if not matched:
+            # Arguments belong to the recorded prompt; let the router fill in this one.
+            parts = [{"call": part["call"]} if "call" in part else part for part in parts]
+        return route_response(parts)
+
+
+_provider: ModelProvider | None = None
+_provider_lock = threading.Lock()
+
+
+def get_provider() -> ModelProvider | None:
+    """The process-wide provider selected by ``GEMINI_PROVIDER`` (None without a model)."""
+    global _provider
+    with _provider_lock:
+        if _provider is None:
+            _provider = _provider_from_env()
+        return _provider
+
+
+def _provider_from_env() -> ModelProvider | None:
+    mode = os.getenv("GEMINI_PROVIDER", "live").lower()
+    path = os.getenv("GEMINI_RECORDING_PATH", ".cache/gemini_recording.jsonl")
+    if mode == "replay":
+        return ReplayProvider(path, float(os.getenv("GEMINI_REPLAY_LATENCY_SCALE", "1")))
+    api_key = os.getenv("GEMINI_API_KEY") or os.getenv("GOOGLE_API_KEY")
+    if not api_key:
+        return None
+    live = GenAIProvider(api_key)
+    return RecordingProvider(live, path) if mode == "record" else live
@@ -0,0 +1,274 @@
+"""Policy store backed by a directory of JSON/Markdown files with a BM25 index.
+
+Each ``*.json`` file holds one policy (``policy_id``, ``title``, ``summary``,
+optional ``links`` and ``body``). A ``*.md`` file is parsed as a ``# Title``
+heading, a summary paragraph, optional further body text and
+``- [label](href)`` link lines; its id is the file name.
+"""
+from __future__ import annotations
+
+import hashlib
+import heapq
+import json
+import math
+import os
+import re
+import tempfile
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any
+
+POLICY_DIR = Path(__file__).resolve().parent.parent / "data" / "policies"
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+_LINK = re.compile(r"^\s*[-*]\s*\[(?P<label>[^\]]+)\]\((?P<href>[^)]+)\)\s*$")
+_STOPWORDS = frozenset(
+    "a an and are can do does for how i in is it me my of on or our the to we what when where which who "
+    "with you your".split()
+)
+TITLE_BOOST = 2
+K1 = 1.2
+B = 0.75
+
+
+def tokenize(text: str) -> list[str]:
+    terms = []
+    for token in _TOKEN.findall(text.lower()):
+        if token in _STOPWORDS:
+            continue
+        if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+            token = token[:-1]
+        terms.append(token)
+    return terms
+
+
+def parse_policy_file(path: Path) -> dict[str, Any]:
+    if path.suffix == ".json":
+        policy = json.loads(path.read_text(encoding="utf-8"))
+        policy.setdefault("policy_id", path.stem)
+        policy.setdefault("links", [])
+        return policy
+
+    title = path.stem.replace("-", " ").title()
+    links: list[dict[str, str]] = []
+    paragraphs: list[str] = []
+    current: list[str] = []
+    for line in path.read_text(encoding="utf-8").splitlines():
+        if line.startswith("# "):
+            title = line[2:].strip()
+        elif match := _LINK.match(line):
+            links.append({"label": match["label"], "href": match["href"]})
+        elif line.strip():
+            current.append(line.strip())
+        elif current:
+            paragraphs.append(" ".join(current))
+            current = []
+    if current:
+        paragraphs.append(" ".join(current))
+    return {
+        "policy_id": path.stem,
+        "title": title,
+        "summary": paragraphs[0] if paragraphs else "",
+        "body": "\n\n".join(paragraphs),
+        "links": links,
+    }
+
+
+class PolicyIndex:
+    """Inverted index with BM25 ranking over policy titles and summaries.
+
+    :meth:`refresh` re-stats the directory and re-indexes only files whose
+    modification time changed, so it is cheap enough to call per request.
+    """
+
+    def __init__(self, directory: Path = POLICY_DIR) -> None:
+        self.directory = directory
+        self.policies: dict[str, dict[str, Any]] = {}
+        self._files: dict[str, tuple[float, str]] = {}  # file name -> (mtime, policy_id)
+        self._postings: dict[str, dict[str, int]] = {}
+        self._doc_terms: dict[str, dict[str, int]] = {}
+        self._doc_lengths: dict[str, int] = {}
+        self._total_length = 0
+        self.version = 0
+
+    @property
+    def size(self) -> int:
+        return len(self.policies)
+
+    def fingerprint(self) -> str:
+        """Stable digest of the indexed files, for caches derived from the policies."""
+        listing = json.dumps(sorted(self._files.items()))
+        return hashlib.sha256(listing.encode()).hexdigest()[:16]
+
+    def refresh(self) -> bool:
+        """Sync the index with the directory; returns True when anything changed."""
+        seen: dict[str, float] = {}
+        if self.directory.is_dir():
+            with os.scandir(self.directory) as entries:
+                for entry in entries:
+                    if entry.is_file() and entry.name.endswith((".json", ".md")):
+                        seen[entry.name] = entry.stat().st_mtime
+        changed = False
+        for name in list(self._files):
+            if name not in seen:
+                self._remove(self._files.pop(name)[1])
+                changed = True
+        for name, mtime in sorted(seen.items()):
+            known = self._files.get(name)
+            if known and known[0] == mtime:
+                continue
+            try:
+                policy = parse_policy_file(self.directory / name)
+            except (OSError, ValueError) as exc:
+                print(f"[Policies] Skipping {name}: {exc}")
+                continue
+            if known:
+                self._remove(known[1])
+            self._add(policy)
+            self._files[name] = (mtime, policy["policy_id"])
+            changed = True
+        if changed:
+            self.version += 1
+        return changed
+
+    def copy(self) -> "PolicyIndex":
+        """Independent copy that can be refreshed while this one keeps serving searches."""
+        index = PolicyIndex(self.directory)
+        index.policies = dict(self.policies)
+        index._files = dict(self._files)
+        index._postings = {term: dict(postings) for term, postings in self._postings.items()}
+        index._doc_terms = dict(self._doc_terms)
+        index._doc_lengths = dict(self._doc_lengths)
+        index._total_length = self._total_length
+        index.version = self.version
+        return index
+
+    def search(self, query: str, k: int = 3) -> list[tuple[dict[str, Any], float]]:
+        total_docs = len(self._doc_lengths)
+        if not total_docs:
+            return []
+        average_length = self._total_length / total_docs
+        scores: dict[str, float] = {}
+        for term in set(tokenize(query)):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (total_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+            for policy_id, freq in postings.items():
+                norm = K1 * (1 - B + B * self._doc_lengths[policy_id] / average_length)
+                scores[policy_id] = scores.get(policy_id, 0.0) + idf * freq * (K1 + 1) / (freq + norm)
+        ranked = heapq.nsmallest(k, scores.items(), key=lambda item: (-item[1], item[0]))
+        return [(self.policies[policy_id], score) for policy_id, score in ranked]
+
+    def first(self) -> dict[str, Any] | None:
+        """Default card when nothing matches: the policy from the first file by name."""
+        for name in sorted(self._files):
+            return self.policies[self._files[name][1]]
+        return None
+
+    def save(self, path: Path) -> None:
+        payload = {
+            "directory": str(self.directory),
+            "files": self._files,
+            "policies": self.policies,
+            "doc_terms": self._doc_terms,
+        }
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write-then-rename so a worker starting up never reads a half-written file.
+        with tempfile.NamedTemporaryFile(
+            "w", encoding="utf-8", dir=path.parent, suffix=".tmp", delete=False
+        ) as handle:
+            json.dump(payload, handle)
+        os.replace(handle.name, path)
+
+    @classmethod
+    def load(cls, path: Path, directory: Path = POLICY_DIR) -> "PolicyIndex":
+        """Restore a serialized index; callers should :meth:`refresh` afterwards."""
+        index = cls(directory)
+        data = json.loads(path.read_text(encoding="utf-8"))
+        if Path(data["directory"]) != directory:
+            return index
+        index._files = {name: (mtime, policy_id) for name, (mtime, policy_id) in data["files"].items()}
+        index.policies = data["policies"]
+        for policy_id, terms in data["doc_terms"].items():
+            index._index_terms(policy_id, terms)
+        return index
+
+    def _add(self, policy: dict[str, Any]) -> None:
+        policy_id = policy["policy_id"]
+        if policy_id in self.policies:
+            self._remove(policy_id)
+        terms: dict[str, int] = {}
+        for term in tokenize(policy.get("title", "")):
+            terms[term] = terms.get(term, 0) + TITLE_BOOST
+        for term in tokenize(policy.get("summary", "")):
+            terms[term] = terms.get(term, 0) + 1
+        self.policies[policy_id] = policy
+        self._index_terms(policy_id, terms)
+
+    def _index_terms(self, policy_id: str, terms: dict[str, int]) -> None:
+        self._doc_terms[policy_id] = terms
+        length = sum(terms.values())
+        self._doc_lengths[policy_id] = length
+        self._total_length += length
+        for term, freq in terms.items():
+            self._postings.setdefault(term, {})[policy_id] = freq
+
+    def _remove(self, policy_id: str) -> None:
+        self.policies.pop(policy_id, None)
+        for term in self._doc_terms.pop(policy_id, {}):
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.pop(policy_id, None)
+                if not postings:
+                    del self._postings[term]
+        self._total_length -= self._doc_lengths.pop(policy_id, 0)
+
+
+_index: PolicyIndex | None = None
+_last_refresh = 0.0
+# Periodic re-syncs stat and parse files, so they run here and not on the event loop.
+_refresher = ThreadPoolExecutor(max_workers=1, thread_name_prefix="policy-index")
+_refreshing: Future | None = None
+
+
+def _refresh_copy(index: PolicyIndex) -> None:
+    global _index
+    try:
+        fresh = index.copy()
+        if fresh.refresh():
+            # One assignment: readers get the old index or the new one, never a half-synced one.
+            _index = fresh
+            print(f"[Policies] Reloaded index version {fresh.version} with {fresh.size} policies")
+    except Exception as exc:
+        print(f"[Policies] Keeping current index, refresh failed: {exc}")
+
+
+def get_policy_index() -> PolicyIndex:
+    """Shared index: built (or loaded from ``POLICY_INDEX_PATH``) once, then
+    re-synced with the directory at most every ``POLICY_RELOAD_INTERVAL`` seconds.
+
+    Re-syncs run on a background thread; until one finishes the previous
+    index is returned unchanged.
+    """
+    global _index, _last_refresh, _refreshing
+    now = time.monotonic()
+    if _index is None:
+        directory = Path(os.getenv("POLICY_DIR") or POLICY_DIR)
+        serialized = os.getenv("POLICY_INDEX_PATH")
+        index = PolicyIndex(directory)
+        if serialized and Path(serialized).exists():
+            try:
+                index = PolicyIndex.load(Path(serialized), directory)
+            except (OSError, ValueError, KeyError, TypeError) as exc:
+                print(f"[Policies] Rebuilding from {directory}, could not load {serialized}: {exc}")
+        if index.refresh() and serialized:
+            index.save(Path(serialized))
+        _index = index
+        _last_refresh = now
+    elif now - _last_refresh >= float(os.getenv("POLICY_RELOAD_INTERVAL", "5")):
+        _last_refresh = now
+        if _refreshing is None or _refreshing.done():
+            _refreshing = _refresher.submit(_refresh_copy, _index)
+    return _index
@@ -0,0 +1,254 @@
+"""Vector retrieval over policy documents for grounding ``general.answer``.
+
+Policies are split into overlapping word windows and embedded with signed
+feature hashing (unigrams + bigrams) into a fixed-width float32 matrix. The
+matrix is stored dimension-major (``dim x chunks``) with ``numpy.save`` and
+reopened with ``mmap_mode="r"`` so workers share the page cache instead of
+each loading a copy. Query vectors are sparse, so search reads only the rows
+for their non-zero dimensions, multiplies once for the whole batch and picks
+the top k with ``argpartition``.
+
+NumPy is imported on first use, and the matrix is built or reopened on a
+background thread, so neither startup nor requests wait for it. Until the
+first build finishes no excerpts are added to prompts.
+
+Usage (from ``backend/``)::
+
+    python -m core.policy_rag build
+    python -m core.policy_rag search "how many pto days do I get"
+"""
+from __future__ import annotations
+
+import argparse
+import importlib.util
+import json
+import os
+import time
+import zlib
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Iterable, Sequence
+
+from .policy_index import PolicyIndex, get_policy_index, tokenize
+
+RAG_DIR = Path(__file__).resolve().parent.parent / ".cache" / "policy_rag"
+DIM = 256
+CHUNK_WORDS = 120
+CHUNK_OVERLAP = 30
+
+
+def _numpy() -> Any:
+    # Deferred: importing NumPy costs more than the rest of ``import main``.
+    import numpy
+
+    return numpy
+
+
+NUMPY_AVAILABLE = importlib.util.find_spec("numpy") is not None
+
+
+@dataclass
+class PolicyChunk:
+    policy_id: str
+    title: str
+    text: str
+    score: float = 0.0
+
+
+def chunk_policy(policy: dict[str, Any], size: int = CHUNK_WORDS, overlap: int = CHUNK_OVERLAP) -> list[str]:
+    body = policy.get("body") or ""
+    summary = policy.get("summary") or ""
+    text = body if summary and summary in body else " ".join(part for part in (summary, body) if part)
+    words = text.split()
+    if not words:
+        return []
+    step = max(1, size - overlap)
+    return [" ".join(words[start:start + size]) for start in range(0, max(1, len(words) - overlap), step)]
+
+
+def _features(text: str) -> list[int]:
+    terms = tokenize(text)
+    terms += [f"{left} {right}" for left, right in zip(terms, terms[1:])]
+    return [zlib.crc32(term.encode()) for term in terms]
+
+
+def embed(texts: Sequence[str], dim: int = DIM) -> "np.ndarray":
+    """Signed hashed bag-of-words vectors, L2-normalized, one row per text."""
+    np = _numpy()
+    rows: list[int] = []
+    hashes: list[int] = []
+    for row, text in enumerate(texts):
+        features = _features(text)
+        rows.extend([row] * len(features))
+        hashes.extend(features)
+    matrix = np.zeros((len(texts), dim), dtype=np.float32)
+    if hashes:
+        hashed = np.asarray(hashes, dtype=np.uint32)
+        columns = (hashed % dim).astype(np.intp)
+        signs = np.where((hashed >> 31) & 1, -1.0, 1.0).astype(np.float32)
+        np.add.at(matrix, (np.asarray(rows, dtype=np.intp), columns), signs)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    np.divide(matrix, norms, out=matrix, where=norms > 0)
+    return matrix
+
+
+class PolicyRetriever:
+    def __init__(self, vectors: "np.ndarray", chunks: list[dict[str, str]], fingerprint: str) -> None:
+        # Shape (dim, len(chunks)): one contiguous row per hashed dimension.
+        self.vectors = vectors
+        self.chunks = chunks
+        self.fingerprint = fingerprint
+
+    @classmethod
+    def build(cls, policies: Iterable[dict[str, Any]], fingerprint: str) -> "PolicyRetriever":
+        chunks = [
+            {"policy_id": policy["policy_id"], "title": policy.get("title", ""), "text": text}
+            for policy in policies
+            for text in chunk_policy(policy)
+        ]
+        vectors = embed([f"{chunk['title']} {chunk['text']}" for chunk in chunks])
+        return cls(_numpy().ascontiguousarray(vectors.T), chunks, fingerprint)
+
+    def save(self, directory: Path) -> None:
+        # Write-then-rename so other workers never map a half-written matrix.
+        directory.mkdir(parents=True, exist_ok=True)
+        suffix = f".{os.getpid()}.tmp"
+        vectors_tmp = directory / f"vectors.npy{suffix}"
+        chunks_tmp = directory / f"chunks.json{suffix}"
+        with open(vectors_tmp, "wb") as handle:
+            _numpy().save(handle, self.vectors)
+        meta = {"fingerprint": self.fingerprint, "dim": int(self.vectors.shape[0]), "chunks": self.chunks}
+        chunks_tmp.write_text(json.dumps(meta), encoding="utf-8")
+        os.replace(vectors_tmp, directory / "vectors.npy")
+        os.replace(chunks_tmp, directory / "chunks.json")
+
+    @classmethod
+    def load(cls, directory: Path) -> "PolicyRetriever":
+        meta = json.loads((directory / "chunks.json").read_text(encoding="utf-8"))
+        vectors = _numpy().load(directory / "vectors.npy", mmap_mode="r")
+        if vectors.shape != (meta["dim"], len(meta["chunks"])):
+            raise ValueError("vector matrix does not match chunk metadata")
+        return cls(vectors, meta["chunks"], meta["fingerprint"])
+
+    def search_many(self, queries: Sequence[str], k: int = 3) -> list[list[PolicyChunk]]:
+        """Top-k chunks for a batch of queries with one matrix product."""
+        if not len(self.chunks) or not queries:
+            return [[] for _ in queries]
+        np = _numpy()
+        query_vectors = embed(queries, dim=self.vectors.shape[0])
+        dims = np.flatnonzero(query_vectors.any(axis=0))
+        if not len(dims):
+            return [[] for _ in queries]
+        scores = query_vectors[:, dims] @ self.vectors[dims]
+        k = min(k, scores.shape[1])
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        results = []
+        for row, candidates in enumerate(top):
+            ordered = candidates[np.argsort(-scores[row, candidates])]
+            results.append([
+                PolicyChunk(**self.chunks[index], score=float(scores[row, index])) for index in ordered
+            ])
+        return results
+
+    def search(self, query: str, k: int = 3) -> list[PolicyChunk]:
+        return self.search_many([query], k)[0]
+
+
+# (policy index version, retriever) swapped as one value; the retriever is None if building failed.
+_current: tuple[int, PolicyRetriever | None] | None = None
+_builder = ThreadPoolExecutor(max_workers=1, thread_name_prefix="policy-rag")
+_building: Future | None = None
+
+
+def _rag_dir() -> Path:
+    return Path(os.getenv("POLICY_RAG_DIR") or RAG_DIR)
+
+
+def _ensure_retriever(index: PolicyIndex) -> PolicyRetriever:
+    fingerprint = index.fingerprint()
+    directory = _rag_dir()
+    if (directory / "chunks.json").exists():
+        try:
+            retriever = PolicyRetriever.load(directory)
+            if retriever.fingerprint == fingerprint:
+                return retriever
+        except (OSError, ValueError, KeyError) as exc:
+            print(f"[PolicyRAG] Rebuilding unreadable index in {directory}: {exc}")
+    retriever = PolicyRetriever.build(index.policies.values(), fingerprint)
+    try:
+        retriever.save(directory)
+        # Reopen memory-mapped so the in-process copy can be released.
+        retriever = PolicyRetriever.load(directory)
+    except OSError as exc:
+        print(f"[PolicyRAG] Keeping index in memory, could not write {directory}: {exc}")
+    return retriever
+
+
+def _rebuild(index: PolicyIndex) -> None:
+    global _current
+    try:
+        retriever = _ensure_retriever(index)
+    except Exception as exc:
+        # Not retried until the policies change again.
+        print(f"[PolicyRAG] Retrieval disabled for policy index version {index.version}: {exc}")
+        retriever = None
+    _current = (index.version, retriever)
+
+
+def get_retriever(wait: bool = False) -> PolicyRetriever | None:
+    """Shared retriever, rebuilt in the background when the policy index changes.
+
+    Until a rebuild finishes the previous retriever is returned (None before
+    the first one); ``wait`` blocks for it instead. None without NumPy.
+    """
+    global _building
+    if not NUMPY_AVAILABLE or os.getenv("POLICY_RAG_ENABLED", "true").lower() in {"0", "false", "no"}:
+        return None
+    index = get_policy_index()
+    if _current is None or _current[0] != index.version:
+        if _building is None or _building.done():
+            _building = _builder.submit(_rebuild, index)
+        if wait:
+            _building.result()
+    return _current[1] if _current is not None else None
+
+
+def retrieve_context(question: str, retriever: PolicyRetriever | None = None) -> list[str]:
+    """Policy excerpts worth adding to the prompt for ``question``, from ``retriever`` or the shared one."""
+    retriever = retriever or get_retriever()
+    if retriever is None:
+        return []
+    min_score = float(os.getenv("POLICY_RAG_MIN_SCORE", "0.15"))
+    top_k = int(os.getenv("POLICY_RAG_TOP_K", "3"))
+    return [
+        f"{chunk.title}: {chunk.text}"
+        for chunk in retriever.search(question, k=top_k)
+        if chunk.score >= min_score
+    ]
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("build", help="chunk and embed data/policies into POLICY_RAG_DIR")
+    search = commands.add_parser("search", help="print the top chunks for a query")
+    search.add_argument("query")
+    search.add_argument("-k", type=int, default=3)
+    args = parser.parse_args(argv)
+    if not NUMPY_AVAILABLE:
+        raise SystemExit("numpy is required for policy retrieval")
+
+    started = time.perf_counter()
+    retriever = get_retriever(wait=True)
+    if retriever is None:
+        raise SystemExit("policy retrieval is disabled (POLICY_RAG_ENABLED)")
+    if args.command == "build":
+        print(f"{len(retriever.chunks)} chunks in {_rag_dir()} ({time.perf_counter() - started:.2f}s)")
+    else:
+        for chunk in retriever.search(args.query, k=args.k):
+            print(f"{chunk.score:.3f}  {chunk.policy_id}  {chunk.text[:100]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,250 @@
+"""Replayable event buffers that let a dropped SSE connection resume its run.
+
+A run's frames are pumped into a :class:`RunBuffer` by a task of their own,
+so the run no longer lives and dies with one HTTP connection. Each frame gets
+a monotonically increasing SSE ``id``. A client that reconnects with
+``Last-Event-ID`` is replayed everything after that id and then follows the
+run live if it is still going.
+
+The buffer holds what the run yields, text deltas included, so each
+connection drains its own :class:`Subscription` and can merge deltas at its
+own pace (see :mod:`core.sse_coalescer`).
+
+Memory stays bounded in three ways:
+
+* each buffer is a ring of at most ``capacity`` frames;
+* finished buffers are kept in a TTL cache for ``ttl`` seconds;
+* a run nobody is attached to is cancelled after ``grace`` seconds.
+
+While a client is attached, the run pauses rather than overwrite frames that
+client has not read, which keeps the old backpressure on slow consumers.
+"""
+from __future__ import annotations
+
+import asyncio
+import inspect
+import os
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Callable
+
+from .cache import TTLCache
+
+
+class ResumeUnavailable(Exception):
+    """The frames after the requested id have already left the ring."""
+
+
+async def _drain(subscription: "Subscription", done: object) -> AsyncIterator[Any]:
+    while (item := await subscription.get()) is not done:
+        yield item
+
+
+class Subscription:
+    """One client's read position in a :class:`RunBuffer`.
+
+    It is drained like an ``asyncio.Queue``: ``get`` returns the buffered
+    items in order and then ``done`` once the run has finished. ``position``
+    is the id of the last item taken, which is the id a frame built from it
+    should carry.
+    """
+
+    def __init__(self, buffer: "RunBuffer", position: int) -> None:
+        self.buffer = buffer
+        self.position = position
+        self.done = object()
+
+    def empty(self) -> bool:
+        return self.position >= self.buffer.last_id and not self.buffer.finished
+
+    def get_nowait(self) -> Any:
+        buffer = self.buffer
+        if self.position < buffer.last_id:
+            item = buffer.frames[len(buffer.frames) - (buffer.last_id - self.position)]
+            self.position += 1
+            buffer._notify()
+            return item
+        if buffer.finished:
+            return self.done
+        raise asyncio.QueueEmpty
+
+    async def get(self) -> Any:
+        while self.empty():
+            await self.buffer._wait()
+        return self.get_nowait()
+
+    def close(self) -> None:
+        self.buffer._subscriptions.discard(self)
+        self.buffer._notify()
+
+
+class RunBuffer:
+    def __init__(self, capacity: int) -> None:
+        self.capacity = max(1, capacity)
+        # Frames are stored as produced; dict frames get their ``id`` stamped in.
+        self.frames: deque[Any] = deque(maxlen=self.capacity)
+        self.last_id = 0
+        self.finished = False
+        self.task: asyncio.Task | None = None
+        self.cancel: Callable[[], object] | None = None
+        self.cancelling: asyncio.Future | None = None
+        self.on_detached: asyncio.TimerHandle | None = None
+        self._subscriptions: set[Subscription] = set()
+        self._changed = asyncio.Event()
+
+    @property
+    def subscribers(self) -> int:
+        return len(self._subscriptions)
+
+    def covers(self, after: int) -> bool:
+        """Whether every frame after ``after`` is still buffered."""
+        oldest = self.last_id - len(self.frames) + 1
+        return 0 <= after <= self.last_id and after + 1 >= oldest
+
+    async def append(self, frame: Any) -> None:
+        # Wait instead of evicting a frame an attached client has not read yet.
+        while self._subscriptions and min(s.position for s in self._subscriptions) <= self.last_id - self.capacity:
+            await self._wait()
+        self.last_id += 1
+        self.frames.append({**frame, "id": str(self.last_id)} if isinstance(frame, dict) else frame)
+        self._notify()
+
+    def finish(self) -> None:
+        self.finished = True
+        self._notify()
+
+    def subscribe(self, after: int = 0) -> Subscription:
+        """Attach a reader at id ``after``.
+
+        The check and the attachment happen together, so once this returns
+        the frames after ``after`` can no longer be evicted.
+        """
+        if not self.covers(after):
+            raise ResumeUnavailable(f"Events after id {after} are no longer buffered.")
+        subscription = Subscription(self, after)
+        self._subscriptions.add(subscription)
+        return subscription
+
+    async def _wait(self) -> None:
+        await self._changed.wait()
+
+    def _notify(self) -> None:
+        # Wake everyone waiting on the current event and start a fresh one.
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+
+@dataclass
+class RunBufferConfig:
+    capacity: int = 1024
+    ttl: float = 300.0
+    grace: float = 30.0
+    max_runs: int = 1000
+
+    @classmethod
+    def from_env(cls) -> "RunBufferConfig":
+        return cls(
+            capacity=int(os.getenv("RUN_BUFFER_EVENTS", "1024")),
+            ttl=float(os.getenv("RUN_BUFFER_TTL_SECONDS", "300")),
+            grace=float(os.getenv("RUN_RESUME_GRACE_SECONDS", "30")),
+            max_runs=int(os.getenv("RUN_BUFFER_MAX_RUNS", "1000")),
+        )
+
+
+class RunBuffers:
+    """Live and recently finished run buffers keyed by ``(thread_id, run_id)``."""
+
+    def __init__(self, config: RunBufferConfig) -> None:
+        self.config = config
+        self._live: dict[tuple[str, str], RunBuffer] = {}
+        self._finished: TTLCache[tuple[str, str], RunBuffer] = TTLCache(
+            max_entries=config.max_runs, ttl=config.ttl
+        )
+
+    def start(
+        self,
+        thread_id: str,
+        run_id: str,
+        frames: AsyncIterator[Any],
+        cancel: Callable[[], object] | None = None,
+    ) -> RunBuffer:
+        """Pump ``frames`` into a new buffer for the run in a background task.
+
+        ``cancel`` stops an orphaned run so that it still ends with its own
+        cancellation frame (it may return an awaitable); without it the pump
+        task is cancelled.
+        """
+        # Finished buffers would otherwise only expire when looked up again.
+        self._finished.expire()
+        key = (thread_id, run_id)
+        buffer = RunBuffer(self.config.capacity)
+        buffer.cancel = cancel
+        self._live[key] = buffer
+        self._finished.pop(key)
+        buffer.task = asyncio.create_task(self._pump(key, buffer, frames))
+        return buffer
+
+    def get(self, thread_id: str, run_id: str) -> RunBuffer | None:
+        key = (thread_id, run_id)
+        return self._live.get(key) or self._finished.get(key)
+
+    def subscribe(self, buffer: RunBuffer, after: int = 0) -> Subscription:
+        """``buffer.subscribe`` that also stops a pending cancellation of the orphaned run."""
+        subscription = buffer.subscribe(after)
+        if buffer.on_detached is not None:
+            buffer.on_detached.cancel()
+            buffer.on_detached = None
+        return subscription
+
+    async def follow(
+        self,
+        subscription: Subscription,
+        drain: Callable[[Subscription, object], AsyncIterator[Any]] = _drain,
+    ) -> AsyncIterator[Any]:
+        """Stream a subscription through ``drain`` (for example a frame coalescer).
+
+        The run is cancelled once no client has been attached for ``grace``.
+        """
+        buffer = subscription.buffer
+        try:
+            async for frame in drain(subscription, subscription.done):
+                yield frame
+        finally:
+            subscription.close()
+            if buffer.subscribers == 0 and not buffer.finished and buffer.task is not None:
+                loop = asyncio.get_running_loop()
+                buffer.on_detached = loop.call_later(max(0.0, self.config.grace), self._reap, buffer)
+
+    def snapshot(self) -> dict[str, int]:
+        self._finished.expire()
+        return {"live": len(self._live), "finished": len(self._finished)}
+
+    @staticmethod
+    def _reap(buffer: RunBuffer) -> None:
+        buffer.on_detached = None
+        if buffer.subscribers == 0 and not buffer.finished and buffer.task is not None:
+            if buffer.cancel is not None:
+                result = buffer.cancel()
+                if inspect.isawaitable(result):
+                    # Keep a reference so the cancellation is not collected half-way.
+                    buffer.cancelling = asyncio.ensure_future(result)
+            else:
+                buffer.task.cancel()
+
+    async def _pump(self, key: tuple[str, str], buffer: RunBuffer, frames: AsyncIterator[Any]) -> None:
+        try:
+            async for frame in frames:
+                await buffer.append(frame)
+        except Exception as exc:  # pragma: no cover - best effort guard
+            print(f"[RunBuffers] Run {key[1]} failed: {exc}")
+        finally:
+            aclose = getattr(frames, "aclose", None)
+            if aclose is not None:
+                await aclose()
+            buffer.finish()
+            if self._live.get(key) is buffer:
+                del self._live[key]
+                self._finished.set(key, buffer)
+
+
+run_buffers = RunBuffers(RunBufferConfig.from_env())
@@ -0,0 +1,186 @@
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Callable, TypeVar
+
+from .state_backend import StateBackend, state_backend
+
+T = TypeVar("T")
+
+Drain = Callable[[asyncio.Queue, object], AsyncIterator[Any]]
+
+
+async def _drain(queue: asyncio.Queue, done: object) -> AsyncIterator[Any]:
+    while (item := await queue.get()) is not done:
+        yield item
+
+
+def _log_failure(future: asyncio.Future) -> None:
+    if not future.cancelled() and future.exception() is not None:  # pragma: no cover - best effort guard
+        print(f"[RunRegistry] State backend call failed: {future.exception()}")
+
+
+@dataclass
+class RunHandle:
+    thread_id: str
+    run_id: str
+    task: asyncio.Task | None = None
+    cancelled: bool = False
+    reason: str = ""
+    queue: asyncio.Queue = field(default_factory=asyncio.Queue)
+
+
+class RunRegistry:
+    """Tracks in-flight runs so a single run or thread can be cancelled.
+
+    Each run's events are produced by its own task and handed to the SSE
+    generator through a queue. Cancelling a run cancels that task, which
+    unwinds whatever it is awaiting (tool, Gemini stream, executor future)
+    and wakes the consumer straight away; other runs are untouched. A thread
+    interrupted without a ``run_id`` also refuses new runs until it is
+    released by a human action.
+
+    Held threads and cancellations go through a state backend (see
+    ``core.state_backend``). With a shared backend, cancellations published
+    by other workers are polled and applied to this worker's runs. A shared
+    backend does blocking I/O, so its calls run on a worker thread and never
+    stall the streams on the event loop.
+    """
+
+    def __init__(self, backend: StateBackend) -> None:
+        self._backend = backend
+        self._runs: dict[tuple[str, str], RunHandle] = {}
+        self._poller: asyncio.Task | None = None
+
+    def start(self) -> None:
+        if self._backend.shared and self._poller is None:
+            self._poller = asyncio.create_task(self._poll())
+
+    async def stop(self) -> None:
+        if self._poller is not None:
+            self._poller.cancel()
+            await asyncio.wait({self._poller})
+            self._poller = None
+
+    def active_runs(self, thread_id: str | None = None) -> list[RunHandle]:
+        return [handle for handle in self._runs.values() if thread_id in (None, handle.thread_id)]
+
+    async def is_interrupted(self, thread_id: str) -> bool:
+        return await self._call(self._backend.is_held, thread_id)
+
+    async def interrupt(self, thread_id: str, run_id: str | None = None, reason: str = "") -> int:
+        """Cancel one run, or every run of ``thread_id`` and hold the thread.
+
+        Returns the number of runs cancelled here plus those other workers serve.
+        """
+        # Local runs stop right away; the backend is told afterwards.
+        cancelled = self._cancel_matching(thread_id, run_id, reason)
+        if run_id is None:
+            await self._call(self._backend.hold, thread_id, reason or "interrupted")
+        return cancelled + await self._call(self._backend.publish_cancel, thread_id, run_id, reason)
+
+    async def release(self, thread_id: str) -> None:
+        """Allow new runs again for ``thread_id``; other threads are unaffected."""
+        await self._call(self._backend.release, thread_id)
+
+    async def _call(self, func: Callable[..., T], *args: Any) -> T:
+        if not self._backend.shared:
+            return func(*args)
+        return await asyncio.to_thread(func, *args)
+
+    def _call_soon(self, func: Callable[..., Any], *args: Any) -> None:
+        """Like ``_call`` without waiting, for cleanup that must not be cancelled half-way."""
+        if not self._backend.shared:
+            func(*args)
+            return
+        future = asyncio.get_running_loop().run_in_executor(None, func, *args)
+        future.add_done_callback(_log_failure)
+
+    def _cancel_matching(self, thread_id: str, run_id: str | None, reason: str) -> int:
+        cancelled = 0
+        for handle in self.active_runs(thread_id):
+            if run_id is None or handle.run_id == run_id:
+                self._cancel(handle, reason)
+                cancelled += 1
+        return cancelled
+
+    async def _poll(self) -> None:
+        while True:
+            await asyncio.sleep(self._backend.poll_interval)
+            try:
+                for thread_id, run_id, reason in await self._call(self._backend.poll_cancels):
+                    self._cancel_matching(thread_id, run_id, reason)
+            except Exception as exc:  # pragma: no cover - best effort guard
+                print(f"[RunRegistry] Polling cancellations failed: {exc}")
+
+    async def stream(
+        self,
+        thread_id: str,
+        run_id: str,
+        events: AsyncIterator[T],
+        on_cancel: Callable[[str], T],
+        drain: Drain = _drain,
+        max_queued: int = 0,
+    ) -> AsyncIterator[T]:
+        """Drive ``events`` in a cancellable task and yield what it produces.
+
+        ``drain`` turns the run's queue into the output stream (for example a
+        frame coalescer). A positive ``max_queued`` bounds the queue so a slow
+        consumer pauses the producer instead of growing memory. When the run
+        is cancelled the stream ends with ``on_cancel(reason)``. When the
+        consumer goes away (client disconnect) the task is cancelled too, so
+        no work outlives its stream.
+        """
+        handle = RunHandle(thread_id=thread_id, run_id=run_id, queue=asyncio.Queue(max_queued))
+        done = object()
+
+        async def _produce() -> None:
+            finished = False
+            try:
+                async for event in events:
+                    await handle.queue.put(event)
+                await handle.queue.put(done)
+                finished = True
+            finally:
+                aclose = getattr(events, "aclose", None)
+                if aclose is not None:
+                    await aclose()
+                if not finished:
+                    # Cancelled or failed: make room rather than block, the tail is moot.
+                    while handle.queue.full():
+                        handle.queue.get_nowait()
+                    handle.queue.put_nowait(done)
+
+        key = (thread_id, run_id)
+        previous = self._runs.get(key)
+        if previous is not None:
+            self._cancel(previous, "superseded by a new run with the same id")
+        self._runs[key] = handle
+        await self._call(self._backend.add_run, thread_id, run_id)
+        handle.task = asyncio.create_task(_produce())
+        try:
+            async for item in drain(handle.queue, done):
+                yield item
+            # wait() rather than await, so a cancelled producer does not cancel us.
+            await asyncio.wait({handle.task})
+            if handle.cancelled:
+                yield on_cancel(handle.reason)
+            elif not handle.task.cancelled() and handle.task.exception() is not None:
+                raise handle.task.exception()  # type: ignore[misc]
+        finally:
+            if not handle.task.done():
+                handle.task.cancel()
+            if self._runs.get(key) is handle:
+                del self._runs[key]
+                self._call_soon(self._backend.remove_run, thread_id, run_id)
+
+    @staticmethod
+    def _cancel(handle: RunHandle, reason: str) -> None:
+        handle.cancelled = True
+        handle.reason = reason
+        if handle.task is not None and not handle.task.done():
+            handle.task.cancel()
+
+
+run_registry = RunRegistry(state_backend)
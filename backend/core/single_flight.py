@@ -0,0 +1,126 @@
+"""Single-flight coalescing of identical concurrent calls.
+
+The first caller for a key starts the work in a task of its own. Callers that
+arrive while it is in flight wait on the same task instead of starting
+another one. Because the work does not belong to any one caller, a caller
+that goes away does not cancel it for the others. It is cancelled only when
+every waiter is gone. Nothing is kept once the call finishes; caching results
+is left to the caller.
+
+:meth:`SingleFlight.stream` does the same for async iterators. Chunks are
+recorded as they arrive, so a caller that joins late first gets what it
+missed and then follows live.
+"""
+from __future__ import annotations
+
+import asyncio
+from typing import AsyncIterator, Awaitable, Callable, Generic, Hashable, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+T = TypeVar("T")
+
+
+class _Call(Generic[T]):
+    def __init__(self, task: asyncio.Future[T]) -> None:
+        self.task = task
+        self.waiters = 0
+
+
+class _Broadcast(Generic[T]):
+    def __init__(self) -> None:
+        self.chunks: list[T] = []
+        self.finished = False
+        self.error: BaseException | None = None
+        self.subscribers = 0
+        self.task: asyncio.Task | None = None
+        self._changed = asyncio.Event()
+
+    async def pump(self, source: AsyncIterator[T]) -> None:
+        try:
+            async for chunk in source:
+                self.chunks.append(chunk)
+                self._notify()
+        except Exception as exc:
+            self.error = exc
+        finally:
+            self.finished = True
+            self._notify()
+
+    async def follow(self) -> AsyncIterator[T]:
+        index = 0
+        self.subscribers += 1
+        try:
+            while True:
+                while index < len(self.chunks):
+                    index += 1
+                    yield self.chunks[index - 1]
+                if self.finished:
+                    if self.error is not None:
+                        raise self.error
+                    return
+                await self._changed.wait()
+        finally:
+            self.subscribers -= 1
+            if self.subscribers == 0 and not self.finished and self.task is not None:
+                # Everyone who wanted this stream went away.
+                self.task.cancel()
+
+    def _notify(self) -> None:
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+
+class SingleFlight(Generic[K]):
+    def __init__(self) -> None:
+        self._calls: dict[K, _Call] = {}
+        self._streams: dict[K, _Broadcast] = {}
+
+    def in_flight(self) -> int:
+        return len(self._calls) + len(self._streams)
+
+    async def do(self, key: K, work: Callable[[], Awaitable[T]]) -> tuple[T, bool]:
+        """Await ``work()``, or the identical call already in flight for ``key``.
+
+        Returns the result and whether it was shared with an earlier caller.
+        """
+        call = self._calls.get(key)
+        shared = call is not None
+        if call is None:
+            call = _Call(asyncio.ensure_future(work()))
+            self._calls[key] = call
+            call.task.add_done_callback(lambda _: self._forget(self._calls, key, call))
+        call.waiters += 1
+        try:
+            # shield: one waiter being cancelled must not cancel the shared task.
+            return await asyncio.shield(call.task), shared
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                # Forget it now so a caller arriving before it unwinds starts afresh.
+                self._forget(self._calls, key, call)
+                call.task.cancel()
+
+    async def stream(self, key: K, source: Callable[[], AsyncIterator[T]]) -> AsyncIterator[T]:
+        """Iterate ``source()``, or join the identical stream already in flight for ``key``."""
+        broadcast = self._streams.get(key)
+        if broadcast is None:
+            broadcast = _Broadcast()
+            self._streams[key] = broadcast
+            broadcast.task = asyncio.create_task(broadcast.pump(source()))
+            broadcast.task.add_done_callback(lambda _: self._forget(self._streams, key, broadcast))
+        try:
+            async for chunk in broadcast.follow():
+                yield chunk
+        finally:
+            if broadcast.subscribers == 0 and not broadcast.finished:
+                # follow() has just cancelled it; see ``do``.
+                self._forget(self._streams, key, broadcast)
+
+    def joinable(self, key: K) -> bool:
+        """Whether a call or stream for ``key`` is in flight right now."""
+        return key in self._calls or key in self._streams
+
+    @staticmethod
+    def _forget(calls: dict, key: K, call: object) -> None:
+        if calls.get(key) is call:
+            del calls[key]
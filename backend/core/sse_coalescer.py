@@ -0,0 +1,153 @@
+"""Coalesce streamed text deltas into fewer SSE frames.
+
+A run's events are buffered unmerged (see ``core.run_buffer``), and every
+connection drains its own subscription through a :class:`FrameCoalescer`.
+The coalescer merges consecutive :class:`TextDelta` items for the same
+message into a single ``TEXT_MESSAGE_CONTENT`` frame, which carries the SSE
+id of its last delta so a resume picks up right after it. It flushes when the batch reaches the byte
+budget, when the oldest delta has waited ``max_delay`` seconds, or as soon
+as any other (structural) event arrives. When sending a frame takes longer
+than ``max_delay``, the client is treated as slow and the budget doubles, up
+to ``max_frame_bytes``, so a lagging connection gets fewer, larger frames.
+Because each connection has its own coalescer, the time measured is that
+connection's own write, and one slow client does not change the frames
+another one gets. The run buffer's backpressure then caps how far behind a
+connection can fall.
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator
+
+from models.ag_ui_encoder import encode_event
+from models.ag_ui_types import TextMessageContentEvent
+
+
+@dataclass
+class TextDelta:
+    """A text chunk yielded by a run; encoded by the coalescer, not the run."""
+
+    message_id: str
+    delta: str
+
+
+@dataclass
+class CoalescingConfig:
+    frame_bytes: int = 1024
+    max_frame_bytes: int = 16 * 1024
+    max_delay: float = 0.02
+    max_queued_events: int = 256
+
+    @classmethod
+    def from_env(cls) -> "CoalescingConfig":
+        return cls(
+            frame_bytes=int(os.getenv("SSE_COALESCE_BYTES", "1024")),
+            max_frame_bytes=int(os.getenv("SSE_COALESCE_MAX_BYTES", str(16 * 1024))),
+            max_delay=float(os.getenv("SSE_COALESCE_DELAY_MS", "20")) / 1000,
+            max_queued_events=int(os.getenv("SSE_MAX_QUEUED_EVENTS", "256")),
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.frame_bytes > 0 and self.max_delay > 0
+
+
+@dataclass
+class FrameStats:
+    frames: int = 0
+    bytes: int = 0
+    deltas: int = 0
+    slow_sends: int = 0
+    started: float = field(default_factory=time.perf_counter)
+
+
+def _frame(message_id: str, delta: str, frame_id: int | None) -> dict[str, str]:
+    frame = {
+        "event": "message",
+        "data": encode_event(TextMessageContentEvent, messageId=message_id, delta=delta),
+    }
+    if frame_id is not None:
+        frame["id"] = str(frame_id)
+    return frame
+
+
+class FrameCoalescer:
+    def __init__(self, config: CoalescingConfig | None = None) -> None:
+        self.config = config or CoalescingConfig.from_env()
+        self.budget = self.config.frame_bytes
+        self.stats = FrameStats()
+
+    async def frames(self, queue: asyncio.Queue, done: object) -> AsyncIterator[Any]:
+        """Yield SSE frames from ``queue`` until ``done`` is received.
+
+        A source that numbers its items (a run buffer subscription) exposes
+        the id of the last one taken as ``position``.
+        """
+        message_id = ""
+        last_id: int | None = None
+        parts: list[str] = []
+        size = 0
+        deadline = 0.0
+        loop = asyncio.get_running_loop()
+        coalesce = self.config.enabled
+
+        while True:
+            if not parts:
+                item = await queue.get()
+            elif not queue.empty():
+                item = queue.get_nowait()
+            else:
+                timeout = deadline - loop.time()
+                try:
+                    item = await asyncio.wait_for(queue.get(), timeout) if timeout > 0 else None
+                except asyncio.TimeoutError:
+                    item = None
+            position = getattr(queue, "position", None)
+
+            if isinstance(item, TextDelta):
+                self.stats.deltas += 1
+                if not coalesce:
+                    frame, started = _frame(item.message_id, item.delta, position), time.perf_counter()
+                    yield frame
+                    self._sent(frame, started)
+                    continue
+                if parts and item.message_id != message_id:
+                    frame, started = _frame(message_id, "".join(parts), last_id), time.perf_counter()
+                    yield frame
+                    self._sent(frame, started)
+                    parts, size = [], 0
+                if not parts:
+                    message_id = item.message_id
+                    deadline = loop.time() + self.config.max_delay
+                parts.append(item.delta)
+                last_id = position
+                size += len(item.delta.encode())
+                if size < self.budget:
+                    continue
+
+            # Budget reached, window expired, or a structural event/end arrived.
+            if parts:
+                frame, started = _frame(message_id, "".join(parts), last_id), time.perf_counter()
+                yield frame
+                self._sent(frame, started)
+                parts, size = [], 0
+            if item is done:
+                return
+            if item is not None and not isinstance(item, TextDelta):
+                started = time.perf_counter()
+                yield item
+                self._sent(item, started)
+
+    def _sent(self, frame: dict[str, str], started: float) -> None:
+        # We are resumed only after the consumer handed the frame to the transport.
+        elapsed = time.perf_counter() - started
+        self.stats.frames += 1
+        self.stats.bytes += len(frame.get("data", ""))
+        if elapsed > self.config.max_delay:
+            self.stats.slow_sends += 1
+            self.budget = min(self.budget * 2, self.config.max_frame_bytes)
+        elif self.budget > self.config.frame_bytes:
+            self.budget = max(self.budget // 2, self.config.frame_bytes)
@@ -0,0 +1,185 @@
+"""Run-control state shared by the workers of one deployment.
+
+``RunRegistry`` keeps the run tasks themselves in-process, since only the
+worker serving a stream can cancel it. What other workers need to see lives
+here:
+
+* threads held by ``/interrupt`` until ``/human-action`` releases them;
+* the runs each worker is serving, so an interrupt can report how many it hit;
+* cancellation requests, which every worker polls and applies to its own runs.
+
+Two backends are provided. The in-process default is right for a single
+worker. SQLite in WAL mode (``STATE_BACKEND=sqlite``) lets ``uvicorn
+--workers N`` on one host share the state. With it, an ``/interrupt`` handled
+by one worker stops a stream served by another within ``STATE_POLL_MS``.
+"""
+from __future__ import annotations
+
+import os
+import sqlite3
+import threading
+import time
+from typing import Callable
+
+from .cache import TTLCache
+
+# Cancellation rows only need to outlive one poll of every worker.
+_CANCEL_RETENTION = 60.0
+
+
+class MemoryStateBackend:
+    shared = False
+
+    def __init__(self, max_held: int = 10_000, hold_ttl: float = 3600, clock: Callable[[], float] = time.monotonic) -> None:
+        self._held: TTLCache[str, str] = TTLCache(max_entries=max_held, ttl=hold_ttl, clock=clock)
+
+    def hold(self, thread_id: str, reason: str) -> None:
+        # Lapsed holds are only skipped on read, so drop them here as SQLite does.
+        self._held.expire()
+        self._held.set(thread_id, reason)
+
+    def is_held(self, thread_id: str) -> bool:
+        return self._held.peek(thread_id) is not None
+
+    def release(self, thread_id: str) -> None:
+        self._held.pop(thread_id)
+
+    def add_run(self, thread_id: str, run_id: str) -> None:
+        pass
+
+    def remove_run(self, thread_id: str, run_id: str) -> None:
+        pass
+
+    def publish_cancel(self, thread_id: str, run_id: str | None, reason: str) -> int:
+        """Ask other workers to cancel matching runs; returns how many they serve."""
+        return 0
+
+    def poll_cancels(self) -> list[tuple[str, str | None, str]]:
+        return []
+
+
+class SQLiteStateBackend:
+    shared = True
+
+    def __init__(self, path: str, hold_ttl: float = 3600, poll_interval: float = 0.1) -> None:
+        self.hold_ttl = hold_ttl
+        self.poll_interval = poll_interval
+        self.worker_id = str(os.getpid())
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS held_threads (
+                thread_id TEXT PRIMARY KEY,
+                reason TEXT NOT NULL,
+                expires_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS active_runs (
+                thread_id TEXT NOT NULL,
+                run_id TEXT NOT NULL,
+                worker TEXT NOT NULL,
+                PRIMARY KEY (thread_id, run_id, worker)
+            );
+            CREATE TABLE IF NOT EXISTS cancellations (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                thread_id TEXT NOT NULL,
+                run_id TEXT,
+                reason TEXT NOT NULL,
+                worker TEXT NOT NULL,
+                created_at REAL NOT NULL
+            );
+            """
+        )
+        self._forget_dead_workers()
+        row = self._conn.execute("SELECT COALESCE(MAX(id), 0) FROM cancellations").fetchone()
+        self._last_cancel = row[0]
+
+    def _forget_dead_workers(self) -> None:
+        """Drop runs registered by workers that exited without cleaning up."""
+        workers = [worker for (worker,) in self._conn.execute("SELECT DISTINCT worker FROM active_runs")]
+        for worker in workers:
+            try:
+                os.kill(int(worker), 0)
+            except ProcessLookupError:
+                self._conn.execute("DELETE FROM active_runs WHERE worker = ?", (worker,))
+            except (PermissionError, ValueError):
+                continue
+
+    def hold(self, thread_id: str, reason: str) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute("DELETE FROM held_threads WHERE expires_at <= ?", (now,))
+            self._conn.execute(
+                "INSERT INTO held_threads (thread_id, reason, expires_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(thread_id) DO UPDATE SET reason = excluded.reason, expires_at = excluded.expires_at",
+                (thread_id, reason, now + self.hold_ttl),
+            )
+
+    def is_held(self, thread_id: str) -> bool:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM held_threads WHERE thread_id = ? AND expires_at > ?", (thread_id, time.time())
+            ).fetchone()
+        return row is not None
+
+    def release(self, thread_id: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM held_threads WHERE thread_id = ?", (thread_id,))
+
+    def add_run(self, thread_id: str, run_id: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO active_runs (thread_id, run_id, worker) VALUES (?, ?, ?)",
+                (thread_id, run_id, self.worker_id),
+            )
+
+    def remove_run(self, thread_id: str, run_id: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM active_runs WHERE thread_id = ? AND run_id = ? AND worker = ?",
+                (thread_id, run_id, self.worker_id),
+            )
+
+    def publish_cancel(self, thread_id: str, run_id: str | None, reason: str) -> int:
+        now = time.time()
+        with self._lock:
+            self._conn.execute("DELETE FROM cancellations WHERE created_at < ?", (now - _CANCEL_RETENTION,))
+            self._conn.execute(
+                "INSERT INTO cancellations (thread_id, run_id, reason, worker, created_at) VALUES (?, ?, ?, ?, ?)",
+                (thread_id, run_id, reason, self.worker_id, now),
+            )
+            row = self._conn.execute(
+                "SELECT COUNT(*) FROM active_runs WHERE thread_id = ? AND (? IS NULL OR run_id = ?) AND worker != ?",
+                (thread_id, run_id, run_id, self.worker_id),
+            ).fetchone()
+        return row[0]
+
+    def poll_cancels(self) -> list[tuple[str, str | None, str]]:
+        """Cancellations published by other workers since the last poll."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, thread_id, run_id, reason, worker FROM cancellations WHERE id > ? ORDER BY id",
+                (self._last_cancel,),
+            ).fetchall()
+        if rows:
+            self._last_cancel = rows[-1][0]
+        return [(thread_id, run_id, reason) for _, thread_id, run_id, reason, worker in rows if worker != self.worker_id]
+
+
+StateBackend = MemoryStateBackend | SQLiteStateBackend
+
+
+def create_state_backend() -> StateBackend:
+    hold_ttl = float(os.getenv("INTERRUPT_TTL_SECONDS", "3600"))
+    if os.getenv("STATE_BACKEND", "memory").lower() == "sqlite":
+        return SQLiteStateBackend(
+            os.getenv("STATE_DB_PATH", "state.sqlite3"),
+            hold_ttl=hold_ttl,
+            poll_interval=float(os.getenv("STATE_POLL_MS", "100")) / 1000,
+        )
+    return MemoryStateBackend(hold_ttl=hold_ttl)
+
+
+state_backend = create_state_backend()
@@ -0,0 +1,202 @@
+"""Server-side conversation history keyed by ``threadId``.
+
+Clients that know the thread's current revision send only their new
+messages plus ``forwardedProps.baseRevision``; the store appends them and
+returns the next revision. Clients that resend the full history still work:
+messages already stored (matched by id) are skipped.
+
+Two backends are provided: an in-memory LRU (default) and SQLite in WAL mode
+(``THREAD_STORE=sqlite``) for histories that survive restarts and are shared
+by workers on the same host. Code on the event loop calls ``append_async``,
+which runs the SQLite transaction on a worker thread.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Iterable
+
+
+class RevisionConflict(Exception):
+    """The client's base revision does not match the stored thread."""
+
+    def __init__(self, thread_id: str, expected: int, actual: int) -> None:
+        super().__init__(
+            f"Thread {thread_id} is at revision {actual}, request was based on {expected}. "
+            "Resend the full history."
+        )
+        self.actual = actual
+
+
+@dataclass
+class StoredThread:
+    revision: int = 0
+    messages: list[dict[str, Any]] = field(default_factory=list)
+
+
+def _merge(thread: StoredThread, messages: Iterable[dict[str, Any]], base_revision: int | None) -> list[dict[str, Any]]:
+    """Validate ``base_revision`` and return the messages that still need storing."""
+    if base_revision is not None and base_revision != thread.revision:
+        raise RevisionConflict("", base_revision, thread.revision)
+    known = {message.get("id") for message in thread.messages}
+    return [message for message in messages if message.get("id") not in known or message.get("id") is None]
+
+
+def history_window(messages: list[dict[str, Any]], max_tokens: int) -> list[dict[str, Any]]:
+    """Most recent user/assistant turns that fit in ``max_tokens`` (~4 chars per token)."""
+    window: list[dict[str, Any]] = []
+    budget = max_tokens * 4
+    for message in reversed(messages):
+        if message.get("role") not in {"user", "assistant"} or not message.get("content"):
+            continue
+        budget -= len(message["content"])
+        if budget < 0:
+            break
+        window.append({"role": message["role"], "content": message["content"]})
+    window.reverse()
+    return window
+
+
+class MemoryThreadStore:
+    def __init__(self, max_threads: int = 10_000, max_messages: int = 200) -> None:
+        self.max_threads = max_threads
+        self.max_messages = max_messages
+        self._threads: OrderedDict[str, StoredThread] = OrderedDict()
+
+    def get(self, thread_id: str) -> StoredThread:
+        thread = self._threads.get(thread_id)
+        if thread is None:
+            return StoredThread()
+        self._threads.move_to_end(thread_id)
+        return StoredThread(thread.revision, list(thread.messages))
+
+    def append(
+        self,
+        thread_id: str,
+        messages: Iterable[dict[str, Any]],
+        base_revision: int | None = None,
+    ) -> StoredThread:
+        thread = self._threads.get(thread_id) or StoredThread()
+        try:
+            new = _merge(thread, messages, base_revision)
+        except RevisionConflict as exc:
+            raise RevisionConflict(thread_id, base_revision or 0, exc.actual) from None
+        thread.messages.extend(new)
+        thread.revision += len(new)
+        del thread.messages[:-self.max_messages]
+        self._threads[thread_id] = thread
+        self._threads.move_to_end(thread_id)
+        while len(self._threads) > self.max_threads:
+            self._threads.popitem(last=False)
+        return StoredThread(thread.revision, list(thread.messages))
+
+    async def append_async(
+        self,
+        thread_id: str,
+        messages: Iterable[dict[str, Any]],
+        base_revision: int | None = None,
+    ) -> StoredThread:
+        return self.append(thread_id, messages, base_revision)
+
+
+class SQLiteThreadStore:
+    def __init__(self, path: str, max_messages: int = 200) -> None:
+        self.max_messages = max_messages
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS threads (
+                thread_id TEXT PRIMARY KEY,
+                revision INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS thread_messages (
+                thread_id TEXT NOT NULL,
+                seq INTEGER NOT NULL,
+                message TEXT NOT NULL,
+                PRIMARY KEY (thread_id, seq)
+            );
+            """
+        )
+
+    def _load(self, thread_id: str) -> StoredThread:
+        row = self._conn.execute("SELECT revision FROM threads WHERE thread_id = ?", (thread_id,)).fetchone()
+        if row is None:
+            return StoredThread()
+        rows = self._conn.execute(
+            "SELECT message FROM thread_messages WHERE thread_id = ? ORDER BY seq", (thread_id,)
+        ).fetchall()
+        return StoredThread(row[0], [json.loads(message) for (message,) in rows])
+
+    def get(self, thread_id: str) -> StoredThread:
+        with self._lock:
+            return self._load(thread_id)
+
+    def append(
+        self,
+        thread_id: str,
+        messages: Iterable[dict[str, Any]],
+        base_revision: int | None = None,
+    ) -> StoredThread:
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                thread = self._load(thread_id)
+                try:
+                    new = _merge(thread, messages, base_revision)
+                except RevisionConflict as exc:
+                    raise RevisionConflict(thread_id, base_revision or 0, exc.actual) from None
+                revision = thread.revision
+                for message in new:
+                    revision += 1
+                    self._conn.execute(
+                        "INSERT INTO thread_messages (thread_id, seq, message) VALUES (?, ?, ?)",
+                        (thread_id, revision, json.dumps(message)),
+                    )
+                self._conn.execute(
+                    "INSERT INTO threads (thread_id, revision) VALUES (?, ?) "
+                    "ON CONFLICT(thread_id) DO UPDATE SET revision = excluded.revision",
+                    (thread_id, revision),
+                )
+                self._conn.execute(
+                    "DELETE FROM thread_messages WHERE thread_id = ? AND seq <= ?",
+                    (thread_id, revision - self.max_messages),
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            return StoredThread(revision, (thread.messages + new)[-self.max_messages:])
+
+    async def append_async(
+        self,
+        thread_id: str,
+        messages: Iterable[dict[str, Any]],
+        base_revision: int | None = None,
+    ) -> StoredThread:
+        # The transaction blocks on disk and on other workers' locks.
+        return await asyncio.to_thread(self.append, thread_id, list(messages), base_revision)
+
+
+ThreadStore = MemoryThreadStore | SQLiteThreadStore
+
+
+def create_thread_store() -> ThreadStore:
+    max_messages = int(os.getenv("THREAD_STORE_MAX_MESSAGES", "200"))
+    # Workers sharing run state (STATE_BACKEND=sqlite) need shared threads too.
+    if os.getenv("THREAD_STORE", os.getenv("STATE_BACKEND", "memory")).lower() == "sqlite":
+        return SQLiteThreadStore(os.getenv("THREAD_STORE_PATH", "threads.sqlite3"), max_messages=max_messages)
+    return MemoryThreadStore(
+        max_threads=int(os.getenv("THREAD_STORE_MAX_THREADS", "10000")),
+        max_messages=max_messages,
+    )
+
+
+thread_store = create_thread_store()
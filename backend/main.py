@@ -1,9 +1,12 @@
 from __future__ import annotations
 
 import os
+import asyncio
+from contextlib import asynccontextmanager
 from pathlib import Path
 
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 
 # Load environment variables from .env before importing routers so Gemini sees keys
@@ -19,9 +22,45 @@ if load_dotenv:
 else:
     print("[Main] python-dotenv not installed, using system environment variables")
 
+from core import metrics
+from core.feedback_log import feedback_log
+from core.gemini_client import get_gemini_client
+from core.intent_classifier import ready_classifier
+from core.loop_watchdog import LoopWatchdog
+from core.policy_index import get_policy_index
+from core.policy_rag import get_retriever
+from core.run_registry import run_registry
 from routers import ag_ui, feedback, human, interrupt
+from tools.general_tools import flush_answer_cache
 
-app = FastAPI(title="Custom Agent Orchestrator")
+
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    # Build the policy index before the first request instead of during it.
+    index = get_policy_index()
+    print(f"[Main] Policy index ready with {index.size} policies")
+    # Load (or retrain) the intent classifier in the background; until then prompts skip it.
+    ready_classifier()
+    # Starts loading the retrieval matrix in the background; answers skip excerpts until it is ready.
+    get_retriever()
+    if os.getenv("GEMINI_WARM_UP", "").lower() in {"1", "true", "yes"}:
+        # Import the SDK in the background; the first request waits for it only if it is still running.
+        asyncio.get_running_loop().run_in_executor(None, get_gemini_client().warm_up)
+    feedback_log.start()
+    run_registry.start()
+    watchdog = LoopWatchdog.from_env()
+    if watchdog is not None:
+        watchdog.start()
+    yield
+    if watchdog is not None:
+        await watchdog.stop()
+    await run_registry.stop()
+    # Flush queued feedback and cached answers before the process exits.
+    await feedback_log.close()
+    await flush_answer_cache()
+
+
+app = FastAPI(title="Custom Agent Orchestrator", lifespan=lifespan)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -39,3 +78,8 @@ app.include_router(feedback.router)
 @app.get("/health")
 async def health() -> dict[str, str]:
     return {"status": "ok"}
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics() -> PlainTextResponse:
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,91 @@
+"""Fast JSON encoding for AG UI events on the SSE hot path.
+
+Building and validating a Pydantic model for every streamed delta costs far
+more than the JSON itself. Each event class gets a template of its aliased
+keys and defaults, precomputed once from the model, so encoding is a single
+string join. Strings, enums and ``None`` are encoded directly; any other value
+goes through a Pydantic adapter for its field's type, so ``2`` in a float
+field still prints as ``2.0``. The output is byte-identical to
+``Event(**fields).model_dump_json(by_alias=True)``. Set
+``AGUI_VALIDATE_EVENTS=1`` to go through Pydantic instead, for debugging.
+"""
+from __future__ import annotations
+
+import json
+import os
+from enum import Enum
+from typing import Any
+
+from pydantic import BaseModel, TypeAdapter
+
+_encode_str = json.encoder.encode_basestring  # C-accelerated, leaves non-ASCII as is like Pydantic
+_MISSING: Any = object()
+
+
+def _encode_value(value: Any, adapter: TypeAdapter) -> str:
+    if value is None:
+        return "null"
+    if isinstance(value, str):
+        return _encode_str(value.value if isinstance(value, Enum) else value)
+    # Numbers, containers and models: let Pydantic coerce and print them as the model would.
+    return adapter.dump_json(adapter.validate_python(value), by_alias=True).decode()
+
+
+class _EventTemplate:
+    def __init__(self, model: type[BaseModel]) -> None:
+        self.model = model
+        # (alias, field name, '"alias":' with its leading brace/comma, pre-encoded default or None, adapter)
+        self.fields: list[tuple[str, str, str, str | None, TypeAdapter]] = []
+        # Fields the model drops from its JSON when they are None (see ``OMIT_IF_NONE``).
+        self.omit_if_none: frozenset[str] = getattr(model, "OMIT_IF_NONE", frozenset())
+        for index, (name, field) in enumerate(model.model_fields.items()):
+            key = field.alias or name
+            prefix = ("{" if index == 0 else ",") + f'"{key}":'
+            adapter = TypeAdapter(field.annotation)
+            encoded_default = (
+                None
+                if field.is_required()
+                else prefix + _encode_value(field.get_default(call_default_factory=True), adapter)
+            )
+            if name in self.omit_if_none and field.get_default() is None:
+                encoded_default = ""
+            self.fields.append((key, name, prefix, encoded_default, adapter))
+
+    def encode(self, values: dict[str, Any]) -> str:
+        parts = []
+        for key, name, prefix, encoded_default, adapter in self.fields:
+            value = values.get(key, _MISSING)
+            if value is _MISSING:
+                value = values.get(name, _MISSING)
+            if value is _MISSING:
+                if encoded_default is None:
+                    raise TypeError(f"{self.model.__name__} is missing required field {key!r}")
+                parts.append(encoded_default)
+            elif value is None and name in self.omit_if_none:
+                continue
+            elif type(value) is str:
+                parts.append(prefix + _encode_str(value))
+            else:
+                parts.append(prefix + _encode_value(value, adapter))
+        parts.append("}")
+        return "".join(parts)
+
+
+_templates: dict[type[BaseModel], _EventTemplate] = {}
+
+
+def validate_events() -> bool:
+    return os.getenv("AGUI_VALIDATE_EVENTS", "").lower() in {"1", "true", "yes"}
+
+
+def encode_event(model: type[BaseModel], **fields: Any) -> str:
+    """Serialize an AG UI event given its class and field values (aliases or names)."""
+    if _VALIDATE:
+        return model(**fields).model_dump_json(by_alias=True)
+    template = _templates.get(model)
+    if template is None:
+        template = _templates[model] = _EventTemplate(model)
+    return template.encode(fields)
+
+
+_VALIDATE = validate_events()
@@ -2,9 +2,9 @@
 from __future__ import annotations
 
 from enum import Enum
-from typing import Any, Literal, Optional
+from typing import Any, ClassVar, Literal, Optional
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, SerializerFunctionWrapHandler, model_serializer
 
 
 class EventType(str, Enum):
@@ -62,6 +62,20 @@ class RunErrorEvent(BaseEvent):
     type: Literal[EventType.RUN_ERROR] = EventType.RUN_ERROR
     message: str
     code: Optional[str] = None
+    # Seconds to wait before retrying, set when the run was shed under load.
+    retry_after: Optional[float] = Field(None, alias="retryAfter")
+
+    # Extension fields left out of the JSON when unset, so other errors keep the spec's shape.
+    OMIT_IF_NONE: ClassVar[frozenset[str]] = frozenset({"retry_after"})
+
+    @model_serializer(mode="wrap")
+    def _omit_unset_extensions(self, handler: SerializerFunctionWrapHandler) -> dict[str, Any]:
+        data = handler(self)
+        for name in self.OMIT_IF_NONE:
+            if getattr(self, name) is None:
+                data.pop(name, None)
+                data.pop(self.model_fields[name].alias, None)
+        return data
 
 
 class TextMessageStartEvent(BaseEvent):
@@ -56,12 +56,22 @@ class ChatResponse(BaseModel):
 
 
 class InterruptRequest(BaseModel):
+    thread_id: str = Field(..., alias="threadId")
+    run_id: str | None = Field(None, alias="runId")
     reason: str | None = None
 
+    class Config:
+        populate_by_name = True
+
 
 class HumanActionRequest(BaseModel):
     action: Literal["approve", "reject", "modify"]
     notes: str | None = None
+    # Required: an action only ever releases the thread it was taken on.
+    thread_id: str = Field(..., alias="threadId")
+
+    class Config:
+        populate_by_name = True
 
 
 class FeedbackLiteral(str, Enum):
@@ -73,3 +83,5 @@ class FeedbackLiteral(str, Enum):
 class FeedbackRequest(BaseModel):
     message_id: str
     feedback: FeedbackLiteral
+    tool_id: str | None = None
+    thread_id: str | None = None
@@ -38,6 +38,31 @@ tool_registry: dict[str, dict[str, Any]] = {
 }
 
 
+_version = 0
+
+
+def register_tool(tool_id: str, func: ToolFunc, schema: dict[str, Any]) -> None:
+    """Add or replace a tool; bumps the version so Gemini picks up the change."""
+    global _version
+    tool_registry[tool_id] = {"func": func, "schema": schema}
+    _version += 1
+
+
+def unregister_tool(tool_id: str) -> None:
+    global _version
+    if tool_registry.pop(tool_id, None) is not None:
+        _version += 1
+
+
+def registry_version() -> int:
+    """Changes whenever tools are registered or removed through this module."""
+    return _version
+
+
+def has_tool(tool_id: str) -> bool:
+    return tool_id in tool_registry
+
+
 def get_tool(tool_id: str) -> dict[str, Any]:
     if tool_id not in tool_registry:
         raise KeyError(f"Unknown tool_id: {tool_id}")
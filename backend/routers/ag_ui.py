@@ -1,21 +1,30 @@
 """AG UI Protocol router with SSE streaming support."""
 from __future__ import annotations
 
+import asyncio
 import json
+import os
+import time
 import uuid
-from typing import AsyncIterator
+from typing import Any, AsyncIterator
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Header, HTTPException
 from sse_starlette.sse import EventSourceResponse
 
-from core.gemini_client import GeminiClient
-from core.interrupt_flag import interrupt_flag
+from core.admission import AdmissionRejected, current_thread
+from core.gemini_client import ToolCall, get_gemini_client
+from core.metrics import FIRST_TEXT_SECONDS, RUN_EVENTS, RUN_SECONDS, RUN_STARTED_SECONDS, TOOL_SECONDS
+from core.policy_rag import retrieve_context
+from core.run_buffer import ResumeUnavailable, run_buffers
+from core.run_registry import run_registry
+from core.sse_coalescer import CoalescingConfig, FrameCoalescer, TextDelta
+from core.thread_store import RevisionConflict, history_window, thread_store
+from models.ag_ui_encoder import encode_event
 from models.ag_ui_types import (
     RunAgentInput,
     RunErrorEvent,
     RunFinishedEvent,
     RunStartedEvent,
-    TextMessageContentEvent,
     TextMessageEndEvent,
     TextMessageStartEvent,
     ToolCallArgsEvent,
@@ -26,7 +35,11 @@ from models.ag_ui_types import (
 from registry import tool_registry
 
 router = APIRouter(prefix="/ag-ui", tags=["ag-ui"])
-_gemini_client = GeminiClient()
+_gemini_client = get_gemini_client()
+_coalescing = CoalescingConfig.from_env()
+_history_tokens = int(os.getenv("THREAD_HISTORY_TOKENS", "2000"))
+_tool_timeout = float(os.getenv("TOOL_TIMEOUT_SECONDS", "15"))
+_tools_version: int | None = None
 
 AGENT_DESCRIPTIONS = {
     "general": "Answers open-ended HR questions directly with Gemini responses.",
@@ -35,149 +48,420 @@ AGENT_DESCRIPTIONS = {
 }
 
 
-async def stream_agent_events(run_input: RunAgentInput) -> AsyncIterator[dict]:
+def _sync_tools() -> None:
+    """Hand the tool schemas to Gemini once, and again only after the registry changes."""
+    global _tools_version
+    version = tool_registry.registry_version()
+    if version != _tools_version:
+        _gemini_client.register_tools(tool_registry.schema_list())
+        _tools_version = version
+
+
+def _timed_out(call: ToolCall) -> dict[str, str]:
+    print(f"[AG UI] {call.tool_id} timed out after {_tool_timeout:g}s")
+    return {"error": f"{call.tool_id} timed out", "message": f"{call.tool_id} did not respond in time."}
+
+
+async def _run_tool(call: ToolCall, func: Any, tool_args: dict[str, Any]) -> dict[str, Any]:
+    """Run one tool under the per-tool timeout; failures become an ``error`` payload.
+
+    The timeout covers the tool's ``text_stream`` too, which is only read
+    later, so the stream gets whatever is left of it.
+    """
+    started = time.perf_counter()
+    try:
+        payload = await asyncio.wait_for(func(tool_args), _tool_timeout)
+    except asyncio.TimeoutError:
+        return _timed_out(call)
+    except Exception as exc:
+        print(f"[AG UI] {call.tool_id} failed: {exc}")
+        return {"error": str(exc), "message": f"{call.tool_id} failed: {exc}"}
+    finally:
+        TOOL_SECONDS.observe(time.perf_counter() - started, call.tool_id)
+    if payload.get("text_stream") is not None:
+        deadline = asyncio.get_running_loop().time() + _tool_timeout - (time.perf_counter() - started)
+        payload["text_stream"] = _bounded_stream(call, payload, payload["text_stream"], deadline)
+    return payload
+
+
+async def _bounded_stream(
+    call: ToolCall, payload: dict[str, Any], stream: AsyncIterator[str], deadline: float
+) -> AsyncIterator[str]:
+    """``stream`` until ``deadline`` (loop time); then the tool's payload becomes a timeout."""
+    loop = asyncio.get_running_loop()
+    emitted = False
+    try:
+        while True:
+            try:
+                chunk = await asyncio.wait_for(stream.__anext__(), deadline - loop.time())
+            except StopAsyncIteration:
+                return
+            except asyncio.TimeoutError:
+                payload.update(_timed_out(call))
+                yield ("\n\n" if emitted else "") + payload["message"]
+                return
+            emitted = emitted or bool(chunk)
+            yield chunk
+    finally:
+        aclose = getattr(stream, "aclose", None)
+        if aclose is not None:
+            await aclose()
+
+
+def _tool_result_event(tool_call_id: str, tool_payload: dict[str, Any]) -> dict:
+    content: dict[str, Any] = {
+        "componentId": tool_payload.get("component_id"),
+        "props": tool_payload.get("props", {}),
+        "summary": tool_payload.get("message") or tool_payload.get("summary") or tool_payload.get("text"),
+        "artifacts": tool_payload.get("artifacts", []),
+        "requiresHuman": bool(tool_payload.get("requires_human")),
+    }
+    if "error" in tool_payload:
+        content["error"] = tool_payload["error"]
+    return {
+        "event": "message",
+        "data": encode_event(
+            ToolCallResultEvent,
+            messageId=f"tool_msg_{uuid.uuid4().hex[:8]}",
+            toolCallId=tool_call_id,
+            content=json.dumps(content),
+        )
+    }
+
+
+async def _text_deltas(tool_payload: dict[str, Any]) -> AsyncIterator[str]:
+    """Yield the assistant text for a tool payload as a sequence of deltas.
+
+    Tools that stream return an async iterator under ``text_stream``; every
+    other tool returns its text up front, which is sent as one delta. Frame
+    sizing is left to the coalescer.
+    """
+    text_stream = tool_payload.get("text_stream")
+    if text_stream is not None:
+        emitted = False
+        async for delta in text_stream:
+            if delta:
+                emitted = True
+                yield delta
+        if emitted:
+            return
+
+    response_text = (
+        tool_payload.get("message")
+        or tool_payload.get("summary")
+        or tool_payload.get("text")
+        or "I was not able to generate a response."
+    )
+    yield response_text
+
+
+async def stream_agent_events(run_input: RunAgentInput) -> AsyncIterator[dict | TextDelta]:
     """Stream AG UI protocol events for an agent run."""
     thread_id = run_input.thread_id
     run_id = run_input.run_id
+    # Gemini slots are shared out fairly between threads; see ``core.admission``.
+    current_thread.set(thread_id)
     
     try:
         # Emit RUN_STARTED
         yield {
             "event": "message",
-            "data": RunStartedEvent(
+            "data": encode_event(
+                RunStartedEvent,
                 threadId=thread_id,
                 runId=run_id,
                 parentRunId=run_input.parent_run_id
-            ).model_dump_json(by_alias=True)
+            )
         }
         
-        if interrupt_flag.is_triggered():
+        if await run_registry.is_interrupted(thread_id):
             raise HTTPException(status_code=409, detail="Conversation interrupted by user.")
         
+        # Append the new messages to the server-side thread. With
+        # ``forwardedProps.baseRevision`` the request carries only new messages.
+        forwarded = run_input.forwarded_props if isinstance(run_input.forwarded_props, dict) else {}
+        thread = await thread_store.append_async(
+            thread_id,
+            [msg.model_dump(by_alias=True, exclude_none=True) for msg in run_input.messages],
+            base_revision=forwarded.get("baseRevision"),
+        )
+
         # Extract the user message
-        user_messages = [msg for msg in run_input.messages if msg.role == "user"]
-        if not user_messages:
+        user_indexes = [index for index, msg in enumerate(thread.messages) if msg["role"] == "user"]
+        if not user_indexes:
             raise ValueError("No user message found in input")
         
-        latest_user_message = user_messages[-1].content
+        latest_user_message = thread.messages[user_indexes[-1]]["content"]
+        history = history_window(thread.messages[:user_indexes[-1]], _history_tokens)
         
         # Register tools and decide on agent/tool
-        _gemini_client.register_tools(tool_registry.schema_list())
-        decision = await _gemini_client.decide(latest_user_message, AGENT_DESCRIPTIONS)
-
-        tool_entry = tool_registry.get_tool(decision.tool_id)
-        tool_args = {**decision.arguments}
-        tool_args.setdefault("question", latest_user_message)
-
-        tool_call_id = f"tool_{uuid.uuid4().hex[:8]}"
-        yield {
-            "event": "message",
-            "data": ToolCallStartEvent(
-                toolCallId=tool_call_id,
-                toolCallName=decision.tool_id
-            ).model_dump_json(by_alias=True)
-        }
-
-        args_str = json.dumps(tool_args)
-        yield {
-            "event": "message",
-            "data": ToolCallArgsEvent(
-                toolCallId=tool_call_id,
-                delta=args_str
-            ).model_dump_json(by_alias=True)
-        }
+        _sync_tools()
+        # A single-round-trip answer comes from the router, so ground it like general.answer.
+        direct = _gemini_client.single_round_trip
+        decision = await _gemini_client.decide(
+            latest_user_message,
+            AGENT_DESCRIPTIONS,
+            thread_id,
+            follow_up=len(user_indexes) > 1,
+            context=retrieve_context(latest_user_message) if direct else (),
+            history=history if direct else (),
+        )
 
-        tool_payload = await tool_entry["func"](tool_args)
+        # The first call always runs; extra calls to tools that do not exist are dropped.
+        unknown = [call.tool_id for call in decision.extra_calls if not tool_registry.has_tool(call.tool_id)]
+        if unknown:
+            print(f"[AG UI] Dropped calls to unknown tools: {', '.join(unknown)}")
+        calls = [decision.calls[0]] + [
+            call for call in decision.extra_calls if tool_registry.has_tool(call.tool_id)
+        ]
+        tool_call_ids = [f"tool_{uuid.uuid4().hex[:8]}" for _ in calls]
+        tool_args_list = []
+        for call, tool_call_id in zip(calls, tool_call_ids):
+            tool_args = {**call.arguments}
+            tool_args.setdefault("question", latest_user_message)
+            tool_args_list.append(tool_args)
+            yield {
+                "event": "message",
+                "data": encode_event(
+                    ToolCallStartEvent,
+                    toolCallId=tool_call_id,
+                    toolCallName=call.tool_id
+                )
+            }
 
-        tool_result_message_id = f"tool_msg_{uuid.uuid4().hex[:8]}"
-        tool_result_content = json.dumps({
-            "componentId": tool_payload.get("component_id"),
-            "props": tool_payload.get("props", {}),
-            "summary": tool_payload.get("message") or tool_payload.get("summary") or tool_payload.get("text"),
-            "artifacts": tool_payload.get("artifacts", []),
-            "requiresHuman": bool(tool_payload.get("requires_human")),
-        })
-        yield {
-            "event": "message",
-            "data": ToolCallResultEvent(
-                messageId=tool_result_message_id,
-                toolCallId=tool_call_id,
-                content=tool_result_content,
-            ).model_dump_json(by_alias=True)
-        }
+            args_str = json.dumps(tool_args)
+            yield {
+                "event": "message",
+                "data": encode_event(
+                    ToolCallArgsEvent,
+                    toolCallId=tool_call_id,
+                    delta=args_str
+                )
+            }
 
-        yield {
-            "event": "message",
-            "data": ToolCallEndEvent(
-                toolCallId=tool_call_id
-            ).model_dump_json(by_alias=True)
+        payloads: list[dict[str, Any]] = [{} for _ in calls]
+        if decision.answer is not None:
+            # Single-round-trip mode: Gemini answered while routing, skip the second call.
+            payloads[0] = {
+                "message": decision.answer,
+                "requires_human": False,
+                "component_id": None,
+                "props": {},
+                "artifacts": [],
+            }
+        # Tools run concurrently; each result and end frame goes out as soon as
+        # that tool finishes, so a slow tool only delays its own card.
+        pending = {
+            asyncio.ensure_future(
+                _run_tool(call, tool_registry.get_tool(call.tool_id)["func"], {**tool_args, "history": history})
+            ): index
+            for index, (call, tool_args) in enumerate(zip(calls, tool_args_list))
+            if not payloads[index]
         }
+        finished = [index for index, payload in enumerate(payloads) if payload]
+        try:
+            while pending or finished:
+                for index in finished:
+                    yield _tool_result_event(tool_call_ids[index], payloads[index])
+                    yield {
+                        "event": "message",
+                        "data": encode_event(
+                            ToolCallEndEvent,
+                            toolCallId=tool_call_ids[index]
+                        )
+                    }
+                finished = []
+                if pending:
+                    done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        index = pending.pop(task)
+                        payloads[index] = task.result()
+                        finished.append(index)
+        finally:
+            for task in pending:
+                task.cancel()
 
-        response_text = (
-            tool_payload.get("message")
-            or tool_payload.get("summary")
-            or tool_payload.get("text")
-            or "I was not able to generate a response."
-        )
+        if all("error" in payload for payload in payloads):
+            raise RuntimeError("; ".join(payload["error"] for payload in payloads))
 
         message_id = f"msg_{uuid.uuid4().hex[:8]}"
         yield {
             "event": "message",
-            "data": TextMessageStartEvent(
+            "data": encode_event(
+                TextMessageStartEvent,
                 messageId=message_id,
                 role="assistant"
-            ).model_dump_json(by_alias=True)
+            )
         }
 
-        chunk_size = 80
-        for i in range(0, len(response_text), chunk_size):
-            chunk = response_text[i:i + chunk_size]
-            yield {
-                "event": "message",
-                "data": TextMessageContentEvent(
-                    messageId=message_id,
-                    delta=chunk
-                ).model_dump_json(by_alias=True)
-            }
+        response_parts: list[str] = []
+        for index, tool_payload in enumerate(payloads):
+            if index:
+                response_parts.append("\n\n")
+                yield TextDelta(message_id, "\n\n")
+            async for chunk in _text_deltas(tool_payload):
+                response_parts.append(chunk)
+                yield TextDelta(message_id, chunk)
 
         yield {
             "event": "message",
-            "data": TextMessageEndEvent(
+            "data": encode_event(
+                TextMessageEndEvent,
                 messageId=message_id
-            ).model_dump_json(by_alias=True)
+            )
         }
 
+        thread = await thread_store.append_async(
+            thread_id,
+            [{"id": message_id, "role": "assistant", "content": "".join(response_parts)}],
+        )
+
         yield {
             "event": "message",
-            "data": RunFinishedEvent(
+            "data": encode_event(
+                RunFinishedEvent,
                 threadId=thread_id,
                 runId=run_id,
                 result={
-                    "toolCallId": tool_call_id,
-                    "toolId": decision.tool_id,
-                    "requiresHuman": bool(tool_payload.get("requires_human")),
+                    "toolCallId": tool_call_ids[0],
+                    "toolId": calls[0].tool_id,
+                    "toolCalls": [
+                        {
+                            "toolCallId": tool_call_id,
+                            "toolId": call.tool_id,
+                            "status": "failed" if "error" in payload else "succeeded",
+                        }
+                        for call, tool_call_id, payload in zip(calls, tool_call_ids, payloads)
+                    ],
+                    "requiresHuman": any(payload.get("requires_human") for payload in payloads),
+                    "revision": thread.revision,
                 },
-            ).model_dump_json(by_alias=True)
+            )
         }
         
+    except RevisionConflict as e:
+        yield {
+            "event": "message",
+            "data": encode_event(
+                RunErrorEvent,
+                message=str(e),
+                code="REVISION_CONFLICT"
+            )
+        }
+
+    except AdmissionRejected as e:
+        yield {
+            "event": "message",
+            "data": encode_event(
+                RunErrorEvent,
+                message=str(e),
+                code="OVERLOADED",
+                retryAfter=e.retry_after,
+            )
+        }
+
     except Exception as e:
         # Emit RUN_ERROR
         yield {
             "event": "message",
-            "data": RunErrorEvent(
+            "data": encode_event(
+                RunErrorEvent,
                 message=str(e),
                 code="AGENT_ERROR"
-            ).model_dump_json(by_alias=True)
+            )
         }
 
 
+def _cancelled_event(reason: str) -> dict:
+    return {
+        "event": "message",
+        "data": encode_event(
+            RunErrorEvent,
+            message=f"Run cancelled{': ' + reason if reason else ''}",
+            code="RUN_CANCELLED"
+        )
+    }
+
+
+_TEXT_CONTENT = '{"type":"TEXT_MESSAGE_CONTENT"'
+_RUN_FINISHED = '{"type":"RUN_FINISHED"'
+_RUN_ERROR = '{"type":"RUN_ERROR"'
+
+
+async def _observed(frames: AsyncIterator[dict], started: float) -> AsyncIterator[dict]:
+    """Record run-level latency metrics from the frames handed to the transport."""
+    count = 0
+    first_text = False
+    outcome = "disconnected"
+    try:
+        async for frame in frames:
+            data = frame.get("data", "")
+            if count == 0:
+                RUN_STARTED_SECONDS.observe(time.perf_counter() - started)
+            count += 1
+            if not first_text and data.startswith(_TEXT_CONTENT):
+                first_text = True
+                FIRST_TEXT_SECONDS.observe(time.perf_counter() - started)
+            elif data.startswith(_RUN_FINISHED):
+                outcome = "finished"
+            elif data.startswith(_RUN_ERROR):
+                outcome = "cancelled" if '"code":"RUN_CANCELLED"' in data else "error"
+            yield frame
+    finally:
+        RUN_SECONDS.observe(time.perf_counter() - started, outcome)
+        RUN_EVENTS.observe(count)
+
+
 @router.post("/run")
 async def run_agent(run_input: RunAgentInput):
     """Run an agent with AG UI protocol streaming via SSE."""
-    return EventSourceResponse(stream_agent_events(run_input))
+    started = time.perf_counter()
+    events = run_registry.stream(
+        run_input.thread_id,
+        run_input.run_id,
+        stream_agent_events(run_input),
+        on_cancel=_cancelled_event,
+        max_queued=_coalescing.max_queued_events,
+    )
+    # The run is pumped into a replay buffer, so a dropped connection can resume it.
+    buffer = run_buffers.start(
+        run_input.thread_id,
+        run_input.run_id,
+        events,
+        cancel=lambda: run_registry.interrupt(run_input.thread_id, run_input.run_id, "client disconnected"),
+    )
+    # Deltas are merged per connection, paced by this client's own writes.
+    frames = run_buffers.follow(run_buffers.subscribe(buffer), FrameCoalescer(_coalescing).frames)
+    return EventSourceResponse(_observed(frames, started))
+
+
+@router.get("/runs/{thread_id}/{run_id}/events")
+async def resume_run(thread_id: str, run_id: str, last_event_id: str | None = Header(None)):
+    """Replay a run's events after ``Last-Event-ID`` and follow it if still running."""
+    buffer = run_buffers.get(thread_id, run_id)
+    if buffer is None:
+        raise HTTPException(status_code=404, detail="Run not found or no longer buffered.")
+    try:
+        after = int(last_event_id or 0)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Last-Event-ID must be an event id from this run.")
+    try:
+        subscription = run_buffers.subscribe(buffer, after)
+    except ResumeUnavailable as exc:
+        raise HTTPException(status_code=410, detail=str(exc))
+    return EventSourceResponse(run_buffers.follow(subscription, FrameCoalescer(_coalescing).frames))
 
 
 @router.get("/health")
 async def health():
     """Health check endpoint."""
-    return {"status": "ok", "protocol": "ag-ui"}
+    return {
+        "status": "ok",
+        "protocol": "ag-ui",
+        "decisionCache": _gemini_client.decision_cache.snapshot(),
+        "chatSessions": _gemini_client.sessions.snapshot(),
+        "circuit": _gemini_client.breaker.snapshot(),
+        "admission": _gemini_client.admission.snapshot(),
+        "inFlightGeminiCalls": _gemini_client.in_flight.in_flight(),
+        "runBuffers": run_buffers.snapshot(),
+    }
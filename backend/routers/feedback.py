@@ -1,14 +1,42 @@
 from __future__ import annotations
 
-from fastapi import APIRouter
+from typing import Any, Literal
 
+from fastapi import APIRouter, HTTPException
+
+from core.feedback_log import FeedbackRecord, feedback_log
 from models.types import FeedbackRequest
 
 router = APIRouter()
-_feedback_store: list[FeedbackRequest] = []
 
 
 @router.post("/feedback")
 async def submit_feedback(request: FeedbackRequest) -> dict[str, str]:
-    _feedback_store.append(request)
+    accepted = feedback_log.submit(
+        FeedbackRecord(
+            message_id=request.message_id,
+            feedback=request.feedback.value,
+            tool_id=request.tool_id,
+            thread_id=request.thread_id,
+        )
+    )
+    if not accepted:
+        raise HTTPException(status_code=503, detail="Feedback buffer is full, retry shortly.")
     return {"status": "received"}
+
+
+@router.get("/feedback/summary")
+async def feedback_summary(
+    group_by: Literal["message", "tool", "bucket"] = "tool",
+    since: float | None = None,
+    until: float | None = None,
+    tool_id: str | None = None,
+    message_id: str | None = None,
+) -> dict[str, Any]:
+    """Feedback counts per message, tool or time bucket (epoch seconds)."""
+    return {
+        "groupBy": group_by,
+        "bucketSeconds": feedback_log.bucket_seconds,
+        "groups": await feedback_log.summary(group_by, since, until, tool_id, message_id),
+        "log": feedback_log.snapshot(),
+    }
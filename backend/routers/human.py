@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from fastapi import APIRouter
 
-from core.interrupt_flag import interrupt_flag
+from core.run_registry import run_registry
 from models.types import HumanActionRequest
 
 router = APIRouter()
@@ -10,5 +10,5 @@ router = APIRouter()
 
 @router.post("/human-action")
 async def human_action(request: HumanActionRequest) -> dict[str, str]:
-    interrupt_flag.clear()
+    await run_registry.release(request.thread_id)
     return {"status": request.action, "notes": request.notes or ""}
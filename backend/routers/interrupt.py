@@ -2,13 +2,13 @@ from __future__ import annotations
 
 from fastapi import APIRouter
 
-from core.interrupt_flag import interrupt_flag
+from core.run_registry import run_registry
 from models.types import InterruptRequest
 
 router = APIRouter()
 
 
 @router.post("/interrupt")
-async def interrupt(request: InterruptRequest) -> dict[str, str]:
-    interrupt_flag.trigger()
-    return {"status": "interrupted", "reason": request.reason or ""}
+async def interrupt(request: InterruptRequest) -> dict[str, str | int]:
+    cancelled = await run_registry.interrupt(request.thread_id, request.run_id, request.reason or "")
+    return {"status": "interrupted", "reason": request.reason or "", "cancelledRuns": cancelled}
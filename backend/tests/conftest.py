@@ -0,0 +1,61 @@
+"""Shared fixtures: the app served in-process with a simulated Gemini.
+
+Tests drive ``main.app`` through httpx's ASGI transport. The shared Gemini
+client is pointed at :mod:`benchmarks.fake_gemini`, so no network access or
+API key is needed and model latency is under the test's control.
+"""
+from __future__ import annotations
+
+import json
+import math
+import uuid
+from typing import Any, AsyncIterator
+
+import httpx
+import pytest
+from sse_starlette.sse import AppStatus
+
+from benchmarks.fake_gemini import FakeProvider, ModelProfile, install
+from core.gemini_client import get_gemini_client
+from main import app
+
+
+@pytest.fixture(scope="session")
+def anyio_backend() -> str:
+    # One event loop for the whole session; sse-starlette keeps loop-bound state.
+    return "asyncio"
+
+
+@pytest.fixture
+def model_profile(monkeypatch: pytest.MonkeyPatch) -> ModelProfile:
+    """Latencies of the simulated model; tests adjust them before making requests."""
+    profile = ModelProfile(route_latency=0.05, first_token_latency=0.05, tokens_per_second=200, tokens=10)
+    client = get_gemini_client()
+    install(client, FakeProvider(profile))
+    # Route every prompt through the (fake) Gemini router instead of the local classifier.
+    monkeypatch.setattr(client, "intent_threshold", math.inf)
+    return profile
+
+
+@pytest.fixture
+async def api(model_profile: ModelProfile) -> AsyncIterator[httpx.AsyncClient]:
+    AppStatus.should_exit_event = None
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test", timeout=30) as client:
+        yield client
+
+
+def new_id(prefix: str) -> str:
+    return f"{prefix}_{uuid.uuid4().hex[:8]}"
+
+
+def run_body(thread_id: str, content: str) -> dict[str, Any]:
+    return {
+        "threadId": thread_id,
+        "runId": new_id("run"),
+        "messages": [{"id": new_id("user"), "role": "user", "content": content}],
+    }
+
+
+def sse_events(text: str) -> list[dict[str, Any]]:
+    """The JSON payloads of an SSE response body."""
+    return [json.loads(line[5:]) for line in text.splitlines() if line.startswith("data:")]
@@ -0,0 +1,61 @@
+"""General answers are cached per policy corpus."""
+from __future__ import annotations
+
+import asyncio
+from pathlib import Path
+
+import pytest
+
+from core.answer_cache import AnswerCache
+from tools import general_tools
+
+
+def test_answers_are_only_served_within_their_scope() -> None:
+    cache = AnswerCache(max_entries=8, ttl=60, similarity=0.5)
+    cache.set("how many vacation days do i get", "25 days", scope="corpus-a")
+
+    assert cache.get("how many vacation days do i get", "corpus-a") == "25 days"
+    assert cache.get("how many vacation days do i get", "corpus-b") is None
+    assert cache.get("how many vacation days do i get") is None
+    # Near duplicates are matched on the question, still within the scope.
+    assert cache.get("how many vacation days do we get", "corpus-a") == "25 days"
+    assert cache.get("how many vacation days do we get", "corpus-b") is None
+
+
+def test_scoped_answers_survive_a_reload(tmp_path: Path) -> None:
+    path = tmp_path / "answers.json"
+    cache = AnswerCache(max_entries=8, ttl=60, similarity=0.5, path=path)
+    cache.set("how many vacation days do i get", "25 days", scope="corpus-a")
+    cache.save()
+
+    reloaded = AnswerCache(max_entries=8, ttl=60, similarity=0.5, path=path)
+    assert reloaded.get("how many vacation days do we get", "corpus-a") == "25 days"
+    assert reloaded.get("how many vacation days do i get", "corpus-b") is None
+
+
+@pytest.mark.anyio
+async def test_back_to_back_answers_are_both_persisted(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    path = tmp_path / "answers.json"
+    cache = AnswerCache(max_entries=8, ttl=60, path=path, flush_delay=0.05)
+    monkeypatch.setattr(general_tools, "_answer_cache", cache)
+
+    general_tools._remember_answer("how many vacation days do i get", "corpus-a")("25 days")
+    general_tools._remember_answer("when is payday", "corpus-a")("The 25th")
+    await asyncio.sleep(0.1)
+    await cache.flush()
+
+    reloaded = AnswerCache(max_entries=8, ttl=60, path=path)
+    assert reloaded.get("how many vacation days do i get", "corpus-a") == "25 days"
+    assert reloaded.get("when is payday", "corpus-a") == "The 25th"
+
+
+@pytest.mark.anyio
+async def test_flush_writes_pending_answers_without_waiting(tmp_path: Path) -> None:
+    path = tmp_path / "answers.json"
+    cache = AnswerCache(max_entries=8, ttl=60, path=path, flush_delay=60)
+    cache.set("when is payday", "The 25th")
+    cache.save_soon()
+    assert not path.exists()
+
+    await cache.flush()
+    assert AnswerCache(max_entries=8, ttl=60, path=path).get("when is payday") == "The 25th"
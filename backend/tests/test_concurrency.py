@@ -0,0 +1,41 @@
+"""Routing runs on the Gemini thread pool, so overlapping runs do not serialize."""
+from __future__ import annotations
+
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from benchmarks.fake_gemini import ModelProfile
+from tests.conftest import new_id, run_body, sse_events
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_overlapping_runs_are_served_concurrently(api: httpx.AsyncClient, model_profile: ModelProfile) -> None:
+    runs = 4
+    model_profile.route_latency = 0.5
+    # Distinct prompts, so neither the decision cache nor request coalescing can help.
+    bodies = [run_body(new_id("thread"), f"I need leave next week, request {index}") for index in range(runs)]
+
+    started = time.perf_counter()
+    responses = await asyncio.gather(*(api.post("/ag-ui/run", json=body) for body in bodies))
+    elapsed = time.perf_counter() - started
+
+    for response in responses:
+        assert sse_events(response.text)[-1]["type"] == "RUN_FINISHED"
+    # Serialized routing would take at least runs * route_latency.
+    assert elapsed < runs * model_profile.route_latency * 0.6
+
+
+async def test_event_loop_stays_responsive_while_routing(api: httpx.AsyncClient, model_profile: ModelProfile) -> None:
+    model_profile.route_latency = 0.5
+    run = asyncio.ensure_future(api.post("/ag-ui/run", json=run_body(new_id("thread"), "I need leave on Friday")))
+    started = time.perf_counter()
+    # Both wait on the loop; a routing call that blocked it would hold them up for its full latency.
+    await asyncio.sleep(0.1)
+    health = await api.get("/health")
+    assert health.status_code == 200
+    assert time.perf_counter() - started < 0.3
+    assert sse_events((await run).text)[-1]["type"] == "RUN_FINISHED"
@@ -0,0 +1,43 @@
+"""The fast event encoder matches Pydantic byte for byte."""
+from __future__ import annotations
+
+from typing import Any
+
+import pytest
+
+from models import ag_ui_types as types
+from models.ag_ui_encoder import _EventTemplate
+
+_NUMBERS = {"int": 2, "float": 2.5, "large": 1e20, "small": 1e-7, "negative": -3}
+_MESSAGE = {"id": "m1", "role": "assistant", "content": "héllo \"quoted\"\n", "toolCalls": [{"id": "c", "n": 1e20}]}
+
+CASES: list[tuple[type[types.BaseEvent], dict[str, Any]]] = [
+    (types.RunStartedEvent, {"threadId": "t", "runId": "r"}),
+    (types.RunStartedEvent, {"threadId": "t", "runId": "r", "parentRunId": "p", "timestamp": 1700000000000}),
+    (types.RunFinishedEvent, {"threadId": "t", "runId": "r", "result": {"numbers": _NUMBERS, "ok": True}}),
+    (types.RunFinishedEvent, {"threadId": "t", "runId": "r", "result": 1e20}),
+    (types.RunErrorEvent, {"message": "boom", "code": "AGENT_ERROR"}),
+    (types.RunErrorEvent, {"message": "busy", "code": "OVERLOADED", "retryAfter": 2}),
+    (types.RunErrorEvent, {"message": "busy", "retryAfter": 1e20}),
+    (types.RunErrorEvent, {"message": "busy", "retryAfter": 0.25, "rawEvent": {"n": -3}}),
+    (types.TextMessageStartEvent, {"messageId": "m"}),
+    (types.TextMessageContentEvent, {"messageId": "m", "delta": "naïve ✓   </script>"}),
+    (types.TextMessageEndEvent, {"messageId": "m", "timestamp": 5}),
+    (types.ToolCallStartEvent, {"toolCallId": "c", "toolCallName": "leave.applyForm", "parentMessageId": "m"}),
+    (types.ToolCallArgsEvent, {"toolCallId": "c", "delta": '{"question": "x"}'}),
+    (types.ToolCallEndEvent, {"toolCallId": "c"}),
+    (types.ToolCallResultEvent, {"messageId": "m", "toolCallId": "c", "content": "{}"}),
+    (types.ToolCallResultEvent, {"messageId": "m", "toolCallId": "c", "content": "{}", "role": None}),
+    (types.MessagesSnapshotEvent, {"messages": [_MESSAGE]}),
+    (types.MessagesSnapshotEvent, {"messages": [types.AGUIMessage(**_MESSAGE)], "rawEvent": [1, 2.0, 1e20]}),
+]
+
+
+def test_every_event_type_is_covered() -> None:
+    events = {cls for cls in vars(types).values() if isinstance(cls, type) and issubclass(cls, types.BaseEvent)}
+    assert events - {types.BaseEvent} <= {model for model, _ in CASES}
+
+
+@pytest.mark.parametrize(("model", "fields"), CASES, ids=lambda case: getattr(case, "__name__", ""))
+def test_fast_encoding_matches_pydantic(model: type[types.BaseEvent], fields: dict[str, Any]) -> None:
+    assert _EventTemplate(model).encode(fields) == model(**fields).model_dump_json(by_alias=True)
@@ -0,0 +1,73 @@
+"""Interrupts cancel only the run or thread they name."""
+from __future__ import annotations
+
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from benchmarks.fake_gemini import ModelProfile
+from tests.conftest import new_id, run_body, sse_events
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def slow_answers(model_profile: ModelProfile) -> ModelProfile:
+    # A streamed general answer takes about a second.
+    model_profile.route_latency = 0.1
+    model_profile.tokens = 20
+    model_profile.tokens_per_second = 20
+    return model_profile
+
+
+async def test_interrupting_one_thread_leaves_the_other_running(api: httpx.AsyncClient, slow_answers: ModelProfile) -> None:
+    interrupted, other = new_id("thread"), new_id("thread")
+    started = time.perf_counter()
+    first = asyncio.ensure_future(api.post("/ag-ui/run", json=run_body(interrupted, f"who are you? {interrupted}")))
+    second = asyncio.ensure_future(api.post("/ag-ui/run", json=run_body(other, f"who are you? {other}")))
+    await asyncio.sleep(0.3)
+
+    response = await api.post("/interrupt", json={"threadId": interrupted, "reason": "stop"})
+    assert response.json()["cancelledRuns"] == 1
+
+    cancelled = sse_events((await first).text)
+    cancelled_after = time.perf_counter() - started
+    finished = sse_events((await second).text)
+    assert cancelled[-1]["type"] == "RUN_ERROR"
+    assert cancelled[-1]["code"] == "RUN_CANCELLED"
+    assert cancelled_after < 0.8
+    assert finished[-1]["type"] == "RUN_FINISHED"
+    assert "".join(event.get("delta", "") for event in finished).count("token") == slow_answers.tokens
+
+
+async def test_held_thread_is_released_only_by_its_own_human_action(api: httpx.AsyncClient, model_profile: ModelProfile) -> None:
+    held, other = new_id("thread"), new_id("thread")
+    await api.post("/interrupt", json={"threadId": held})
+
+    refused = sse_events((await api.post("/ag-ui/run", json=run_body(held, "I need leave on Monday"))).text)
+    assert refused[-1]["type"] == "RUN_ERROR"
+    assert "interrupted" in refused[-1]["message"]
+    # Other threads are not affected by the hold, and cannot lift it.
+    assert sse_events((await api.post("/ag-ui/run", json=run_body(other, "I need leave on Monday"))).text)[-1]["type"] == "RUN_FINISHED"
+    assert (await api.post("/human-action", json={"action": "approve"})).status_code == 422
+    assert (await api.post("/human-action", json={"action": "approve", "threadId": other})).status_code == 200
+    still_refused = sse_events((await api.post("/ag-ui/run", json=run_body(held, "I need leave on Monday"))).text)
+    assert still_refused[-1]["type"] == "RUN_ERROR"
+
+    assert (await api.post("/human-action", json={"action": "approve", "threadId": held})).status_code == 200
+    resumed = sse_events((await api.post("/ag-ui/run", json=run_body(held, "I need leave on Monday"))).text)
+    assert resumed[-1]["type"] == "RUN_FINISHED"
+
+
+async def test_interrupting_a_run_does_not_hold_its_thread(api: httpx.AsyncClient, slow_answers: ModelProfile) -> None:
+    thread = new_id("thread")
+    body = run_body(thread, f"who are you? {thread}")
+    run = asyncio.ensure_future(api.post("/ag-ui/run", json=body))
+    await asyncio.sleep(0.3)
+
+    response = await api.post("/interrupt", json={"threadId": thread, "runId": body["runId"]})
+    assert response.json()["cancelledRuns"] == 1
+    assert sse_events((await run).text)[-1]["code"] == "RUN_CANCELLED"
+    assert sse_events((await api.post("/ag-ui/run", json=run_body(thread, "I need leave"))).text)[-1]["type"] == "RUN_FINISHED"
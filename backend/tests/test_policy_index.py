@@ -0,0 +1,55 @@
+"""Policy index reloads happen off the request path."""
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from core import policy_index
+
+
+@pytest.fixture
+def policy_dir(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    (tmp_path / "leave.md").write_text("# Leave\n\nAnnual leave is 25 days.\n", encoding="utf-8")
+    monkeypatch.setenv("POLICY_DIR", str(tmp_path))
+    monkeypatch.setenv("POLICY_RELOAD_INTERVAL", "0")
+    monkeypatch.delenv("POLICY_INDEX_PATH", raising=False)
+    monkeypatch.setattr(policy_index, "_index", None)
+    monkeypatch.setattr(policy_index, "_refreshing", None)
+    return tmp_path
+
+
+def test_reload_swaps_in_a_new_index_and_leaves_the_old_one_intact(policy_dir: Path) -> None:
+    first = policy_index.get_policy_index()
+    assert first.size == 1
+
+    (policy_dir / "expenses.md").write_text("# Expenses\n\nSubmit receipts within 30 days.\n", encoding="utf-8")
+    assert policy_index.get_policy_index() is first
+    policy_index._refreshing.result(timeout=5)
+
+    second = policy_index.get_policy_index()
+    assert second is not first
+    assert (first.size, second.size) == (1, 2)
+    assert second.version == first.version + 1
+    assert second.search("receipts")[0][0]["policy_id"] == "expenses"
+    assert first.search("receipts") == []
+
+
+def test_reload_without_changes_keeps_the_same_index(policy_dir: Path) -> None:
+    first = policy_index.get_policy_index()
+    policy_index.get_policy_index()
+    policy_index._refreshing.result(timeout=5)
+    assert policy_index.get_policy_index() is first
+
+
+def test_unreadable_serialized_index_is_rebuilt_and_replaced(
+    policy_dir: Path, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    serialized = tmp_path / "cache" / "index.json"
+    serialized.parent.mkdir()
+    serialized.write_text('{"directory": "', encoding="utf-8")  # cut off mid-write
+    monkeypatch.setenv("POLICY_INDEX_PATH", str(serialized))
+
+    assert policy_index.get_policy_index().size == 1
+    assert policy_index.PolicyIndex.load(serialized, policy_dir).size == 1
+    assert [path.name for path in serialized.parent.iterdir()] == ["index.json"]
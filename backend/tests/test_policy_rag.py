@@ -0,0 +1,52 @@
+"""Policy retrieval loads off the request path and keeps NumPy out of startup."""
+from __future__ import annotations
+
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from core import policy_index, policy_rag
+
+pytestmark = pytest.mark.skipif(not policy_rag.NUMPY_AVAILABLE, reason="needs numpy")
+
+
+@pytest.fixture
+def rag_dirs(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    policies = tmp_path / "policies"
+    policies.mkdir()
+    (policies / "leave.md").write_text("# Leave\n\nAnnual leave is 25 days a year.\n", encoding="utf-8")
+    monkeypatch.setenv("POLICY_DIR", str(policies))
+    monkeypatch.setenv("POLICY_RAG_DIR", str(tmp_path / "rag"))
+    monkeypatch.setenv("POLICY_RELOAD_INTERVAL", "0")
+    monkeypatch.delenv("POLICY_RAG_ENABLED", raising=False)
+    monkeypatch.delenv("POLICY_INDEX_PATH", raising=False)
+    monkeypatch.setattr(policy_index, "_index", None)
+    monkeypatch.setattr(policy_index, "_refreshing", None)
+    monkeypatch.setattr(policy_rag, "_current", None)
+    monkeypatch.setattr(policy_rag, "_building", None)
+    return policies
+
+
+def test_retriever_is_built_in_the_background_and_swapped_on_change(rag_dirs: Path) -> None:
+    assert policy_rag.get_retriever() is None
+    policy_rag._building.result(timeout=10)
+    first = policy_rag.get_retriever()
+    assert first is not None and first.search("annual leave")[0].policy_id == "leave"
+
+    (rag_dirs / "expenses.md").write_text("# Expenses\n\nSubmit receipts within 30 days.\n", encoding="utf-8")
+    policy_index.get_policy_index()
+    policy_index._refreshing.result(timeout=10)
+    # The old matrix keeps answering while the new one is built.
+    assert policy_rag.get_retriever() is first
+    policy_rag._building.result(timeout=10)
+    assert policy_rag.get_retriever().search("receipts")[0].policy_id == "expenses"
+
+
+def test_importing_the_app_does_not_import_numpy() -> None:
+    probe = "import sys, main; print('numpy' in sys.modules)"
+    result = subprocess.run(
+        [sys.executable, "-c", probe], cwd=Path(__file__).resolve().parent.parent, capture_output=True, text=True
+    )
+    assert result.stdout.strip().splitlines()[-1] == "False"
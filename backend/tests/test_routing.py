@@ -0,0 +1,103 @@
+"""Routing shortcuts (local classifier, decision cache) only apply to a thread's first turn."""
+from __future__ import annotations
+
+import pytest
+
+from benchmarks.fake_gemini import FakeChat, ModelProfile
+from core import intent_classifier
+from core.gemini_client import GeminiClient, get_gemini_client, history_contents
+from core.intent_classifier import get_classifier
+from registry import tool_registry
+from routers.ag_ui import AGENT_DESCRIPTIONS, _sync_tools
+from tests.conftest import new_id
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_follow_up_is_not_served_a_decision_cached_by_another_thread(model_profile: ModelProfile) -> None:
+    client = get_gemini_client()
+    _sync_tools()
+    follow_up = f"and what about next week {new_id('q')}"
+    first, other = new_id("thread"), new_id("thread")
+
+    assert (await client._route(follow_up, AGENT_DESCRIPTIONS, first))[1] == "gemini"
+    assert (await client._route(follow_up, AGENT_DESCRIPTIONS, new_id("thread")))[1] == "cache"
+
+    await client._route(f"hello there {new_id('q')}", AGENT_DESCRIPTIONS, other)
+    _, source = await client._route(follow_up, AGENT_DESCRIPTIONS, other)
+    assert source == "gemini"
+
+
+async def test_turns_answered_from_the_cache_are_kept_in_the_thread_history(model_profile: ModelProfile) -> None:
+    client = get_gemini_client()
+    _sync_tools()
+    question = f"how does the review cycle work {new_id('q')}"
+    await client._route(question, AGENT_DESCRIPTIONS, new_id("thread"))
+
+    thread = new_id("thread")
+    assert (await client._route(question, AGENT_DESCRIPTIONS, thread))[1] == "cache"
+    session = client._session(thread, tuple(AGENT_DESCRIPTIONS.items()))
+    assert session.turns == 1
+    assert session.chat.history[0]["parts"] == [question]
+
+
+@pytest.fixture
+def offline_client() -> GeminiClient:
+    """A client with no model attached, as without an API key."""
+    client = GeminiClient()
+    client._loaded = True
+    client.register_tools(tool_registry.schema_list())
+    get_classifier()
+    return client
+
+
+async def test_without_gemini_first_turns_use_the_local_classifier(offline_client: GeminiClient) -> None:
+    prompt = "I need to take PTO next week"
+    decision, source = await offline_client._route(prompt, AGENT_DESCRIPTIONS, new_id("thread"))
+    assert (decision.tool_id, source) == ("leave.applyForm", "local")
+
+    _, source = await offline_client._route(prompt, AGENT_DESCRIPTIONS, new_id("thread"), follow_up=True)
+    assert source == "rule_based"
+
+
+async def test_local_routing_waits_for_the_classifier_to_load(
+    offline_client: GeminiClient, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(intent_classifier, "_classifier", None)
+    monkeypatch.setattr(intent_classifier, "_loading", None)
+    prompt = "I need to take PTO next week"
+
+    assert (await offline_client._route(prompt, AGENT_DESCRIPTIONS, new_id("thread")))[1] == "rule_based"
+    intent_classifier._loading.result(timeout=10)
+    assert (await offline_client._route(prompt, AGENT_DESCRIPTIONS, new_id("thread")))[1] == "local"
+
+
+async def test_single_round_trip_routing_is_grounded_like_general_answer(
+    model_profile: ModelProfile, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    client = get_gemini_client()
+    _sync_tools()
+    sent: list[tuple[str, list]] = []
+    send = FakeChat.send_message
+
+    def spy(chat: FakeChat, content: str) -> object:
+        sent.append((content, list(chat.history)))
+        return send(chat, content)
+
+    monkeypatch.setattr(FakeChat, "send_message", spy)
+    history = [{"role": "user", "content": "hi"}, {"role": "assistant", "content": "Hello! How can I help?"}]
+    question = f"how long is parental leave {new_id('q')}"
+
+    await client._route(question, AGENT_DESCRIPTIONS, new_id("thread"), True, ["Parental leave: 16 weeks"], history)
+    assert "Parental leave: 16 weeks" not in sent[-1][0]
+
+    monkeypatch.setattr(client, "single_round_trip", True)
+    await client._route(question, AGENT_DESCRIPTIONS, new_id("thread"), True, ["Parental leave: 16 weeks"], history)
+    content, chat_history = sent[-1]
+    assert "Parental leave: 16 weeks" in content and question in content
+    assert chat_history == history_contents(history)
+
+    # A first turn grounded on other excerpts is not served the cached decision.
+    await client._route(question, AGENT_DESCRIPTIONS, new_id("thread"), False, ["Parental leave: 16 weeks"])
+    _, source = await client._route(question, AGENT_DESCRIPTIONS, new_id("thread"), False, ["Parental leave: 20 weeks"])
+    assert source == "gemini"
@@ -0,0 +1,87 @@
+"""Run buffers: atomic resume, per-connection coalescing and expiry."""
+from __future__ import annotations
+
+import asyncio
+import json
+from typing import Any, AsyncIterator
+
+import pytest
+
+from core.run_buffer import ResumeUnavailable, RunBufferConfig, RunBuffers
+from core.sse_coalescer import CoalescingConfig, FrameCoalescer, TextDelta
+
+pytestmark = pytest.mark.anyio
+
+_START = {"event": "message", "data": '{"type":"TEXT_MESSAGE_START","messageId":"m"}'}
+_END = {"event": "message", "data": '{"type":"TEXT_MESSAGE_END","messageId":"m"}'}
+
+
+async def _run(deltas: int, gate: asyncio.Event | None = None) -> AsyncIterator[Any]:
+    yield _START
+    for index in range(deltas):
+        yield TextDelta("m", f"{index} ")
+    if gate is not None:
+        await gate.wait()
+    yield _END
+
+
+async def _collect(frames: AsyncIterator[dict]) -> list[dict]:
+    return [frame async for frame in frames]
+
+
+def _text(frames: list[dict]) -> str:
+    return "".join(json.loads(frame["data"]).get("delta", "") for frame in frames)
+
+
+async def test_subscribe_refuses_evicted_frames_before_streaming() -> None:
+    buffers = RunBuffers(RunBufferConfig(capacity=4))
+    buffer = buffers.start("thread", "run", _run(10))
+    await buffer.task
+
+    with pytest.raises(ResumeUnavailable):
+        buffers.subscribe(buffer, 2)
+    with pytest.raises(ResumeUnavailable):
+        buffers.subscribe(buffer, buffer.last_id + 1)
+    assert buffer.subscribers == 0
+
+
+async def test_subscription_holds_its_frames_until_read() -> None:
+    buffers = RunBuffers(RunBufferConfig(capacity=4))
+    buffer = buffers.start("thread", "run", _run(10))
+    subscription = buffers.subscribe(buffer)
+    for _ in range(20):
+        await asyncio.sleep(0)
+
+    # The run waits for the reader instead of evicting frames it has not read.
+    assert (buffer.last_id, buffer.finished) == (4, False)
+    items = await _collect(buffers.follow(subscription))
+    assert "".join(item.delta for item in items if isinstance(item, TextDelta)) == "".join(f"{i} " for i in range(10))
+    assert items[-1]["data"] == _END["data"]
+
+
+async def test_each_connection_coalesces_and_resumes_after_a_merged_frame() -> None:
+    buffers = RunBuffers(RunBufferConfig())
+    config = CoalescingConfig(frame_bytes=8, max_delay=1.0)
+    buffer = buffers.start("thread", "run", _run(12))
+    await buffer.task
+
+    full = await _collect(buffers.follow(buffers.subscribe(buffer), FrameCoalescer(config).frames))
+    assert len(full) < buffer.last_id
+    assert full[-1]["id"] == str(buffer.last_id)
+    assert _text(full) == "".join(f"{index} " for index in range(12))
+
+    # Resuming after any frame replays exactly what came after it.
+    for position, frame in enumerate(full[:-1]):
+        after = int(frame["id"])
+        rest = await _collect(buffers.follow(buffers.subscribe(buffer, after), FrameCoalescer(config).frames))
+        assert _text(rest) == _text(full[position + 1:])
+
+
+async def test_finished_buffers_expire_without_being_looked_up() -> None:
+    buffers = RunBuffers(RunBufferConfig(ttl=0.05))
+    buffer = buffers.start("thread", "old", _run(1))
+    await buffer.task
+    assert buffers.snapshot() == {"live": 0, "finished": 1}
+
+    await asyncio.sleep(0.1)
+    assert buffers.snapshot() == {"live": 0, "finished": 0}
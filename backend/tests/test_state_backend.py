@@ -0,0 +1,29 @@
+"""Expired holds do not pile up in either state backend."""
+from __future__ import annotations
+
+import time
+from pathlib import Path
+
+from core.state_backend import MemoryStateBackend, SQLiteStateBackend
+
+
+def test_memory_backend_prunes_expired_holds_on_write() -> None:
+    now = [0.0]
+    backend = MemoryStateBackend(hold_ttl=10, clock=lambda: now[0])
+    backend.hold("old", "stop")
+    now[0] = 11
+    assert not backend.is_held("old")
+
+    backend.hold("new", "stop")
+    assert backend.is_held("new")
+    assert len(backend._held) == 1
+
+
+def test_sqlite_backend_prunes_expired_holds_on_write(tmp_path: Path) -> None:
+    backend = SQLiteStateBackend(str(tmp_path / "state.sqlite3"), hold_ttl=0.05)
+    backend.hold("old", "stop")
+    time.sleep(0.1)
+
+    backend.hold("new", "stop")
+    rows = backend._conn.execute("SELECT thread_id FROM held_threads").fetchall()
+    assert rows == [("new",)]
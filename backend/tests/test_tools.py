@@ -0,0 +1,47 @@
+"""Every tool, streamed text included, is bounded by TOOL_TIMEOUT_SECONDS."""
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import Any, AsyncIterator
+
+import httpx
+import pytest
+
+from benchmarks.fake_gemini import ModelProfile
+from registry import tool_registry
+from routers import ag_ui
+from tests.conftest import new_id, run_body, sse_events
+
+pytestmark = pytest.mark.anyio
+
+
+def _stalling_tool(chunks: int) -> Any:
+    async def tool(_: dict[str, Any]) -> dict[str, Any]:
+        async def stream() -> AsyncIterator[str]:
+            for index in range(chunks):
+                yield f"chunk{index} "
+            await asyncio.sleep(3600)
+
+        return {"message": None, "text_stream": stream(), "requires_human": False, "component_id": None,
+                "props": {}, "artifacts": []}
+
+    return tool
+
+
+@pytest.mark.parametrize("chunks", [0, 2])
+async def test_stalled_text_stream_times_out_like_any_tool(
+    api: httpx.AsyncClient, model_profile: ModelProfile, monkeypatch: pytest.MonkeyPatch, chunks: int
+) -> None:
+    monkeypatch.setitem(tool_registry.get_tool("general.answer"), "func", _stalling_tool(chunks))
+    monkeypatch.setattr(ag_ui, "_tool_timeout", 0.3)
+
+    started = time.perf_counter()
+    events = sse_events((await api.post("/ag-ui/run", json=run_body(new_id("thread"), "who are you?"))).text)
+    assert time.perf_counter() - started < 1.5
+
+    text = "".join(event["delta"] for event in events if event["type"] == "TEXT_MESSAGE_CONTENT")
+    assert text.startswith("".join(f"chunk{index} " for index in range(chunks)))
+    assert text.endswith("general.answer did not respond in time.")
+    assert events[-1]["type"] == "RUN_FINISHED"
+    assert events[-1]["result"]["toolCalls"][0]["status"] == "failed"
@@ -1,10 +1,26 @@
 from __future__ import annotations
 
-from typing import Any, Dict
+from typing import Any, Callable, Dict
 
-from core.gemini_client import GeminiClient
+from core.answer_cache import AnswerCache
+from core.gemini_client import get_gemini_client, normalize_prompt
+from core.policy_rag import get_retriever, retrieve_context
 
-_general_client = GeminiClient()
+_general_client = get_gemini_client()
+_answer_cache = AnswerCache.from_env(namespace=_general_client.model_name)
+
+
+def _remember_answer(key: str, scope: str) -> Callable[[str], None]:
+    def _store(answer: str) -> None:
+        _answer_cache.set(key, answer, scope)
+        _answer_cache.save_soon()
+
+    return _store
+
+
+async def flush_answer_cache() -> None:
+    """Write answers still waiting to be persisted; called on shutdown."""
+    await _answer_cache.flush()
 
 
 async def answer_general_question(payload: Dict[str, Any]) -> dict[str, Any]:
@@ -19,10 +35,32 @@ async def answer_general_question(payload: Dict[str, Any]) -> dict[str, Any]:
             "artifacts": [],
         }
 
-    # Gemini SDK is synchronous today, so run it in a thread to avoid blocking the loop.
-    answer = await _general_client.generate_text(question)
+    # Earlier turns of the thread, windowed by the router; empty on a first question.
+    history = payload.get("history") or []
+    cache_key = normalize_prompt(question)
+    # Answers are grounded on policy excerpts, so they only stand for the corpus they came from.
+    retriever = get_retriever()
+    cache_scope = retriever.fingerprint if retriever is not None else ""
+    # A follow-up only makes sense with its thread, so only standalone questions are cached.
+    cached = None if history else _answer_cache.get(cache_key, cache_scope)
+    if cached is not None:
+        return {
+            "message": cached,
+            "requires_human": False,
+            "component_id": None,
+            "props": {},
+            "artifacts": [],
+        }
+
+    # The router drains ``text_stream`` and forwards each chunk as it arrives.
     return {
-        "message": answer,
+        "message": None,
+        "text_stream": _general_client.stream_text(
+            question,
+            on_complete=None if history else _remember_answer(cache_key, cache_scope),
+            context=retrieve_context(question, retriever) if retriever is not None else [],
+            history=history,
+        ),
         "requires_human": False,
         "component_id": None,
         "props": {},
@@ -2,39 +2,35 @@ from __future__ import annotations
 
 from typing import Any
 
+from core.policy_index import get_policy_index
 from models.types import Artifact
 
-POLICIES = [
-    {
-        "policy_id": "pto-2025",
-        "title": "Paid Time Off",
-        "summary": "Employees accrue 1.5 days of PTO per month with rollover up to 20 days.",
-        "links": [
-            {"label": "Policy PDF", "href": "https://example.com/policies/pto"},
-        ],
-    },
-    {
-        "policy_id": "remote-first",
-        "title": "Remote Work",
-        "summary": "We operate remote-first with quarterly in-person collaboration weeks.",
-        "links": [
-            {"label": "Guidelines", "href": "https://example.com/policies/remote"},
-        ],
-    },
-]
+POLICY_RESULTS = 3
+
+_MISSING_POLICY = {
+    "policy_id": "no-policy",
+    "title": "No policy found",
+    "summary": "No HR policies are loaded yet. Please contact the HR team.",
+    "links": [],
+}
 
 
 async def policy_show_card_tool(payload: dict[str, Any]) -> dict[str, Any]:
-    question = (payload.get("question") or "").lower()
-    policy = POLICIES[0]
-    for candidate in POLICIES:
-        if any(keyword in question for keyword in candidate["title"].lower().split()):
-            policy = candidate
-            break
+    question = payload.get("question") or ""
+    index = get_policy_index()
+    results = index.search(question, k=POLICY_RESULTS)
+    if results:
+        policy = results[0][0]
+    else:
+        policy = index.first() or _MISSING_POLICY
+    alternates = [
+        {"policy_id": alt["policy_id"], "title": alt["title"], "summary": alt["summary"]}
+        for alt, _ in results[1:]
+    ]
     artifact = Artifact(id=policy["policy_id"], kind="text", payload=policy["summary"])
     return {
         "component_id": "policy.showCard",
-        "props": policy,
+        "props": {**policy, "alternates": alternates},
         "text": policy["summary"],
         "message": policy["summary"],
         "artifacts": [artifact.model_dump(by_alias=True)],
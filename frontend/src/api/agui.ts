@@ -5,6 +5,10 @@ import type { RunAgentInput, BaseEvent } from "@ag-ui/core";
 
 const API_BASE = import.meta.env.VITE_API_BASE || "http://localhost:8000";
 
+// Reconnects to a run whose stream dropped before RUN_FINISHED / RUN_ERROR.
+const RESUME_ATTEMPTS = 3;
+const RESUME_BACKOFF_MS = 500;
+
 type AGUIStreamCallbacks = {
   next: (event: BaseEvent) => void;
   error: (error: Error) => void;
@@ -20,53 +24,95 @@ export function runAGUIAgent(input: RunAgentInput): {
   return {
     subscribe: (callbacks: AGUIStreamCallbacks) => {
       const abortController = new AbortController();
-
-      // Start SSE connection with a resilient SSE parser that handles partial chunks
-      const connectSSE = async () => {
-        try {
-          const response = await fetch(`${API_BASE}/ag-ui/run`, {
-            method: 'POST',
+      // Last SSE id seen; a dropped stream resumes after it instead of re-running.
+      let lastEventId: string | null = null;
+      let finished = false;
+
+      const openRun = () =>
+        fetch(`${API_BASE}/ag-ui/run`, {
+          method: 'POST',
+          headers: {
+            'Content-Type': 'application/json',
+            'Accept': 'text/event-stream',
+          },
+          body: JSON.stringify(input),
+          signal: abortController.signal,
+        });
+
+      const resumeRun = () =>
+        fetch(
+          `${API_BASE}/ag-ui/runs/${encodeURIComponent(input.threadId)}/${encodeURIComponent(input.runId)}/events`,
+          {
             headers: {
-              'Content-Type': 'application/json',
               'Accept': 'text/event-stream',
+              'Last-Event-ID': lastEventId ?? '0',
             },
-            body: JSON.stringify(input),
             signal: abortController.signal,
-          });
+          },
+        );
 
-          if (!response.ok) {
-            throw new Error(`HTTP error! status: ${response.status}`);
-          }
+      const readStream = async (response: Response) => {
+        const reader = response.body?.getReader();
+        const decoder = new TextDecoder();
 
-          const reader = response.body?.getReader();
-          const decoder = new TextDecoder();
+        if (!reader) {
+          throw new Error('No response body');
+        }
+
+        let buffer = "";
 
-          if (!reader) {
-            throw new Error('No response body');
+        while (true) {
+          const { done, value } = await reader.read();
+
+          if (done) {
+            // Flush any remaining buffered data before completing
+            buffer += decoder.decode().replace(/\r\n/g, '\n');
+            processBuffer(buffer, callbacks);
+            return;
           }
 
-          let buffer = "";
-
-          while (true) {
-            const { done, value } = await reader.read();
-            
-            if (done) {
-              // Flush any remaining buffered data before completing
-              buffer += decoder.decode().replace(/\r\n/g, '\n');
-              processBuffer(buffer, callbacks);
-              callbacks.complete();
-              break;
+          // Decode the chunk
+          const chunk = decoder.decode(value, { stream: true });
+          buffer += chunk.replace(/\r\n/g, '\n');
+          buffer = processBuffer(buffer, callbacks);
+        }
+      };
+
+      // Start SSE connection with a resilient SSE parser that handles partial chunks
+      const connectSSE = async () => {
+        let request = openRun;
+        for (let attempt = 0; ; attempt += 1) {
+          let failure: Error | null = null;
+          try {
+            const response = await request();
+
+            if (!response.ok) {
+              // The run is unknown or its buffer expired; resuming cannot help.
+              callbacks.error(new Error(`HTTP error! status: ${response.status}`));
+              return;
             }
 
-            // Decode the chunk
-            const chunk = decoder.decode(value, { stream: true });
-            buffer += chunk.replace(/\r\n/g, '\n');
-            buffer = processBuffer(buffer, callbacks);
+            await readStream(response);
+          } catch (error) {
+            if (error instanceof Error && error.name === 'AbortError') {
+              return;
+            }
+            failure = error instanceof Error ? error : new Error(String(error));
           }
-        } catch (error) {
-          if (error instanceof Error && error.name !== 'AbortError') {
-            callbacks.error(error);
+
+          if (finished || (failure === null && lastEventId === null)) {
+            callbacks.complete();
+            return;
+          }
+          if (lastEventId === null || attempt >= RESUME_ATTEMPTS) {
+            callbacks.error(failure ?? new Error('Stream ended before the run finished'));
+            return;
           }
+          await new Promise((resolve) => setTimeout(resolve, RESUME_BACKOFF_MS * (attempt + 1)));
+          if (abortController.signal.aborted) {
+            return;
+          }
+          request = resumeRun;
         }
       };
 
@@ -78,8 +124,8 @@ export function runAGUIAgent(input: RunAgentInput): {
           const rawEvent = workingBuffer.slice(0, separatorIndex);
           workingBuffer = workingBuffer.slice(separatorIndex + 2);
 
-          const dataLines = rawEvent
-            .split('\n')
+          const lines = rawEvent.split('\n');
+          const dataLines = lines
             .filter((line) => line.startsWith('data:'))
             .map((line) => line.slice(5).trimStart());
 
@@ -88,6 +134,13 @@ export function runAGUIAgent(input: RunAgentInput): {
             if (dataPayload) {
               try {
                 const event = JSON.parse(dataPayload) as BaseEvent;
+                const idLine = lines.find((line) => line.startsWith('id:'));
+                if (idLine) {
+                  lastEventId = idLine.slice(3).trim();
+                }
+                if (event.type === 'RUN_FINISHED' || event.type === 'RUN_ERROR') {
+                  finished = true;
+                }
                 streamCallbacks.next(event);
               } catch (parseError) {
                 console.error('Failed to parse SSE event payload:', parseError);
@@ -106,6 +159,15 @@ export function runAGUIAgent(input: RunAgentInput): {
       return {
         unsubscribe: () => {
           abortController.abort();
+          if (!finished) {
+            // The server keeps a dropped run alive for a resume; a deliberate stop ends it now.
+            fetch(`${API_BASE}/interrupt`, {
+              method: 'POST',
+              headers: { 'Content-Type': 'application/json' },
+              body: JSON.stringify({ threadId: input.threadId, runId: input.runId, reason: 'stopped by user' }),
+              keepalive: true,
+            }).catch(() => undefined);
+          }
         },
       };
     },
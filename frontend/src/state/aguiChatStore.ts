@@ -17,6 +17,8 @@ export interface AGUIChatState {
   loading: boolean;
   error?: string;
   threadId: string;
+  /** Server-side thread revision; once known, only new messages are sent. */
+  revision?: number;
   send: (text: string) => Promise<void>;
   stopStreaming: () => void;
   reset: () => void;
@@ -29,6 +31,7 @@ const initialState = {
   loading: false,
   error: undefined as string | undefined,
   threadId: `thread_${Date.now()}`,
+  revision: undefined as number | undefined,
 };
 
 // Helper to convert AG UI message to ChatMessage
@@ -64,6 +67,7 @@ const store: StateCreator<AGUIChatState, [], [], AGUIChatState> = (set, get) =>
     send: async (text: string) => {
       const currentMessages = get().messages;
       const threadId = get().threadId;
+      const revision = get().revision;
       const runId = `run_${Date.now()}`;
       
       // Add user message optimistically
@@ -80,9 +84,11 @@ const store: StateCreator<AGUIChatState, [], [], AGUIChatState> = (set, get) =>
         toolInvocations: [],
       });
 
-      // Prepare AG UI messages format
+      // Prepare AG UI messages format. The server keeps the thread, so after
+      // the first run only the new message is sent along with its base revision.
+      const history = revision === undefined ? currentMessages : [];
       const aguiMessages: AGUIMessage[] = [
-        ...currentMessages.map(msg => {
+        ...history.map(msg => {
           const base: any = {
             id: (msg.metadata?.id as string) || `msg_${Date.now()}_${Math.random()}`,
             role: msg.role,
@@ -111,6 +117,7 @@ const store: StateCreator<AGUIChatState, [], [], AGUIChatState> = (set, get) =>
           tools: [],
           context: [],
           state: null,
+          forwardedProps: revision === undefined ? {} : { baseRevision: revision },
         });
 
         // Track streaming state
@@ -198,7 +205,11 @@ const store: StateCreator<AGUIChatState, [], [], AGUIChatState> = (set, get) =>
                     if (typeof parsed.summary === "string") {
                       invocation.args.summary = parsed.summary;
                     }
-                    invocation.status = invocation.status === "running" ? "succeeded" : invocation.status;
+                    if (parsed.error) {
+                      invocation.status = "failed";
+                    } else if (invocation.status === "running") {
+                      invocation.status = "succeeded";
+                    }
                   } catch (err) {
                     console.error("Failed to parse TOOL_CALL_RESULT:", err);
                   }
@@ -224,11 +235,18 @@ const store: StateCreator<AGUIChatState, [], [], AGUIChatState> = (set, get) =>
                 break;
 
               case "RUN_FINISHED":
-                set({ loading: false });
+                const finishedEvent = event as any;
+                set({ loading: false, revision: finishedEvent.result?.revision });
                 break;
 
               case "RUN_ERROR":
                 const errorEvent = event as any;
+                if (errorEvent.code === "REVISION_CONFLICT" && revision !== undefined) {
+                  // Out of sync with the server thread: resend with the full history.
+                  set({ messages: currentMessages, revision: undefined });
+                  void get().send(text);
+                  break;
+                }
                 set({ 
                   loading: false, 
                   error: errorEvent.message || "An error occurred" 
@@ -8,6 +8,7 @@ interface PolicyProps extends Record<string, unknown> {
   summary?: string;
   policy_id?: string;
   links?: { label: string; href: string }[];
+  alternates?: { policy_id: string; title: string; summary: string }[];
 }
 
 export default function PolicyCard({ props }: ToolComponentProps) {
@@ -40,6 +41,20 @@ export default function PolicyCard({ props }: ToolComponentProps) {
             </ul>
           </div>
         )}
+        {Array.isArray(data.alternates) && data.alternates.length > 0 && (
+          <div className="space-y-2">
+            <Separator />
+            <p className="text-xs uppercase text-muted-foreground">Related policies</p>
+            <ul className="space-y-1">
+              {data.alternates.map((alt) => (
+                <li key={alt.policy_id} className="text-sm">
+                  <span className="font-medium">{alt.title}</span>
+                  <span className="text-muted-foreground"> &mdash; {alt.summary}</span>
+                </li>
+              ))}
+            </ul>
+          </div>
+        )}
       </CardContent>
     </Card>
   );